@@ -1,18 +1,65 @@
 import asyncio
-import io
-import re
 import sys
-from collections.abc import Mapping
+import time
+from collections.abc import AsyncIterable, Callable, Iterable, Mapping
+from contextlib import suppress
 from types import TracebackType
 from typing import Any, Optional, TypeVar, Union, overload
 
+from aiohttp import hdrs
 from aiohttp.abc import AbstractStreamWriter
 from aiohttp.web import BaseRequest, ContentCoding, Request, StreamResponse
-
+from multidict import istr
+
+from .admission import AdmissionController
+from .backpressure import SlowConsumerPolicy, SlowReason
+from .broadcast import Broadcaster
+from .buffer import BufferPolicy, _SendBuffer
+from .compression import _negotiate, _StreamCompressor
+from .disconnect import _ConnectionLostHook, _watch_disconnect
+from .event import (
+    LINE_SEP_EXPR,
+    ServerSentEvent,
+    _Data,
+    _Field,
+    _line_separator,
+    _ping_frame,
+    _serialize,
+    _serialize_data,
+)
 from .helpers import _ContextManager
+from .history import EventHistory, MemoryEventHistory
+from .keepalive import PingScheduler
+from .metrics import Histogram, LatencyProfile, MetricsRegistry, StreamMetrics
+from .retry import RetryPolicy
+from .router import TopicRouter
+from .shutdown import SHUTDOWN_MANAGER_KEY, ShutdownManager
+from .transport import BroadcastTransport, UnixSocketTransport
 
 __version__ = "2.2.0"
-__all__ = ["EventSourceResponse", "sse_response"]
+__all__ = [
+    "AdmissionController",
+    "BroadcastTransport",
+    "Broadcaster",
+    "BufferPolicy",
+    "EventHistory",
+    "EventSourceResponse",
+    "Histogram",
+    "LatencyProfile",
+    "MemoryEventHistory",
+    "MetricsRegistry",
+    "PingScheduler",
+    "RetryPolicy",
+    "ServerSentEvent",
+    "ShutdownManager",
+    "SlowConsumerPolicy",
+    "StreamMetrics",
+    "TopicRouter",
+    "UnixSocketTransport",
+    "sse_response",
+]
+
+_X_ACCEL_BUFFERING = istr("X-Accel-Buffering")
 
 
 class EventSourceResponse(StreamResponse):
@@ -26,12 +73,46 @@ class EventSourceResponse(StreamResponse):
                 # stream data
                 resp.send('foo')
             return resp
+
+    A lost connection is noticed on the next failed write or ping. With
+    ``watch_disconnect`` it is noticed right away, ``wait()`` returns and
+    ``on_disconnect`` is called with the response. This hooks into private
+    internals of aiohttp server, as there is no public API for it yet, so
+    it is opt-in and supported only for known aiohttp versions.
     """
 
+    # per-connection state is kept in slots, at 100k connections per host
+    # the instance dict alone would take tens of megabytes
+    __slots__ = (
+        "_ping_interval",
+        "_idle_ping",
+        "_last_write",
+        "_ping_task",
+        "_ping_scheduler",
+        "_sep",
+        "_line_sep",
+        "_buffer",
+        "_flush_task",
+        "_compress",
+        "_compress_force",
+        "_compress_strategy",
+        "_compressor",
+        "_metrics_registry",
+        "_metrics",
+        "_profile",
+        "_slow_consumer",
+        "_on_disconnect",
+        "_disconnect_watch",
+        "_retry_policy",
+        "_retry_sent",
+        "_disconnect_hook",
+    )
+
     DEFAULT_PING_INTERVAL = 15
     DEFAULT_SEPARATOR = "\r\n"
     DEFAULT_LAST_EVENT_HEADER = "Last-Event-Id"
-    LINE_SEP_EXPR = re.compile(r"\r\n|\r|\n")
+    DEFAULT_MAX_PENDING = 100
+    LINE_SEP_EXPR = LINE_SEP_EXPR
 
     def __init__(
         self,
@@ -40,21 +121,53 @@ class EventSourceResponse(StreamResponse):
         reason: Optional[str] = None,
         headers: Optional[Mapping[str, str]] = None,
         sep: Optional[str] = None,
+        ping_scheduler: Optional[PingScheduler] = None,
+        buffer_policy: Optional[BufferPolicy] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        slow_consumer: Optional[SlowConsumerPolicy] = None,
+        on_disconnect: Optional[Callable[["EventSourceResponse"], None]] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        watch_disconnect: bool = False,
     ):
+        if on_disconnect is not None and not watch_disconnect:
+            raise ValueError("on_disconnect requires watch_disconnect")
+
         super().__init__(status=status, reason=reason)
 
         if headers is not None:
             self.headers.extend(headers)
 
         # mandatory for servers-sent events headers
-        self.headers["Content-Type"] = "text/event-stream"
-        self.headers["Cache-Control"] = "no-cache"
-        self.headers["Connection"] = "keep-alive"
-        self.headers["X-Accel-Buffering"] = "no"
+        # istr constants, so header names are not copied per response
+        self.headers[hdrs.CONTENT_TYPE] = "text/event-stream"
+        self.headers[hdrs.CACHE_CONTROL] = "no-cache"
+        self.headers[hdrs.CONNECTION] = "keep-alive"
+        self.headers[_X_ACCEL_BUFFERING] = "no"
 
         self._ping_interval: float = self.DEFAULT_PING_INTERVAL
-        self._ping_task: Optional[asyncio.Task[None]] = None
+        self._idle_ping = False
+        self._last_write = 0.0
+        # ping task, or plain future when pings are sent by ping_scheduler
+        self._ping_task: Optional[asyncio.Future[None]] = None
+        self._ping_scheduler = ping_scheduler
         self._sep = sep if sep is not None else self.DEFAULT_SEPARATOR
+        self._line_sep = _line_separator(self._sep)
+        self._buffer = _SendBuffer(buffer_policy) if buffer_policy is not None else None
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self._compress = False
+        self._compress_force: Optional[str] = None
+        self._compress_strategy: Optional[int] = None
+        self._compressor: Optional[_StreamCompressor] = None
+        self._metrics_registry = metrics
+        self._metrics = StreamMetrics() if metrics is not None else None
+        self._profile = metrics.profile if metrics is not None else None
+        self._slow_consumer = slow_consumer
+        self._on_disconnect = on_disconnect
+        self._disconnect_watch = watch_disconnect
+        self._retry_policy = retry_policy
+        # reconnection time last sent according to retry_policy
+        self._retry_sent: Optional[int] = None
+        self._disconnect_hook: Optional[_ConnectionLostHook] = None
 
     def is_connected(self) -> bool:
         """Check connection is prepared and ping task is not done."""
@@ -63,19 +176,70 @@ class EventSourceResponse(StreamResponse):
 
         return not self._ping_task.done()
 
-    async def _prepare(self, request: Request) -> "EventSourceResponse":
+    async def _prepare(
+        self,
+        request: Request,
+        broadcaster: Optional[Broadcaster] = None,
+        history: Optional[EventHistory] = None,
+        admission: Optional[AdmissionController] = None,
+    ) -> "EventSourceResponse":
         # TODO(PY311): Use Self for return type.
-        await self.prepare(request)
+        if admission is not None:
+            await admission._prepare(self, request)
+        else:
+            await self.prepare(request)
+        if history is None and broadcaster is not None:
+            history = broadcaster.history
+        if history is not None and self.last_event_id is not None:
+            await self._replay(history, self.last_event_id)
+        if broadcaster is not None:
+            broadcaster.subscribe(self)
         return self
 
+    async def _replay(self, history: EventHistory, last_event_id: str) -> None:
+        # repeat until no new events are stored while sending, so there is
+        # no gap before subscribing to live events
+        while events := await history.after(last_event_id):
+            await self.send_many(events)
+            # storages may keep events without id, there is nothing to
+            # continue from, and the same tail would be returned again
+            event_id = events[-1].id
+            if event_id is None or event_id == last_event_id:
+                break
+            last_event_id = event_id
+
     async def prepare(self, request: BaseRequest) -> Optional[AbstractStreamWriter]:
         """Prepare for streaming and send HTTP headers.
 
         :param request: regular aiohttp.web.Request.
         """
         if not self.prepared:
+            if self._compress:
+                self._start_stream_compression(request)
             writer = await super().prepare(request)
-            self._ping_task = asyncio.create_task(self._ping())
+            self._last_write = asyncio.get_running_loop().time()
+            if self._ping_scheduler is None:
+                self._ping_task = asyncio.create_task(self._ping())
+            else:
+                self._ping_task = asyncio.get_running_loop().create_future()
+                self._ping_scheduler.add(self)
+            if self._buffer is not None:
+                self._flush_task = asyncio.create_task(self._flush())
+            if self._metrics_registry is not None:
+                assert self._metrics is not None
+                self._metrics_registry._start(self._metrics)
+            if self._disconnect_watch:
+                self._disconnect_hook = _watch_disconnect(
+                    request, self._on_connection_lost
+                )
+            if self._retry_policy is not None:
+                self._retry_policy._add(self)
+            # single bound method instead of a closure per cleanup step
+            self._ping_task.add_done_callback(self._on_stream_done)
+            if isinstance(request, Request):
+                manager = request.config_dict.get(SHUTDOWN_MANAGER_KEY)
+                if manager is not None:
+                    manager.register(self)
             # explicitly enabling chunked encoding, since content length
             # usually not known beforehand.
             self.enable_chunked_encoding()
@@ -89,19 +253,130 @@ class EventSourceResponse(StreamResponse):
                 raise asyncio.CancelledError()
             return self._payload_writer
 
+    def _on_connection_lost(self) -> None:
+        # client is gone, no need to wait for the next failed write
+        if not self.is_connected():
+            return
+        self._close()
+        if self._on_disconnect is not None:
+            self._on_disconnect(self)
+
+    def _on_stream_done(self, _: "asyncio.Future[None]") -> None:
+        # metrics hooks run user code, so they go last and after everything
+        # else is released, even if some step fails
+        try:
+            if self._ping_scheduler is not None:
+                self._ping_scheduler.remove(self)
+            if self._flush_task is not None:
+                self._flush_task.cancel()
+            if self._disconnect_hook is not None:
+                assert self._req is not None
+                self._disconnect_hook.remove(
+                    self._req.protocol, self._on_connection_lost
+                )
+            if self._retry_policy is not None:
+                self._retry_policy._remove(self)
+        finally:
+            if self._metrics_registry is not None:
+                assert self._metrics is not None
+                self._metrics_registry._finish(self._metrics)
+
+    def _retry_frame(self) -> bytes:
+        # retry field alone, once reconnection time of the policy changes
+        if self._retry_policy is None:
+            return b""
+        retry = self._retry_policy.retry
+        if retry == self._retry_sent:
+            return b""
+        self._retry_sent = retry
+        return b"retry: %d%s%s" % (retry, self._line_sep, self._line_sep)
+
+    def _start_stream_compression(self, request: BaseRequest) -> None:
+        coding = self._compress_force
+        if coding is None:
+            # negotiated coding depends on the request, caches must know
+            self.headers.add(hdrs.VARY, hdrs.ACCEPT_ENCODING)
+            coding = _negotiate(request.headers.get(hdrs.ACCEPT_ENCODING, ""))
+        if coding is None or coding == ContentCoding.identity.value:
+            return
+        self._compressor = _StreamCompressor(coding, self._compress_strategy)
+        self.headers[hdrs.CONTENT_ENCODING] = coding
+
+    async def write(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        if self._compressor is not None:
+            data = self._compressor.compress(data)
+        if self._metrics is None and self._slow_consumer is None:
+            await super().write(data)
+        else:
+            await self._write_monitored(data)
+
+    async def _write_monitored(self, data: Union[bytes, bytearray, memoryview]) -> None:
+        loop = asyncio.get_running_loop()
+        metrics = self._metrics
+        policy = self._slow_consumer
+        timer = None
+        if policy is not None and policy.max_drain_time is not None:
+            timer = loop.call_later(
+                policy.max_drain_time, self._on_slow_consumer, "drain_time"
+            )
+
+        # the callback runs before the write returns only if the write
+        # was suspended waiting for the client to drain the buffer
+        suspended: list[bool] = []
+        if metrics is not None:
+            loop.call_soon(suspended.append, True)
+        start = time.perf_counter()
+        try:
+            await super().write(data)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        if metrics is not None:
+            duration = time.perf_counter() - start
+            metrics._add_write(len(data), duration, bool(suspended))
+            if self._profile is not None:
+                self._profile.write_time.record(duration)
+        if (
+            policy is not None
+            and policy.max_buffer_size is not None
+            and self.write_buffer_size > policy.max_buffer_size
+        ):
+            self._on_slow_consumer("buffer_size")
+
+    def _on_slow_consumer(self, reason: SlowReason) -> None:
+        policy = self._slow_consumer
+        assert policy is not None
+        if policy.on_slow is not None:
+            policy.on_slow(self, reason)
+        if policy.disconnect and self.is_connected():
+            self.stop_streaming()
+            # abort wakes up writes waiting for the drain
+            transport = self._req.transport if self._req is not None else None
+            if transport is not None:
+                transport.abort()
+
+    async def write_eof(self, data: bytes = b"") -> None:
+        if self._compressor is not None and not self._eof_sent:
+            data = self._compressor.finish(data)
+            self._compressor = None
+        await super().write_eof(data)
+
     async def send(
         self,
-        data: str,
-        id: Optional[str] = None,
-        event: Optional[str] = None,
+        data: _Data,
+        id: Optional[_Field] = None,
+        event: Optional[_Field] = None,
         retry: Optional[int] = None,
+        key: Optional[_Field] = None,
     ) -> None:
         """Send data using EventSource protocol
 
-        :param str data: The data field for the message.
-        :param str id: The event ID to set the EventSource object's last
+        :param data: The data field for the message, either str or UTF-8
+            encoded bytes-like object.
+        :param id: The event ID to set the EventSource object's last
             event ID value to.
-        :param str event: The event's type. If this is specified, an event will
+        :param event: The event's type. If this is specified, an event will
             be dispatched on the browser to the listener for the specified
             event name; the web site would use addEventListener() to listen
             for named events. The default event type is "message".
@@ -109,29 +384,227 @@ class EventSourceResponse(StreamResponse):
             the event. [What code handles this?] This must be an integer,
             specifying the reconnection time in milliseconds. If a non-integer
             value is specified, the field is ignored.
+        :param key: Key of the event in buffer with ``conflate`` policy,
+            defaults to the event type. Not sent to the client.
         """
-        buffer = io.StringIO()
-        if id is not None:
-            buffer.write(self.LINE_SEP_EXPR.sub("", f"id: {id}"))
-            buffer.write(self._sep)
-
-        if event is not None:
-            buffer.write(self.LINE_SEP_EXPR.sub("", f"event: {event}"))
-            buffer.write(self._sep)
-
-        for chunk in self.LINE_SEP_EXPR.split(data):
-            buffer.write(f"data: {chunk}")
-            buffer.write(self._sep)
-
-        if retry is not None:
-            if not isinstance(retry, int):
-                raise TypeError("retry argument must be int")
-            buffer.write(f"retry: {retry}")
-            buffer.write(self._sep)
-
-        buffer.write(self._sep)
+        start = 0.0
+        if self._profile is not None:
+            start = time.perf_counter()
+        if id is None and event is None and retry is None:
+            frame = _serialize_data(data, self._line_sep)
+        else:
+            frame = _serialize(data, id, event, retry, None, self._line_sep)
+        if self._profile is not None:
+            self._profile.serialize_time.record(time.perf_counter() - start)
+        await self._send_frame(frame, event if key is None else key, start=start)
+
+    def send_nowait(
+        self,
+        data: _Data,
+        id: Optional[_Field] = None,
+        event: Optional[_Field] = None,
+        retry: Optional[int] = None,
+        key: Optional[_Field] = None,
+    ) -> bool:
+        """Queue data for sending without waiting, requires ``buffer_policy``.
+
+        Accepts the same arguments as ``send``. Returns False if the event
+        was discarded because of buffer overflow or closed connection.
+        """
+        if self._buffer is None:
+            raise RuntimeError("send_nowait() requires buffer_policy")
+        start = 0.0
+        if self._profile is not None:
+            start = time.perf_counter()
+        frame = _serialize(data, id, event, retry, None, self._line_sep)
+        if self._profile is not None:
+            self._profile.serialize_time.record(time.perf_counter() - start)
+        return self._put_frame(frame, event if key is None else key, start=start)
+
+    async def send_event(self, event: ServerSentEvent) -> None:
+        """Send prepared event using EventSource protocol.
+
+        The event is serialized once per separator, so the same
+        :class:`ServerSentEvent` could be cheaply sent to many clients.
+
+        :param event: event to send.
+        """
+        key = event.event if event.key is None else event.key
+        await self._send_frame(event.encode(self._sep), key)
+
+    async def send_many(self, events: Iterable[Union[str, ServerSentEvent]]) -> None:
+        """Send several events at once using single write.
+
+        :param events: events to send, plain strings are sent as data.
+        """
+        frames = [
+            (
+                event.encode(self._sep)
+                if isinstance(event, ServerSentEvent)
+                else _serialize_data(event, self._line_sep)
+            )
+            for event in events
+        ]
+        frame = b"".join(frames)
+        if frame:
+            await self._send_frame(frame, None, len(frames))
+
+    async def stream(
+        self,
+        source: AsyncIterable[Union[str, ServerSentEvent]],
+        *,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        """Send events from async iterator until it is exhausted or
+        streaming is stopped, e.g. the client is disconnected.
+
+        Events produced while the previous write is in progress are sent
+        together using single write. Up to ``max_pending`` events are read
+        ahead, then reading waits for the write, so a fast source is slowed
+        down to the client. The source is closed with ``aclose()``, if it
+        has one, e.g. async generator::
+
+            async def ticks():
+                while True:
+                    yield str(datetime.now())
+                    await asyncio.sleep(1)
+
+            async with sse_response(request) as resp:
+                await resp.stream(ticks())
+
+        :param source: events to send, plain strings are sent as data.
+        :param int max_pending: number of events read ahead while writing.
+        """
+        closed = self._ping_task
+        if closed is None:
+            raise RuntimeError("Response is not started")
+        if max_pending < 1:
+            raise ValueError("max_pending must be greater then 0")
+
+        loop = asyncio.get_running_loop()
+        pending: list[Union[str, ServerSentEvent]] = []
+        waiter: Optional[asyncio.Future[None]] = None
+        # set by reader waiting for pending events to be taken
+        taken: Optional[asyncio.Future[None]] = None
+
+        async def read() -> None:
+            nonlocal taken
+            async for item in source:
+                pending.append(item)
+                if waiter is not None and not waiter.done():
+                    waiter.set_result(None)
+                if len(pending) >= max_pending:
+                    taken = loop.create_future()
+                    await taken
+
+        reader = asyncio.create_task(read())
         try:
-            await self.write(buffer.getvalue().encode("utf-8"))
+            while not closed.done():
+                if not pending:
+                    if reader.done():
+                        break
+                    waiter = loop.create_future()
+                    await asyncio.wait(
+                        (waiter, reader, closed), return_when=asyncio.FIRST_COMPLETED
+                    )
+                    waiter = None
+                    continue
+
+                events = pending[:]
+                pending.clear()
+                if taken is not None and not taken.done():
+                    taken.set_result(None)
+                try:
+                    await self.send_many(events)
+                except ConnectionResetError:
+                    # streaming is already stopped
+                    break
+            if reader.done():
+                # raise errors of the source
+                reader.result()
+        finally:
+            if not reader.done():
+                reader.cancel()
+                with suppress(asyncio.CancelledError):
+                    await reader
+            aclose = getattr(source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def _send_frame(
+        self,
+        frame: bytes,
+        key: Optional[_Field],
+        count: int = 1,
+        start: float = 0.0,
+    ) -> None:
+        # start - time of send() call, when profiled
+        if self._profile is not None and not start:
+            start = time.perf_counter()
+        if self._buffer is None:
+            if self._retry_policy is not None:
+                frame = self._retry_frame() + frame
+            await self._write_frame(frame)
+            if self._metrics is not None:
+                self._metrics._events += count
+            if self._profile is not None:
+                self._profile.send_latency.record(time.perf_counter() - start)
+        else:
+            self._put_frame(frame, key, count, start)
+
+    def _put_frame(
+        self,
+        frame: bytes,
+        key: Optional[_Field],
+        count: int = 1,
+        start: float = 0.0,
+    ) -> bool:
+        assert self._buffer is not None
+        if self._ping_task is None:
+            raise RuntimeError("Response is not started")
+        if not self.is_connected():
+            return False
+
+        if self._profile is not None and not start:
+            start = time.perf_counter()
+        if self._buffer.put(frame, key, start):
+            if self._metrics is not None:
+                self._metrics._events += count
+            return True
+        if self._buffer.policy.overflow == "disconnect":
+            self.stop_streaming()
+        return False
+
+    async def _flush(self) -> None:
+        # write queued frames until connection is closed
+        buffer = self._buffer
+        assert buffer is not None
+        try:
+            while True:
+                entries = await buffer.get_entries()
+                frames = [e.frame for e in entries]
+                if self._retry_policy is not None:
+                    # added on write, queued frames may be dropped or replaced
+                    frames.insert(0, self._retry_frame())
+                try:
+                    # single chunk for the whole batch
+                    await self._write_frame(b"".join(frames))
+                finally:
+                    buffer.task_done(len(entries))
+                if self._profile is not None:
+                    now = time.perf_counter()
+                    for entry in entries:
+                        self._profile.send_latency.record(now - entry.time)
+        except (ConnectionResetError, RuntimeError):
+            # RuntimeError - on writing after EOF
+            self._close()
+        finally:
+            buffer.clear()
+
+    async def _write_frame(self, frame: bytes) -> None:
+        self._last_write = asyncio.get_running_loop().time()
+        try:
+            await self.write(frame)
         except ConnectionResetError:
             self.stop_streaming()
             raise
@@ -167,7 +640,44 @@ class EventSourceResponse(StreamResponse):
         force: Union[bool, ContentCoding, None] = False,
         strategy: Optional[int] = None,
     ) -> None:
-        raise NotImplementedError
+        """Enable compression of the stream, must be called before prepare.
+
+        Content coding is negotiated using ``Accept-Encoding`` request
+        header, brotli is preferred when ``brotli`` module is installed,
+        then gzip and deflate. Compressor is flushed after every write,
+        so events are delivered without delay. With ``sse_response`` pass
+        ``compress=True``, or content coding to force, instead.
+
+        :param force: content coding to use regardless of ``Accept-Encoding``.
+        :param int strategy: zlib compression strategy.
+        """
+        if self.prepared:
+            raise RuntimeError("Response is already started")
+        if isinstance(force, bool):
+            # backward compatible aiohttp behavior
+            force = ContentCoding.deflate if force else None
+        self._compress = True
+        self._compress_force = None if force is None else force.value
+        self._compress_strategy = strategy
+
+    @property
+    def compression(self) -> bool:
+        return self._compress
+
+    @property
+    def write_buffer_size(self) -> int:
+        """Size of written data not sent to the client yet, in bytes."""
+        transport = self._req.transport if self._req is not None else None
+        return transport.get_write_buffer_size() if transport is not None else 0
+
+    @property
+    def metrics(self) -> Optional[StreamMetrics]:
+        """Metrics of the stream, if created with ``metrics`` registry."""
+        return self._metrics
+
+    @property
+    def retry_policy(self) -> Optional[RetryPolicy]:
+        return self._retry_policy
 
     @property
     def last_event_id(self) -> Optional[str]:
@@ -196,20 +706,76 @@ class EventSourceResponse(StreamResponse):
             raise ValueError("ping interval must be greater then 0")
 
         self._ping_interval = value
+        if self._ping_scheduler is not None and self in self._ping_scheduler:
+            self._ping_scheduler.add(self)
+
+    @property
+    def idle_ping(self) -> bool:
+        """Send ping only after ``ping_interval`` seconds without events.
+
+        With ``ping_scheduler`` the silence between the last event and
+        the ping could be up to two ping intervals.
+        """
+        return self._idle_ping
+
+    @idle_ping.setter
+    def idle_ping(self, value: bool) -> None:
+        if not isinstance(value, bool):
+            raise TypeError("idle ping must be bool")
+
+        self._idle_ping = value
 
     async def _ping(self) -> None:
         # periodically send ping to the browser. Any message that
         # starts with ":" colon ignored by a browser and could be used
         # as ping message.
-        message = ": ping{0}{0}".format(self._sep).encode("utf-8")
+        loop = asyncio.get_running_loop()
         while True:
+            wakeup = loop.time() + self._ping_interval
             await asyncio.sleep(self._ping_interval)
+            if self._profile is not None:
+                self._profile.loop_lag.record(loop.time() - wakeup)
+            if self._idle_ping:
+                # postpone ping while events keep the connection busy
+                deadline = self._last_write + self._ping_interval
+                while deadline > loop.time():
+                    await asyncio.sleep(deadline - loop.time())
+                    deadline = self._last_write + self._ping_interval
             try:
-                await self.write(message)
+                await self._write_ping()
             except (ConnectionResetError, RuntimeError):
                 # RuntimeError - on writing after EOF
                 break
 
+    def _needs_ping(self, now: float) -> bool:
+        if self._idle_ping and now - self._last_write < self._ping_interval:
+            return False
+        # the ping would wait for the client to drain the buffer, and the
+        # connection is not idle anyway
+        transport = self._req.transport if self._req is not None else None
+        if transport is None:
+            return True
+        low, _ = transport.get_write_buffer_limits()
+        return transport.get_write_buffer_size() <= low
+
+    async def _write_ping(self) -> None:
+        frame = _ping_frame(self._line_sep)
+        if self._retry_policy is not None:
+            frame = self._retry_frame() + frame
+        await self.write(frame)
+        if self._metrics is not None:
+            self._metrics._pings += 1
+
+    def _close(self) -> None:
+        # finish streaming the same way as the ping task does on failed write
+        task = self._ping_task
+        if task is None or task.done():
+            return
+        if isinstance(task, asyncio.Task):
+            task.cancel()
+        else:
+            task.set_result(None)
+
     async def __aenter__(self) -> "EventSourceResponse":
         # TODO(PY311): Use Self
         return self
@@ -220,6 +786,12 @@ class EventSourceResponse(StreamResponse):
         exc: Optional[BaseException],
         traceback: Optional[TracebackType],
     ) -> None:
+        if exc is None and self._buffer is not None and self.is_connected():
+            # deliver events queued before leaving context
+            timeout = self._buffer.policy.drain_timeout
+            if timeout:
+                with suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._buffer.join(), timeout)
         self.stop_streaming()
         await self.wait()
 
@@ -236,6 +808,17 @@ def sse_response(
     reason: Optional[str] = None,
     headers: Optional[Mapping[str, str]] = None,
     sep: Optional[str] = None,
+    ping_scheduler: Optional[PingScheduler] = None,
+    buffer_policy: Optional[BufferPolicy] = None,
+    metrics: Optional[MetricsRegistry] = None,
+    slow_consumer: Optional[SlowConsumerPolicy] = None,
+    on_disconnect: Optional[Callable[[EventSourceResponse], None]] = None,
+    watch_disconnect: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    compress: Union[bool, ContentCoding] = False,
+    broadcaster: Optional[Broadcaster] = None,
+    history: Optional[EventHistory] = None,
+    admission: Optional[AdmissionController] = None,
 ) -> _ContextManager[EventSourceResponse]: ...
 
 
@@ -247,6 +830,17 @@ def sse_response(
     reason: Optional[str] = None,
     headers: Optional[Mapping[str, str]] = None,
     sep: Optional[str] = None,
+    ping_scheduler: Optional[PingScheduler] = None,
+    buffer_policy: Optional[BufferPolicy] = None,
+    metrics: Optional[MetricsRegistry] = None,
+    slow_consumer: Optional[SlowConsumerPolicy] = None,
+    on_disconnect: Optional[Callable[[EventSourceResponse], None]] = None,
+    watch_disconnect: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    compress: Union[bool, ContentCoding] = False,
+    broadcaster: Optional[Broadcaster] = None,
+    history: Optional[EventHistory] = None,
+    admission: Optional[AdmissionController] = None,
     response_cls: type[ESR],
 ) -> _ContextManager[ESR]: ...
 
@@ -258,6 +852,17 @@ def sse_response(
     reason: Optional[str] = None,
     headers: Optional[Mapping[str, str]] = None,
     sep: Optional[str] = None,
+    ping_scheduler: Optional[PingScheduler] = None,
+    buffer_policy: Optional[BufferPolicy] = None,
+    metrics: Optional[MetricsRegistry] = None,
+    slow_consumer: Optional[SlowConsumerPolicy] = None,
+    on_disconnect: Optional[Callable[[EventSourceResponse], None]] = None,
+    watch_disconnect: bool = False,
+    retry_policy: Optional[RetryPolicy] = None,
+    compress: Union[bool, ContentCoding] = False,
+    broadcaster: Optional[Broadcaster] = None,
+    history: Optional[EventHistory] = None,
+    admission: Optional[AdmissionController] = None,
     response_cls: type[EventSourceResponse] = EventSourceResponse,
 ) -> Any:
     if not issubclass(response_cls, EventSourceResponse):
@@ -266,5 +871,20 @@ def sse_response(
             "aiohttp_sse.EventSourceResponse, got {}".format(response_cls)
         )
 
-    sse = response_cls(status=status, reason=reason, headers=headers, sep=sep)
-    return _ContextManager(sse._prepare(request))
+    sse = response_cls(
+        status=status,
+        reason=reason,
+        headers=headers,
+        sep=sep,
+        ping_scheduler=ping_scheduler,
+        buffer_policy=buffer_policy,
+        metrics=metrics,
+        slow_consumer=slow_consumer,
+        on_disconnect=on_disconnect,
+        retry_policy=retry_policy,
+        watch_disconnect=watch_disconnect,
+    )
+    if compress is not False:
+        # negotiated unless content coding is given
+        sse.enable_compression(None if compress is True else compress)
+    return _ContextManager(sse._prepare(request, broadcaster, history, admission))
@@ -0,0 +1,222 @@
+import asyncio
+import math
+import random
+from collections import deque
+from typing import TYPE_CHECKING, Optional
+
+from aiohttp import web
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+
+class AdmissionController:
+    """Limit the rate of new EventSourceResponse streams during reconnect storms.
+
+    New streams are admitted at most ``rate`` per second with bursts up to
+    ``burst``, at most ``max_prepares`` of them are being prepared at once,
+    and at most ``max_connections`` streams are open. When the rate or
+    ``max_prepares`` limit is reached the request waits up to
+    ``queue_timeout`` seconds for a free slot and is rejected with
+    ``503 Service Unavailable`` afterwards. A request over
+    ``max_connections`` is rejected immediately, as open streams may last
+    for hours and waiting for one of them to end is pointless. The
+    rejection has ``Retry-After`` header and ``retry:`` field of ``retry``
+    milliseconds plus random jitter up to ``jitter`` milliseconds, so
+    rejected clients come back spread over time::
+
+        admission = AdmissionController(rate=100, max_connections=10000)
+
+        async def hello(request):
+            async with sse_response(request, admission=admission) as resp:
+                await resp.wait()
+            return resp
+
+    Already connected streams are not affected. Note that browsers do not
+    reconnect EventSource after a response other than 200, so clients
+    should handle ``Retry-After`` themselves.
+    """
+
+    DEFAULT_RETRY = 1000
+    DEFAULT_JITTER = 1000
+
+    def __init__(
+        self,
+        *,
+        rate: Optional[float] = None,
+        burst: Optional[int] = None,
+        max_prepares: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        queue_timeout: float = 0,
+        retry: int = DEFAULT_RETRY,
+        jitter: int = DEFAULT_JITTER,
+    ) -> None:
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be greater then 0")
+        if burst is not None and burst < 1:
+            raise ValueError("burst must be greater then 0")
+        if max_prepares is not None and max_prepares < 1:
+            raise ValueError("max_prepares must be greater then 0")
+        if max_connections is not None and max_connections < 1:
+            raise ValueError("max_connections must be greater then 0")
+        if queue_timeout < 0:
+            raise ValueError("queue_timeout must not be negative")
+        if retry < 0:
+            raise ValueError("retry must not be negative")
+        if jitter < 0:
+            raise ValueError("jitter must not be negative")
+
+        self._rate = rate
+        if burst is None and rate is not None:
+            burst = max(1, math.ceil(rate))
+        self._burst = burst
+        self._max_prepares = max_prepares
+        self._max_connections = max_connections
+        self._queue_timeout = queue_timeout
+        self._retry = retry
+        self._jitter = jitter
+
+        self._tokens = float(burst or 0)
+        self._updated: Optional[float] = None
+        self._preparing = 0
+        self._waiters: deque[asyncio.Future[None]] = deque()
+        # open streams plus streams being admitted
+        self._connections = 0
+        self._rejected = 0
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    @property
+    def burst(self) -> Optional[int]:
+        return self._burst
+
+    @property
+    def max_prepares(self) -> Optional[int]:
+        return self._max_prepares
+
+    @property
+    def max_connections(self) -> Optional[int]:
+        return self._max_connections
+
+    @property
+    def queue_timeout(self) -> float:
+        return self._queue_timeout
+
+    @property
+    def connections(self) -> int:
+        """Number of open streams, including streams being admitted."""
+        return self._connections
+
+    @property
+    def rejected(self) -> int:
+        """Number of rejected requests."""
+        return self._rejected
+
+    async def _prepare(
+        self, response: "EventSourceResponse", request: web.BaseRequest
+    ) -> None:
+        if (
+            self._max_connections is not None
+            and self._connections >= self._max_connections
+        ):
+            self._reject()
+
+        self._connections += 1
+        try:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self._queue_timeout
+            if not await self._take_token(deadline):
+                self._reject()
+            if not await self._acquire_prepare(deadline):
+                self._reject()
+            try:
+                await response.prepare(request)
+            finally:
+                self._release_prepare()
+        except BaseException:
+            self._connections -= 1
+            raise
+
+        assert response._ping_task is not None
+        response._ping_task.add_done_callback(lambda _: self._release_connection())
+
+    def _release_connection(self) -> None:
+        self._connections -= 1
+
+    async def _take_token(self, deadline: float) -> bool:
+        if self._rate is None:
+            return True
+
+        assert self._burst is not None
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self._updated is not None:
+            elapsed = now - self._updated
+            self._tokens = min(self._burst, self._tokens + elapsed * self._rate)
+        self._updated = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        # reserve the next token, so waiting requests are admitted in order
+        delay = (1 - self._tokens) / self._rate
+        if now + delay > deadline:
+            return False
+        self._tokens -= 1
+        await asyncio.sleep(delay)
+        return True
+
+    async def _acquire_prepare(self, deadline: float) -> bool:
+        if self._max_prepares is None:
+            return True
+        if self._preparing < self._max_prepares:
+            self._preparing += 1
+            return True
+
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done():
+                # slot was handed over right before cancellation
+                self._release_prepare()
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+                self._waiters.remove(waiter)
+        return waiter.done() and not waiter.cancelled()
+
+    def _release_prepare(self) -> None:
+        if self._max_prepares is None:
+            return
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # hand over the slot to the next waiting request
+                waiter.set_result(None)
+                return
+        self._preparing -= 1
+
+    def _reject(self) -> None:
+        self._rejected += 1
+        retry = self._retry + random.randint(0, self._jitter)
+        raise web.HTTPServiceUnavailable(
+            headers={"Retry-After": str(math.ceil(retry / 1000))},
+            text=f"retry: {retry}\r\n\r\n",
+            content_type="text/event-stream",
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"<AdmissionController rate={self._rate} burst={self._burst} "
+            f"max_prepares={self._max_prepares} "
+            f"max_connections={self._max_connections} "
+            f"queue_timeout={self._queue_timeout}>"
+        )
@@ -0,0 +1,69 @@
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Literal, Optional
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+SlowReason = Literal["buffer_size", "drain_time"]
+
+
+class SlowConsumerPolicy:
+    """Thresholds to detect clients which read the stream too slowly.
+
+    A client is considered slow when after a write the transport buffer
+    holds more than ``max_buffer_size`` bytes not sent to the client yet,
+    or when a write waits for the client to drain the buffer longer than
+    ``max_drain_time`` seconds. Then ``on_slow`` hook is called with the
+    response and the reason, and with ``disconnect`` the connection is
+    aborted, dropping buffered data, and streaming is stopped::
+
+        def on_slow(response, reason):
+            log.warning("slow client %s: %s", response.write_buffer_size, reason)
+
+        policy = SlowConsumerPolicy(max_drain_time=5, disconnect=True, on_slow=on_slow)
+
+    Policy holds no state and could be shared between responses.
+    """
+
+    __slots__ = ("_max_buffer_size", "_max_drain_time", "_disconnect", "_on_slow")
+
+    def __init__(
+        self,
+        *,
+        max_buffer_size: Optional[int] = None,
+        max_drain_time: Optional[float] = None,
+        disconnect: bool = False,
+        on_slow: Optional[Callable[["EventSourceResponse", SlowReason], None]] = None,
+    ) -> None:
+        if max_buffer_size is not None and max_buffer_size < 1:
+            raise ValueError("max_buffer_size must be greater then 0")
+        if max_drain_time is not None and max_drain_time <= 0:
+            raise ValueError("max_drain_time must be greater then 0")
+
+        self._max_buffer_size = max_buffer_size
+        self._max_drain_time = max_drain_time
+        self._disconnect = disconnect
+        self._on_slow = on_slow
+
+    @property
+    def max_buffer_size(self) -> Optional[int]:
+        return self._max_buffer_size
+
+    @property
+    def max_drain_time(self) -> Optional[float]:
+        return self._max_drain_time
+
+    @property
+    def disconnect(self) -> bool:
+        return self._disconnect
+
+    @property
+    def on_slow(self) -> Optional[Callable[["EventSourceResponse", SlowReason], None]]:
+        return self._on_slow
+
+    def __repr__(self) -> str:
+        return (
+            f"<SlowConsumerPolicy max_buffer_size={self._max_buffer_size} "
+            f"max_drain_time={self._max_drain_time} "
+            f"disconnect={self._disconnect}>"
+        )
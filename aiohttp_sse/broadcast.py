@@ -0,0 +1,157 @@
+from typing import TYPE_CHECKING, Optional
+
+from .event import ServerSentEvent, _Field
+from .helpers import _gather_limited
+from .history import EventHistory
+from .transport import BroadcastTransport
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+
+class Broadcaster:
+    """Deliver events to a group of EventSourceResponse streams.
+
+    Each published event is serialized once (per separator) and written to
+    all subscribers by a bounded number of worker coroutines. Streams which
+    are closed or fail to accept the event are removed automatically, and
+    streams not accepting the event within ``send_timeout`` seconds are
+    closed, so stuck clients do not delay delivery to others and reconnect
+    to catch up.
+    Published events are also stored in ``history``, if given, to replay
+    them to reconnecting clients. With ``transport`` events are also
+    published to Broadcasters of other processes, which should be started
+    with ``start()``::
+
+        broadcaster = Broadcaster()
+
+        async def subscribe(request):
+            async with sse_response(request, broadcaster=broadcaster) as resp:
+                await resp.wait()
+            return resp
+
+        async def publish(request):
+            await broadcaster.publish("foo", event="bar")
+            return web.Response()
+    """
+
+    DEFAULT_CONCURRENCY = 100
+    DEFAULT_SEND_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        send_timeout: Optional[float] = DEFAULT_SEND_TIMEOUT,
+        history: Optional[EventHistory] = None,
+        transport: Optional[BroadcastTransport] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be greater then 0")
+        if send_timeout is not None and send_timeout <= 0:
+            raise ValueError("send_timeout must be greater then 0")
+
+        self._concurrency = concurrency
+        self._send_timeout = send_timeout
+        self._history = history
+        self._transport = transport
+        # dict preserves subscription order and gives O(1) add/remove
+        self._subscribers: dict["EventSourceResponse", None] = {}
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def __contains__(self, response: object) -> bool:
+        return response in self._subscribers
+
+    @property
+    def history(self) -> Optional[EventHistory]:
+        return self._history
+
+    @property
+    def transport(self) -> Optional[BroadcastTransport]:
+        return self._transport
+
+    async def start(self) -> None:
+        """Start receiving events published by other processes."""
+        if self._transport is not None:
+            await self._transport.start(self._deliver)
+
+    async def close(self) -> None:
+        """Stop receiving events published by other processes."""
+        if self._transport is not None:
+            await self._transport.close()
+
+    def subscribe(self, response: "EventSourceResponse") -> None:
+        """Add prepared response to the subscribers.
+
+        Response is unsubscribed automatically once streaming is stopped.
+        """
+        if response._ping_task is None:
+            raise RuntimeError("Response is not started")
+        if response in self._subscribers:
+            return
+
+        self._subscribers[response] = None
+        response._ping_task.add_done_callback(
+            lambda _: self._subscribers.pop(response, None)
+        )
+
+    def unsubscribe(self, response: "EventSourceResponse") -> None:
+        """Remove response from the subscribers, if present."""
+        self._subscribers.pop(response, None)
+
+    async def publish(
+        self,
+        data: _Field,
+        id: Optional[str] = None,
+        event: Optional[str] = None,
+        retry: Optional[int] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """Send data to all subscribers.
+
+        Accepts the same arguments as ``EventSourceResponse.send``.
+        Returns number of streams the event was delivered to.
+        """
+        return await self.publish_event(
+            ServerSentEvent(data, id=id, event=event, retry=retry, key=key)
+        )
+
+    async def publish_event(self, event: ServerSentEvent) -> int:
+        """Send prepared event to all subscribers.
+
+        Returns number of local streams the event was delivered to. Errors
+        of the transport, e.g. too large event, are raised before the event
+        is delivered locally.
+        """
+        if self._transport is not None:
+            await self._transport.publish(event)
+        return await self._deliver(event)
+
+    async def _deliver(self, event: ServerSentEvent) -> int:
+        if self._history is not None:
+            await self._history.append(event)
+
+        subscribers = []
+        closed = []
+        for response in self._subscribers:
+            if response.is_connected():
+                subscribers.append(response)
+            else:
+                closed.append(response)
+        for response in closed:
+            self.unsubscribe(response)
+
+        failed, timed_out = await _gather_limited(
+            subscribers,
+            lambda r: r.send_event(event),
+            self._concurrency,
+            self._send_timeout,
+        )
+        for response in failed:
+            self.unsubscribe(response)
+        for response in timed_out:
+            self.unsubscribe(response)
+            response.stop_streaming()
+        return len(subscribers) - len(failed) - len(timed_out)
@@ -0,0 +1,312 @@
+import asyncio
+from collections import deque
+from typing import Literal, Optional
+
+from .event import _Field
+
+OverflowPolicy = Literal["drop_oldest", "drop_newest", "coalesce", "disconnect"]
+OVERFLOW_POLICIES = ("drop_oldest", "drop_newest", "coalesce", "disconnect")
+
+
+class BufferPolicy:
+    """Limits of outbound buffer of EventSourceResponse.
+
+    With a buffer ``send()`` only queues the event, and a background task
+    writes queued events to the client, so a slow client never blocks the
+    producer. When a limit is reached the ``overflow`` policy applies:
+
+    * ``drop_oldest`` - discard the oldest queued events;
+    * ``drop_newest`` - discard the event being sent;
+    * ``coalesce`` - discard queued event of the same type, falling back
+      to ``drop_oldest``;
+    * ``disconnect`` - stop streaming to the slow client.
+
+    An event larger than ``max_bytes`` could never be queued, it is
+    discarded (or the client is disconnected) keeping queued events.
+
+    With ``conflate`` a queued event is replaced in place by a newer event
+    with the same key, which is the event type unless given explicitly
+    with ``key`` argument of ``send()``, ``ServerSentEvent`` or
+    ``Broadcaster.publish()``, so a slow client receives only the latest
+    value per key and the buffer is bounded by the number of keys rather
+    than the update rate. A larger replacement exceeding ``max_bytes`` is
+    an overflow like a new event.
+
+    Queued events are written to the client in batches of up to
+    ``flush_size`` bytes, each batch as a single chunk. With ``flush_delay``
+    the first queued event waits up to that many seconds for more events
+    to fill the batch, trading latency for fewer writes under bursty load.
+
+    On leaving ``async with`` block of the response queued events are
+    written for up to ``drain_timeout`` seconds, so a client that stopped
+    reading does not keep the handler, then streaming is stopped. Zero
+    stops streaming at once.
+
+    Policy holds no state and could be shared between responses.
+    """
+
+    DEFAULT_FLUSH_SIZE = 64 * 1024
+    DEFAULT_DRAIN_TIMEOUT = 5.0
+
+    __slots__ = (
+        "_max_events",
+        "_max_bytes",
+        "_overflow",
+        "_flush_delay",
+        "_flush_size",
+        "_conflate",
+        "_drain_timeout",
+    )
+
+    def __init__(
+        self,
+        *,
+        max_events: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        overflow: OverflowPolicy = "drop_oldest",
+        flush_delay: float = 0,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+        conflate: bool = False,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+    ) -> None:
+        if max_events is not None and max_events < 1:
+            raise ValueError("max_events must be greater then 0")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be greater then 0")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+        if flush_delay < 0:
+            raise ValueError("flush_delay must not be negative")
+        if flush_size < 1:
+            raise ValueError("flush_size must be greater then 0")
+        if drain_timeout < 0:
+            raise ValueError("drain_timeout must not be negative")
+
+        self._max_events = max_events
+        self._max_bytes = max_bytes
+        self._overflow = overflow
+        self._flush_delay = flush_delay
+        self._flush_size = flush_size
+        self._conflate = conflate
+        self._drain_timeout = drain_timeout
+
+    @property
+    def max_events(self) -> Optional[int]:
+        return self._max_events
+
+    @property
+    def max_bytes(self) -> Optional[int]:
+        return self._max_bytes
+
+    @property
+    def overflow(self) -> OverflowPolicy:
+        return self._overflow
+
+    @property
+    def flush_delay(self) -> float:
+        return self._flush_delay
+
+    @property
+    def flush_size(self) -> int:
+        return self._flush_size
+
+    @property
+    def conflate(self) -> bool:
+        return self._conflate
+
+    @property
+    def drain_timeout(self) -> float:
+        return self._drain_timeout
+
+    def __repr__(self) -> str:
+        return (
+            f"<BufferPolicy max_events={self._max_events} "
+            f"max_bytes={self._max_bytes} overflow={self._overflow} "
+            f"flush_delay={self._flush_delay} flush_size={self._flush_size} "
+            f"conflate={self._conflate} drain_timeout={self._drain_timeout}>"
+        )
+
+
+class _Entry:
+    __slots__ = ("key", "frame", "time")
+
+    def __init__(self, key: Optional[_Field], frame: bytes, time: float) -> None:
+        self.key = key
+        self.frame = frame
+        # time of queueing, when profiled
+        self.time = time
+
+
+class _SendBuffer:
+    __slots__ = (
+        "_policy",
+        "_frames",
+        "_latest",
+        "_size",
+        "_unfinished",
+        "_getter",
+        "_joiners",
+    )
+
+    def __init__(self, policy: BufferPolicy) -> None:
+        self._policy = policy
+        self._frames: deque[_Entry] = deque()
+        # queued entries by key, with conflation only
+        self._latest: dict[_Field, _Entry] = {}
+        self._size = 0
+        # queued frames plus frames taken by consumer, but not written yet
+        self._unfinished = 0
+        self._getter: Optional[asyncio.Future[None]] = None
+        self._joiners: list[asyncio.Future[None]] = []
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def policy(self) -> BufferPolicy:
+        return self._policy
+
+    @property
+    def size(self) -> int:
+        """Total size of queued frames in bytes."""
+        return self._size
+
+    def put(self, frame: bytes, key: Optional[_Field], time: float = 0.0) -> bool:
+        """Queue frame, applying overflow policy if limits are reached.
+
+        Returns False if the frame was dropped or the client should be
+        disconnected according to the policy.
+        """
+        max_bytes = self._policy.max_bytes
+        if max_bytes is not None and len(frame) > max_bytes:
+            # would not fit even into empty buffer, keep queued events
+            return False
+
+        conflate = self._policy.conflate
+        overflow = self._policy.overflow
+        if conflate and key is not None:
+            entry = self._latest.get(key)
+            if entry is not None:
+                size = self._size + len(frame) - len(entry.frame)
+                if max_bytes is None or size <= max_bytes:
+                    # newer value replaces the one not sent yet
+                    self._size = size
+                    entry.frame = frame
+                    entry.time = time
+                    return True
+                if overflow in ("drop_newest", "disconnect"):
+                    return False
+                # larger value does not fit, queue it anew making room
+                self._frames.remove(entry)
+                self._drop(entry)
+
+        while self._overflows(len(frame)):
+            if overflow in ("drop_newest", "disconnect") or not self._frames:
+                return False
+            if overflow == "coalesce":
+                self._remove_event(key)
+            else:
+                self._drop(self._frames.popleft())
+
+        entry = _Entry(key, frame, time)
+        self._frames.append(entry)
+        if conflate and key is not None:
+            self._latest[key] = entry
+        self._size += len(frame)
+        self._unfinished += 1
+        if self._getter is not None and not self._getter.done():
+            self._getter.set_result(None)
+        return True
+
+    async def get(self) -> list[bytes]:
+        """Wait for next batch of frames according to policy.
+
+        ``task_done()`` must be called once the batch is written.
+        """
+        return [entry.frame for entry in await self.get_entries()]
+
+    async def get_entries(self) -> list[_Entry]:
+        """Wait for next batch of queued entries, like ``get()``."""
+        while not self._frames:
+            await self._wait_put()
+
+        flush_size = self._policy.flush_size
+        if self._policy.flush_delay and self._size < flush_size:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self._policy.flush_delay
+            while self._size < flush_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0 or not await self._wait_put(timeout):
+                    break
+
+        entries = [self._pop()]
+        size = len(entries[0].frame)
+        while self._frames and size + len(self._frames[0].frame) <= flush_size:
+            entry = self._pop()
+            entries.append(entry)
+            size += len(entry.frame)
+        self._size -= size
+        return entries
+
+    def task_done(self, count: int = 1) -> None:
+        self._unfinished -= count
+        if not self._unfinished:
+            self._wakeup_joiners()
+
+    async def join(self) -> None:
+        """Wait until all queued frames are written or buffer is cleared."""
+        if self._unfinished:
+            joiner = asyncio.get_running_loop().create_future()
+            self._joiners.append(joiner)
+            await joiner
+
+    def clear(self) -> None:
+        self._frames.clear()
+        self._latest.clear()
+        self._size = 0
+        self._unfinished = 0
+        self._wakeup_joiners()
+
+    async def _wait_put(self, timeout: Optional[float] = None) -> bool:
+        self._getter = getter = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait((getter,), timeout=timeout)
+        finally:
+            self._getter = None
+        return getter.done()
+
+    def _overflows(self, frame_size: int) -> bool:
+        policy = self._policy
+        if policy.max_events is not None and len(self._frames) >= policy.max_events:
+            return True
+        if policy.max_bytes is not None:
+            return self._size + frame_size > policy.max_bytes
+        return False
+
+    def _remove_event(self, key: Optional[_Field]) -> None:
+        for i, entry in enumerate(self._frames):
+            if entry.key == key:
+                del self._frames[i]
+                self._drop(entry)
+                return
+        self._drop(self._frames.popleft())
+
+    def _pop(self) -> _Entry:
+        entry = self._frames.popleft()
+        self._forget(entry)
+        return entry
+
+    def _drop(self, entry: _Entry) -> None:
+        self._forget(entry)
+        self._size -= len(entry.frame)
+        self._unfinished -= 1
+
+    def _forget(self, entry: _Entry) -> None:
+        if entry.key is not None and self._latest.get(entry.key) is entry:
+            del self._latest[entry.key]
+
+    def _wakeup_joiners(self) -> None:
+        for joiner in self._joiners:
+            if not joiner.done():
+                joiner.set_result(None)
+        self._joiners.clear()
@@ -0,0 +1,75 @@
+import zlib
+from typing import Any, Optional, Union
+
+from aiohttp.web import ContentCoding
+
+try:
+    import brotli
+
+    HAS_BROTLI = True
+except ImportError:  # pragma: no cover
+    HAS_BROTLI = False
+
+BROTLI = "br"
+
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    """Choose content coding acceptable by the client, if any."""
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        name, _, value = params.partition("=")
+        if name.strip() == "q":
+            try:
+                if float(value) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+
+    if HAS_BROTLI and BROTLI in accepted:
+        return BROTLI
+    for coding in (ContentCoding.gzip.value, ContentCoding.deflate.value):
+        if coding in accepted:
+            return coding
+    return None
+
+
+class _StreamCompressor:
+    """Compressor flushing every chunk, so events are not delayed.
+
+    Compression context is kept for the whole stream, repeated parts
+    of the events are compressed with back references to previous ones.
+    """
+
+    __slots__ = ("_zlib", "_brotli")
+
+    def __init__(self, encoding: str, strategy: Optional[int] = None) -> None:
+        self._zlib: Optional[zlib._Compress] = None
+        self._brotli: Any = None
+        if encoding == BROTLI:
+            if not HAS_BROTLI:
+                raise ValueError("brotli compression requires brotli module")
+            self._brotli = brotli.Compressor()
+        elif encoding == ContentCoding.gzip.value:
+            self._zlib = zlib.compressobj(
+                wbits=16 + zlib.MAX_WBITS,
+                strategy=zlib.Z_DEFAULT_STRATEGY if strategy is None else strategy,
+            )
+        elif encoding == ContentCoding.deflate.value:
+            self._zlib = zlib.compressobj(
+                wbits=zlib.MAX_WBITS,
+                strategy=zlib.Z_DEFAULT_STRATEGY if strategy is None else strategy,
+            )
+        else:
+            raise ValueError(f"unsupported content coding {encoding!r}")
+
+    def compress(self, data: Union[bytes, bytearray, memoryview]) -> bytes:
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+        return bytes(self._brotli.process(data) + self._brotli.flush())
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._zlib is not None:
+            return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+        return bytes(self._brotli.process(data) + self._brotli.finish())
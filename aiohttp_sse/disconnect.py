@@ -0,0 +1,115 @@
+import logging
+import re
+import warnings
+from collections.abc import Callable
+from typing import Any, Optional, Union
+
+import aiohttp
+from aiohttp.web import BaseRequest
+
+logger = logging.getLogger(__name__)
+
+# aiohttp versions with the server internals the hook relies on
+_SUPPORTED_AIOHTTP = ((3, 9), (4, 0))
+
+_Callback = Callable[[], None]
+
+
+class _ConnectionLostHook:
+    """Replacement of aiohttp server ``connection_lost`` method.
+
+    aiohttp server is notified by every request handler protocol when its
+    connection is lost, so wrapping this single method allows to watch all
+    connections of the server. Request protocols use ``__slots__`` and
+    could not be patched directly.
+    """
+
+    __slots__ = ("_connection_lost", "_callbacks")
+
+    def __init__(self, connection_lost: Callable[..., None]) -> None:
+        self._connection_lost = connection_lost
+        # single callback per connection is stored without a list
+        self._callbacks: dict[object, Union[_Callback, list[_Callback]]] = {}
+
+    def __call__(self, handler: object, *args: Any, **kwargs: Any) -> None:
+        try:
+            self._connection_lost(handler, *args, **kwargs)
+        finally:
+            callbacks = self._callbacks.pop(handler, None)
+            if callbacks is None:
+                callbacks = []
+            elif not isinstance(callbacks, list):
+                callbacks = [callbacks]
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Error in connection lost callback")
+
+    def add(self, protocol: object, callback: _Callback) -> None:
+        callbacks = self._callbacks.setdefault(protocol, callback)
+        if callbacks is callback:
+            return
+        if isinstance(callbacks, list):
+            callbacks.append(callback)
+        else:
+            self._callbacks[protocol] = [callbacks, callback]
+
+    def remove(self, protocol: object, callback: _Callback) -> None:
+        callbacks = self._callbacks.get(protocol)
+        if isinstance(callbacks, list):
+            if callback in callbacks:
+                callbacks.remove(callback)
+                if len(callbacks) == 1:
+                    self._callbacks[protocol] = callbacks[0]
+        elif callbacks is not None and callbacks == callback:
+            del self._callbacks[protocol]
+
+
+def _aiohttp_supported(version: Optional[str] = None) -> bool:
+    if version is None:
+        version = aiohttp.__version__
+    parts = tuple(int(part) for part in re.findall(r"\d+", version)[:2])
+    low, high = _SUPPORTED_AIOHTTP
+    return low <= parts < high
+
+
+def _watch_disconnect(
+    request: BaseRequest, callback: _Callback
+) -> Optional[_ConnectionLostHook]:
+    """Call ``callback`` once connection of the request is lost.
+
+    Best-effort fallback until aiohttp has a public API for this
+    (https://github.com/aio-libs/aiohttp/issues/3105): it relies on private
+    ``_manager`` of the request protocol and replaces ``connection_lost``
+    of the shared server, so it is used only when explicitly enabled and
+    only with known aiohttp versions.
+
+    Returns the hook to stop watching with ``hook.remove()``, or None if
+    the server does not allow to watch connections, e.g. for mocked requests.
+    """
+    if not _aiohttp_supported():
+        warnings.warn(
+            f"Watching disconnects is not supported with aiohttp "
+            f"{aiohttp.__version__}, they are detected on failed writes",
+            RuntimeWarning,
+            stacklevel=3,
+        )
+        return None
+
+    protocol = request.protocol
+    manager = getattr(protocol, "_manager", None)
+    if manager is None:
+        return None
+
+    hook = getattr(manager, "connection_lost", None)
+    if not isinstance(hook, _ConnectionLostHook):
+        if not callable(hook):
+            return None
+        hook = _ConnectionLostHook(hook)
+        try:
+            setattr(manager, "connection_lost", hook)
+        except AttributeError:
+            return None
+    hook.add(protocol, callback)
+    return hook
@@ -0,0 +1,207 @@
+import re
+from functools import lru_cache
+from typing import Optional, Union
+
+LINE_SEP_EXPR = re.compile(r"\r\n|\r|\n")
+_LINE_SEP_BYTES_EXPR = re.compile(rb"\r\n|\r|\n")
+_CR = ord("\r")
+_LF = ord("\n")
+
+_Data = Union[str, bytes, bytearray, memoryview]
+_Field = Union[str, bytes]
+
+# event types are usually few, e.g. "update" or "delete"
+EVENT_LINES_CACHE_SIZE = 256
+
+
+def _to_bytes(value: object) -> Union[bytes, bytearray, memoryview]:
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, memoryview):
+        # items of e.g. array("i") view are not bytes, frame the raw buffer
+        if value.format != "B" or value.ndim != 1:
+            return value.cast("B")
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return value
+    # fields used to be formatted with f-strings, keep accepting e.g. int ids
+    return str(value).encode("utf-8")
+
+
+def _is_single_line(value: Union[bytes, bytearray, memoryview]) -> bool:
+    if isinstance(value, memoryview):
+        # "in" iterates memoryview item by item, regex scans the buffer
+        # without copying
+        return _LINE_SEP_BYTES_EXPR.search(value) is None
+    # memchr based, much faster than regex for bytes
+    return _LF not in value and _CR not in value
+
+
+def _single_line(value: object) -> Union[bytes, bytearray, memoryview]:
+    raw = _to_bytes(value)
+    return raw if _is_single_line(raw) else _LINE_SEP_BYTES_EXPR.sub(b"", raw)
+
+
+@lru_cache(maxsize=EVENT_LINES_CACHE_SIZE)
+def _event_line(event: _Field, sep: bytes) -> bytes:
+    return b"".join((b"event: ", _single_line(event), sep))
+
+
+@lru_cache(maxsize=None)
+def _line_separator(sep: str) -> bytes:
+    # encoded once and shared by all responses with the separator
+    return sep.encode("utf-8")
+
+
+@lru_cache(maxsize=None)
+def _ping_frame(sep: bytes) -> bytes:
+    # separators are a few, frame is shared by all responses
+    return b": ping" + sep + sep
+
+
+@lru_cache(maxsize=None)
+def _line_break(prefix: bytes, sep: bytes) -> bytes:
+    return sep + prefix
+
+
+def _lines(
+    prefix: bytes, value: Union[bytes, bytearray, memoryview], sep: bytes
+) -> Union[bytes, bytearray]:
+    # every line of the value as a separate field, replacing line breaks
+    # is much cheaper than splitting value into lines with regex
+    if isinstance(value, memoryview):
+        value = value.tobytes()
+    if _CR in value:
+        value = value.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+    return b"".join((prefix, value.replace(b"\n", _line_break(prefix, sep)), sep))
+
+
+def _serialize(
+    data: Optional[_Data],
+    id: Optional[_Field],
+    event: Optional[_Field],
+    retry: Optional[int],
+    comment: Optional[_Data],
+    sep: bytes,
+) -> bytes:
+    # works on bytes only, so UTF-8 payloads are never decoded
+    parts: list[Union[bytes, bytearray, memoryview]] = []
+    if comment is not None:
+        parts.append(_lines(b": ", _to_bytes(comment), sep))
+
+    if id is not None:
+        parts += (b"id: ", _single_line(id), sep)
+
+    if event is not None:
+        parts.append(_event_line(event, sep))
+
+    if data is not None:
+        raw = _to_bytes(data)
+        if _is_single_line(raw):
+            # fast path for the common case, e.g. compact JSON
+            parts += (b"data: ", raw, sep)
+        else:
+            parts.append(_lines(b"data: ", raw, sep))
+
+    if retry is not None:
+        if not isinstance(retry, int):
+            raise TypeError("retry argument must be int")
+        parts += (b"retry: %d" % retry, sep)
+
+    parts.append(sep)
+    return b"".join(parts)
+
+
+def _serialize_data(data: _Data, sep: bytes) -> bytes:
+    # the most common event: single line of data without other fields
+    raw = _to_bytes(data)
+    if _is_single_line(raw):
+        return b"".join((b"data: ", raw, sep, sep))
+    return _serialize(raw, None, None, None, None, sep)
+
+
+class ServerSentEvent:
+    """Immutable event which is serialized only once per separator.
+
+    ``data`` and ``comment`` could be given as UTF-8 encoded bytes.
+    ``key`` is the key of the event in buffer with ``conflate`` policy,
+    e.g. a ticker symbol, defaults to the event type. It is not sent to
+    the client.
+
+    Useful when the same event is sent to many clients::
+
+        event = ServerSentEvent("foo", event="bar", id="42")
+        for resp in responses:
+            await resp.send_event(event)
+    """
+
+    __slots__ = ("_data", "_id", "_event", "_retry", "_comment", "_key", "_frames")
+
+    def __init__(
+        self,
+        data: Optional[_Field] = None,
+        *,
+        id: Optional[str] = None,
+        event: Optional[str] = None,
+        retry: Optional[int] = None,
+        comment: Optional[_Field] = None,
+        key: Optional[str] = None,
+    ) -> None:
+        if retry is not None and not isinstance(retry, int):
+            raise TypeError("retry argument must be int")
+
+        self._data = data
+        self._id = id
+        self._event = event
+        self._retry = retry
+        self._comment = comment
+        self._key = key
+        self._frames: dict[str, bytes] = {}
+
+    @property
+    def data(self) -> Optional[_Field]:
+        return self._data
+
+    @property
+    def id(self) -> Optional[str]:
+        return self._id
+
+    @property
+    def event(self) -> Optional[str]:
+        return self._event
+
+    @property
+    def retry(self) -> Optional[int]:
+        return self._retry
+
+    @property
+    def comment(self) -> Optional[_Field]:
+        return self._comment
+
+    @property
+    def key(self) -> Optional[str]:
+        return self._key
+
+    def encode(self, sep: str = "\r\n") -> bytes:
+        """Return wire representation of the event, cached per separator.
+
+        :param str sep: line separator used by the stream.
+        """
+        frame = self._frames.get(sep)
+        if frame is None:
+            frame = _serialize(
+                self._data,
+                self._id,
+                self._event,
+                self._retry,
+                self._comment,
+                _line_separator(sep),
+            )
+            self._frames[sep] = frame
+        return frame
+
+    def __repr__(self) -> str:
+        return (
+            f"<ServerSentEvent data={self._data!r} id={self._id!r} "
+            f"event={self._event!r} retry={self._retry!r}>"
+        )
@@ -1,8 +1,11 @@
-from collections.abc import Coroutine, Generator
+import asyncio
+import sys
+from collections.abc import Awaitable, Callable, Coroutine, Generator, Sequence
 from types import TracebackType
 from typing import Any, AsyncContextManager, Optional, TypeVar
 
 T = TypeVar("T", bound=AsyncContextManager["T"])  # type: ignore[misc]
+_T = TypeVar("_T")
 
 
 class _ContextManager(Coroutine[T, None, T]):
@@ -52,3 +55,67 @@ class _ContextManager(Coroutine[T, None, T]):
         if self._obj is None:  # pragma: no cover
             return False
         return await self._obj.__aexit__(exc_type, exc, tb)
+
+
+async def _gather_limited(
+    items: Sequence[_T],
+    func: Callable[[_T], Awaitable[object]],
+    limit: int,
+    timeout: Optional[float] = None,
+) -> tuple[list[_T], list[_T]]:
+    """Apply ``func`` to every item using at most ``limit`` workers.
+
+    Unlike ``asyncio.gather`` over all items, the number of coroutines
+    does not grow with the number of items. Calls taking longer than
+    ``timeout`` seconds are cancelled, so items which never complete do
+    not hold the workers forever. Returns items for which ``func`` raised
+    an exception and items for which it timed out.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(items)
+    failed: list[_T] = []
+    timed_out: list[_T] = []
+
+    async def worker() -> None:
+        task = asyncio.current_task()
+        assert task is not None
+        started = 0.0
+        expired = False
+        timer: Optional[asyncio.TimerHandle] = None
+
+        def check() -> None:
+            # single timer per worker instead of wait_for() or a timer per
+            # call, which would dominate the cost of cheap calls
+            nonlocal expired, timer
+            assert timeout is not None
+            deadline = started + timeout
+            now = loop.time()
+            if now >= deadline:
+                if not expired:
+                    expired = True
+                    task.cancel()
+                deadline = now + timeout
+            timer = loop.call_at(deadline, check)
+
+        if timeout is not None:
+            timer = loop.call_later(timeout, check)
+        try:
+            for item in iterator:
+                started = loop.time()
+                try:
+                    await func(item)
+                except asyncio.CancelledError:
+                    if not expired:
+                        raise
+                    expired = False
+                    if sys.version_info >= (3, 11):
+                        task.uncancel()
+                    timed_out.append(item)
+                except Exception:
+                    failed.append(item)
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    await asyncio.gather(*(worker() for _ in range(min(limit, len(items)))))
+    return failed, timed_out
@@ -0,0 +1,113 @@
+import time
+from collections.abc import Sequence
+from typing import Optional, Protocol
+
+from .event import ServerSentEvent
+
+
+class EventHistory(Protocol):
+    """Storage of recent events used to resume streams after reconnect.
+
+    Only events with ``id`` could be resumed from, so storages are free to
+    ignore events without it.
+    """
+
+    async def append(self, event: ServerSentEvent) -> None:
+        """Store event."""
+
+    async def after(self, last_event_id: str) -> Optional[Sequence[ServerSentEvent]]:
+        """Return events stored after the event with given id.
+
+        Returns None if the event is unknown, e.g. already evicted, so
+        missing events could not be replayed.
+        """
+
+
+class MemoryEventHistory:
+    """In-memory ring buffer of recent events, implements EventHistory.
+
+    Events are evicted when any of the limits is exceeded: number of events,
+    total size of serialized events in bytes or age in seconds. Looking up
+    an event id takes constant time::
+
+        history = MemoryEventHistory(max_events=1000, max_age=60)
+        broadcaster = Broadcaster(history=history)
+
+        async def subscribe(request):
+            async with sse_response(request, broadcaster=broadcaster) as resp:
+                await resp.wait()
+            return resp
+    """
+
+    DEFAULT_MAX_EVENTS = 1000
+
+    def __init__(
+        self,
+        *,
+        max_events: Optional[int] = DEFAULT_MAX_EVENTS,
+        max_bytes: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ) -> None:
+        if max_events is not None and max_events < 1:
+            raise ValueError("max_events must be greater then 0")
+        if max_bytes is not None and max_bytes < 1:
+            raise ValueError("max_bytes must be greater then 0")
+        if max_age is not None and max_age <= 0:
+            raise ValueError("max_age must be greater then 0")
+
+        self._max_events = max_events
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        # live entries are self._entries[self._start:], evicted ones are
+        # compacted lazily to keep eviction O(1)
+        self._entries: list[tuple[str, float, int, ServerSentEvent]] = []
+        self._start = 0
+        # number of entries compacted since creation
+        self._offset = 0
+        self._size = 0
+        # event id -> absolute position of the entry
+        self._index: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries) - self._start
+
+    async def append(self, event: ServerSentEvent) -> None:
+        if event.id is None:
+            return
+
+        now = time.monotonic()
+        size = len(event.encode())
+        self._index[event.id] = self._offset + len(self._entries)
+        self._entries.append((event.id, now, size, event))
+        self._size += size
+        self._evict(now)
+
+    async def after(self, last_event_id: str) -> Optional[Sequence[ServerSentEvent]]:
+        self._evict(time.monotonic())
+        position = self._index.get(last_event_id)
+        if position is None:
+            return None
+        start = position - self._offset + 1
+        return [entry[3] for entry in self._entries[start:]]
+
+    def _evict(self, now: float) -> None:
+        while len(self) and self._expired(now):
+            event_id, _, size, _ = self._entries[self._start]
+            if self._index[event_id] == self._offset + self._start:
+                del self._index[event_id]
+            self._size -= size
+            self._start += 1
+
+        if self._start > len(self._entries) // 2:
+            del self._entries[: self._start]
+            self._offset += self._start
+            self._start = 0
+
+    def _expired(self, now: float) -> bool:
+        if self._max_events is not None and len(self) > self._max_events:
+            return True
+        if self._max_bytes is not None and self._size > self._max_bytes:
+            return True
+        if self._max_age is not None:
+            return now - self._entries[self._start][1] > self._max_age
+        return False
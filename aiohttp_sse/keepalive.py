@@ -0,0 +1,121 @@
+import asyncio
+from contextlib import suppress
+from typing import TYPE_CHECKING, Optional
+
+from .helpers import _gather_limited
+from .metrics import MetricsRegistry
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+
+class PingScheduler:
+    """Shared keepalive for many EventSourceResponse streams.
+
+    By default every response runs its own ping task. Responses created with
+    a scheduler are grouped by ``ping_interval`` instead, and each group is
+    pinged from a single task::
+
+        scheduler = PingScheduler()
+
+        async def hello(request):
+            async with sse_response(request, ping_scheduler=scheduler) as resp:
+                ...
+
+        app.on_cleanup.append(lambda app: scheduler.close())
+
+    Clients not reading data do not hold up pings of other streams: streams
+    with data still waiting in the write buffer are skipped, since they are
+    not idle, and a ping not written within ``ping_interval`` is abandoned
+    until the next one.
+
+    With ``metrics`` registry created with ``profile`` the scheduler also
+    records how late its tasks wake up into ``loop_lag`` histogram.
+    """
+
+    DEFAULT_CONCURRENCY = 100
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        metrics: Optional[MetricsRegistry] = None,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be greater then 0")
+
+        self._concurrency = concurrency
+        self._profile = metrics.profile if metrics is not None else None
+        self._buckets: dict[float, dict["EventSourceResponse", None]] = {}
+        self._tasks: dict[float, asyncio.Task[None]] = {}
+        self._intervals: dict["EventSourceResponse", float] = {}
+
+    def __len__(self) -> int:
+        return len(self._intervals)
+
+    def __contains__(self, response: object) -> bool:
+        return response in self._intervals
+
+    def add(self, response: "EventSourceResponse") -> None:
+        """Start pinging response every ``response.ping_interval`` seconds.
+
+        Already added response is moved to its current ping interval.
+        """
+        interval = response.ping_interval
+        if self._intervals.get(response) == interval:
+            return
+
+        self.remove(response)
+        bucket = self._buckets.get(interval)
+        if bucket is None:
+            bucket = self._buckets[interval] = {}
+            self._tasks[interval] = asyncio.create_task(self._run(interval, bucket))
+        bucket[response] = None
+        self._intervals[response] = interval
+
+    def remove(self, response: "EventSourceResponse") -> None:
+        """Stop pinging response."""
+        interval = self._intervals.pop(response, None)
+        if interval is None:
+            return
+
+        bucket = self._buckets[interval]
+        del bucket[response]
+        if not bucket:
+            del self._buckets[interval]
+            self._tasks.pop(interval).cancel()
+
+    async def close(self) -> None:
+        """Cancel all ping tasks."""
+        tasks = list(self._tasks.values())
+        self._buckets.clear()
+        self._tasks.clear()
+        self._intervals.clear()
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+
+    async def _run(
+        self,
+        interval: float,
+        bucket: dict["EventSourceResponse", None],
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            wakeup = loop.time() + interval
+            await asyncio.sleep(interval)
+            now = loop.time()
+            if self._profile is not None:
+                self._profile.loop_lag.record(now - wakeup)
+            responses = [r for r in bucket if r._needs_ping(now)]
+            failed, _ = await _gather_limited(
+                responses, self._ping, self._concurrency, interval
+            )
+            for response in failed:
+                response._close()
+
+    @staticmethod
+    async def _ping(response: "EventSourceResponse") -> None:
+        await response._write_ping()
@@ -0,0 +1,334 @@
+import logging
+from collections.abc import Callable, Iterator
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_Hook = Callable[["StreamMetrics"], None]
+
+
+class Histogram:
+    """Distribution of durations in fixed log-linear buckets.
+
+    Durations are counted in microseconds, exactly below 32 and with
+    ``1/16`` relative precision above, like in HDR histograms. Buckets are
+    allocated upfront, so recording a value is a few integer operations
+    and never allocates memory. Durations above about 38 hours are counted
+    in the last bucket.
+    """
+
+    SUB_BUCKET_BITS = 4
+    MAX_SHIFT = 32
+
+    __slots__ = ("_counts", "_count", "_sum", "_min", "_max")
+
+    def __init__(self) -> None:
+        self._counts = [0] * ((self.MAX_SHIFT + 2) << self.SUB_BUCKET_BITS)
+        self._count = 0
+        self._sum = 0.0
+        self._min = 0.0
+        self._max = 0.0
+
+    @classmethod
+    def _index(cls, micros: int) -> int:
+        sub_buckets = 1 << cls.SUB_BUCKET_BITS
+        shift = micros.bit_length() - cls.SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            return micros
+        shift = min(shift, cls.MAX_SHIFT)
+        top = min(micros >> shift, 2 * sub_buckets - 1)
+        return shift * sub_buckets + top
+
+    @classmethod
+    def _upper_bound(cls, index: int) -> float:
+        sub_buckets = 1 << cls.SUB_BUCKET_BITS
+        shift = max(index // sub_buckets - 1, 0)
+        top = index - shift * sub_buckets
+        return ((top + 1) << shift) / 1e6
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    @property
+    def min(self) -> float:
+        return self._min
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def mean(self) -> float:
+        return self._sum / self._count if self._count else 0.0
+
+    def record(self, duration: float) -> None:
+        """Count duration in seconds."""
+        if duration < 0:
+            duration = 0.0
+        self._counts[self._index(int(duration * 1e6))] += 1
+        if not self._count or duration < self._min:
+            self._min = duration
+        if duration > self._max:
+            self._max = duration
+        self._count += 1
+        self._sum += duration
+
+    def percentile(self, percent: float) -> float:
+        """Return upper bound of durations below the given percentile."""
+        if not 0 <= percent <= 100:
+            raise ValueError("percent must be between 0 and 100")
+        if not self._count:
+            return 0.0
+        rank = max(1, round(self._count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank:
+                return min(self._upper_bound(index), self._max)
+        return self._max  # pragma: no cover
+
+    def buckets(self) -> Iterator[tuple[float, int]]:
+        """Iterate over upper bounds in seconds and counts of used buckets."""
+        for index, count in enumerate(self._counts):
+            if count:
+                yield self._upper_bound(index), count
+
+    def _merge(self, other: "Histogram") -> None:
+        if not other._count:
+            return
+        for index, count in enumerate(other._counts):
+            self._counts[index] += count
+        if not self._count or other._min < self._min:
+            self._min = other._min
+        self._max = max(self._max, other._max)
+        self._count += other._count
+        self._sum += other._sum
+
+    def __repr__(self) -> str:
+        return (
+            f"<Histogram count={self._count} mean={self.mean:.6f} "
+            f"p50={self.percentile(50):.6f} p99={self.percentile(99):.6f} "
+            f"max={self._max:.6f}>"
+        )
+
+
+class LatencyProfile:
+    """Histograms of the hot path of EventSourceResponse streams.
+
+    * ``send_latency`` - from ``send()`` call or queueing of the event to
+      completion of its write;
+    * ``serialize_time`` - building of the frame in ``send()``;
+    * ``write_time`` - writing to the transport, including waiting for the
+      client to drain the buffer;
+    * ``loop_lag`` - how late ping tasks wake up, i.e. event loop lag.
+    """
+
+    __slots__ = ("_send_latency", "_serialize_time", "_write_time", "_loop_lag")
+
+    def __init__(self) -> None:
+        self._send_latency = Histogram()
+        self._serialize_time = Histogram()
+        self._write_time = Histogram()
+        self._loop_lag = Histogram()
+
+    @property
+    def send_latency(self) -> Histogram:
+        return self._send_latency
+
+    @property
+    def serialize_time(self) -> Histogram:
+        return self._serialize_time
+
+    @property
+    def write_time(self) -> Histogram:
+        return self._write_time
+
+    @property
+    def loop_lag(self) -> Histogram:
+        return self._loop_lag
+
+    def __repr__(self) -> str:
+        return (
+            f"<LatencyProfile send_latency={self._send_latency!r} "
+            f"serialize_time={self._serialize_time!r} "
+            f"write_time={self._write_time!r} loop_lag={self._loop_lag!r}>"
+        )
+
+
+class StreamMetrics:
+    """Counters and timings of single event stream.
+
+    Times are in seconds. ``blocked_time`` is the part of ``write_time``
+    spent waiting for the client to read already written data.
+    """
+
+    __slots__ = (
+        "_events",
+        "_bytes",
+        "_pings",
+        "_writes",
+        "_write_time",
+        "_max_write_time",
+        "_blocked_writes",
+        "_blocked_time",
+    )
+
+    def __init__(self) -> None:
+        self._events = 0
+        self._bytes = 0
+        self._pings = 0
+        self._writes = 0
+        self._write_time = 0.0
+        self._max_write_time = 0.0
+        self._blocked_writes = 0
+        self._blocked_time = 0.0
+
+    @property
+    def events(self) -> int:
+        """Number of events sent or queued for sending."""
+        return self._events
+
+    @property
+    def bytes(self) -> int:
+        """Number of bytes written, after compression if enabled."""
+        return self._bytes
+
+    @property
+    def pings(self) -> int:
+        return self._pings
+
+    @property
+    def writes(self) -> int:
+        return self._writes
+
+    @property
+    def write_time(self) -> float:
+        return self._write_time
+
+    @property
+    def max_write_time(self) -> float:
+        return self._max_write_time
+
+    @property
+    def blocked_writes(self) -> int:
+        """Number of writes which had to wait for the client."""
+        return self._blocked_writes
+
+    @property
+    def blocked_time(self) -> float:
+        return self._blocked_time
+
+    def _add_write(self, size: int, duration: float, blocked: bool) -> None:
+        self._writes += 1
+        self._bytes += size
+        self._write_time += duration
+        if duration > self._max_write_time:
+            self._max_write_time = duration
+        if blocked:
+            self._blocked_writes += 1
+            self._blocked_time += duration
+
+    def _merge(self, other: "StreamMetrics") -> None:
+        self._events += other._events
+        self._bytes += other._bytes
+        self._pings += other._pings
+        self._writes += other._writes
+        self._write_time += other._write_time
+        self._max_write_time = max(self._max_write_time, other._max_write_time)
+        self._blocked_writes += other._blocked_writes
+        self._blocked_time += other._blocked_time
+
+    def __repr__(self) -> str:
+        return (
+            f"<StreamMetrics events={self._events} bytes={self._bytes} "
+            f"pings={self._pings} writes={self._writes} "
+            f"write_time={self._write_time:.6f} "
+            f"blocked_time={self._blocked_time:.6f}>"
+        )
+
+
+class MetricsRegistry:
+    """Aggregate metrics of EventSourceResponse streams, e.g. per application.
+
+    Metrics are collected only for responses created with the registry.
+    Totals are computed on demand, so the cost of a write is updating
+    counters of its own stream only::
+
+        metrics = MetricsRegistry()
+        metrics.add_hook(lambda m: log.info("stream closed: %r", m))
+
+        async def hello(request):
+            async with sse_response(request, metrics=metrics) as resp:
+                ...
+
+        async def stats(request):
+            totals = metrics.totals()
+            return web.json_response({"active": metrics.active, ...})
+
+    With ``profile`` latencies of all streams are also collected into
+    shared histograms of :class:`LatencyProfile`.
+    """
+
+    def __init__(self, *, profile: bool = False) -> None:
+        self._streams: dict[StreamMetrics, None] = {}
+        self._finished = StreamMetrics()
+        self._total_streams = 0
+        self._hooks: list[_Hook] = []
+        self._profile = LatencyProfile() if profile else None
+
+    def __iter__(self) -> Iterator[StreamMetrics]:
+        """Iterate over metrics of active streams."""
+        return iter(list(self._streams))
+
+    @property
+    def active(self) -> int:
+        """Number of active streams."""
+        return len(self._streams)
+
+    @property
+    def profile(self) -> Optional[LatencyProfile]:
+        """Latency histograms, if created with ``profile``."""
+        return self._profile
+
+    @property
+    def total_streams(self) -> int:
+        """Number of streams started since the registry creation."""
+        return self._total_streams
+
+    def totals(self) -> StreamMetrics:
+        """Return metrics summed over finished and active streams."""
+        totals = StreamMetrics()
+        totals._merge(self._finished)
+        for metrics in self._streams:
+            totals._merge(metrics)
+        return totals
+
+    def add_hook(self, hook: _Hook) -> None:
+        """Call ``hook`` with metrics of every finished stream.
+
+        Exceptions of the hook are logged and do not affect the stream.
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook: _Hook) -> None:
+        self._hooks.remove(hook)
+
+    def _start(self, metrics: StreamMetrics) -> None:
+        self._streams[metrics] = None
+        self._total_streams += 1
+
+    def _finish(self, metrics: StreamMetrics) -> None:
+        if metrics not in self._streams:
+            return
+        del self._streams[metrics]
+        self._finished._merge(metrics)
+        for hook in self._hooks:
+            try:
+                hook(metrics)
+            except Exception:
+                logger.exception("Error in stream metrics hook")
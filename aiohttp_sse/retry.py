@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+
+class RetryPolicy:
+    """Reconnection time of EventSourceResponse streams adapted to server load.
+
+    Load is a number from 0 to 1, the highest of the number of streams
+    using the policy relative to ``max_connections``, event loop lag
+    relative to ``max_lag`` seconds and the value returned by ``signal``
+    callable. Retry time grows linearly with load from ``min_retry`` to
+    ``max_retry`` milliseconds, rounded to ``step``, and is recomputed at
+    most every ``interval`` seconds. Each stream is sent ``retry:`` field
+    along with the next event or ping once the value changes, so clients
+    back off more when the server is busy::
+
+        policy = RetryPolicy(max_connections=10000, max_lag=0.1)
+
+        async def hello(request):
+            async with sse_response(request, retry_policy=policy) as resp:
+                ...
+
+    Event loop lag is measured by a background task running while any
+    stream uses the policy.
+    """
+
+    DEFAULT_MIN_RETRY = 1000
+    DEFAULT_MAX_RETRY = 30000
+    DEFAULT_STEP = 1000
+    DEFAULT_INTERVAL = 1.0
+
+    def __init__(
+        self,
+        *,
+        min_retry: int = DEFAULT_MIN_RETRY,
+        max_retry: int = DEFAULT_MAX_RETRY,
+        step: int = DEFAULT_STEP,
+        max_connections: Optional[int] = None,
+        max_lag: Optional[float] = None,
+        signal: Optional[Callable[[], float]] = None,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        if min_retry < 0:
+            raise ValueError("min_retry must not be negative")
+        if max_retry < min_retry:
+            raise ValueError("max_retry must not be less than min_retry")
+        if step < 1:
+            raise ValueError("step must be greater then 0")
+        if max_connections is not None and max_connections < 1:
+            raise ValueError("max_connections must be greater then 0")
+        if max_lag is not None and max_lag <= 0:
+            raise ValueError("max_lag must be greater then 0")
+        if interval <= 0:
+            raise ValueError("interval must be greater then 0")
+
+        self._min_retry = min_retry
+        self._max_retry = max_retry
+        self._step = step
+        self._max_connections = max_connections
+        self._max_lag = max_lag
+        self._signal = signal
+        self._interval = interval
+
+        self._streams: dict["EventSourceResponse", None] = {}
+        self._lag = 0.0
+        self._probe_task: Optional[asyncio.Task[None]] = None
+        self._retry = min_retry
+        self._updated: Optional[float] = None
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    @property
+    def min_retry(self) -> int:
+        return self._min_retry
+
+    @property
+    def max_retry(self) -> int:
+        return self._max_retry
+
+    @property
+    def lag(self) -> float:
+        """Event loop lag in seconds, measured last time."""
+        return self._lag
+
+    @property
+    def load(self) -> float:
+        """Current load from 0 to 1."""
+        load = 0.0
+        if self._max_connections is not None:
+            load = len(self._streams) / self._max_connections
+        if self._max_lag is not None:
+            load = max(load, self._lag / self._max_lag)
+        if self._signal is not None:
+            load = max(load, self._signal())
+        return min(max(load, 0.0), 1.0)
+
+    @property
+    def retry(self) -> int:
+        """Reconnection time in milliseconds for the current load."""
+        now = time.monotonic()
+        if self._updated is None or now - self._updated >= self._interval:
+            self._updated = now
+            span = self._max_retry - self._min_retry
+            retry = round((self._min_retry + span * self.load) / self._step)
+            self._retry = min(max(retry * self._step, self._min_retry), self._max_retry)
+        return self._retry
+
+    def _add(self, response: "EventSourceResponse") -> None:
+        self._streams[response] = None
+        if self._max_lag is not None and self._probe_task is None:
+            self._probe_task = asyncio.create_task(self._probe())
+
+    def _remove(self, response: "EventSourceResponse") -> None:
+        self._streams.pop(response, None)
+        if not self._streams and self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
+    async def _probe(self) -> None:
+        loop = asyncio.get_running_loop()
+        with suppress(asyncio.CancelledError):
+            while True:
+                started = loop.time()
+                await asyncio.sleep(self._interval)
+                self._lag = max(0.0, loop.time() - started - self._interval)
+
+    def __repr__(self) -> str:
+        return (
+            f"<RetryPolicy min_retry={self._min_retry} "
+            f"max_retry={self._max_retry} step={self._step} "
+            f"max_connections={self._max_connections} max_lag={self._max_lag}>"
+        )
@@ -0,0 +1,231 @@
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Optional
+
+from .event import ServerSentEvent, _Field
+from .helpers import _gather_limited
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+_Subscribers = dict["EventSourceResponse", None]
+
+SEPARATOR = "."
+ANY_SEGMENT = "*"
+ANY_TAIL = "#"
+
+
+class _Node:
+    __slots__ = ("children", "subscribers", "tail_subscribers")
+
+    def __init__(self) -> None:
+        self.children: dict[str, _Node] = {}
+        # subscribed to the pattern ending at this node
+        self.subscribers: _Subscribers = {}
+        # subscribed to the pattern ending at this node with "#"
+        self.tail_subscribers: _Subscribers = {}
+
+    def is_empty(self) -> bool:
+        return not (self.children or self.subscribers or self.tail_subscribers)
+
+
+def _is_pattern(topic: str) -> bool:
+    return ANY_SEGMENT in topic or ANY_TAIL in topic
+
+
+def _split_pattern(pattern: str) -> list[str]:
+    segments = pattern.split(SEPARATOR)
+    for i, segment in enumerate(segments):
+        if segment == ANY_TAIL:
+            if i != len(segments) - 1:
+                raise ValueError(f"{ANY_TAIL} must be the last segment of pattern")
+        elif ANY_TAIL in segment or (ANY_SEGMENT in segment and segment != ANY_SEGMENT):
+            raise ValueError(f"wildcard must be the whole segment: {pattern!r}")
+    return segments
+
+
+class TopicRouter:
+    """Deliver events to EventSourceResponse streams subscribed to topics.
+
+    Topics are dot separated, e.g. ``orders.eu.42``. Subscriptions could be
+    exact topics or patterns, where ``*`` matches exactly one segment and
+    trailing ``#`` matches any number of segments, including none.
+    Exact topics are looked up in a dict and patterns in a trie of segments,
+    so publishing does not depend on the number of other topics or streams.
+    Streams not accepting an event within ``send_timeout`` seconds are
+    closed, so stuck clients do not delay delivery to others::
+
+        router = TopicRouter()
+
+        async def subscribe(request):
+            async with sse_response(request) as resp:
+                router.subscribe(resp, request.query.getall("topic"))
+                await resp.wait()
+            return resp
+
+        async def publish(request):
+            await router.publish("orders.eu.42", "foo", event="bar")
+            return web.Response()
+    """
+
+    DEFAULT_CONCURRENCY = 100
+    DEFAULT_SEND_TIMEOUT = 10.0
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        send_timeout: Optional[float] = DEFAULT_SEND_TIMEOUT,
+    ) -> None:
+        if concurrency < 1:
+            raise ValueError("concurrency must be greater then 0")
+        if send_timeout is not None and send_timeout <= 0:
+            raise ValueError("send_timeout must be greater then 0")
+
+        self._concurrency = concurrency
+        self._send_timeout = send_timeout
+        self._exact: dict[str, _Subscribers] = {}
+        self._root = _Node()
+        self._topics: dict["EventSourceResponse", set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._topics)
+
+    def __contains__(self, response: object) -> bool:
+        return response in self._topics
+
+    def topics(self, response: "EventSourceResponse") -> frozenset[str]:
+        """Return topics and patterns the response is subscribed to."""
+        return frozenset(self._topics.get(response, ()))
+
+    def subscribe(self, response: "EventSourceResponse", topics: Iterable[str]) -> None:
+        """Subscribe prepared response to topics or patterns.
+
+        Response is unsubscribed automatically once streaming is stopped.
+        """
+        if response._ping_task is None:
+            raise RuntimeError("Response is not started")
+
+        topics = [t for t in topics if t not in self._topics.get(response, ())]
+        patterns = {t: _split_pattern(t) for t in topics if _is_pattern(t)}
+
+        subscribed = self._topics.get(response)
+        if subscribed is None:
+            subscribed = self._topics[response] = set()
+            response._ping_task.add_done_callback(lambda _: self.unsubscribe(response))
+
+        for topic in topics:
+            subscribed.add(topic)
+            segments = patterns.get(topic)
+            if segments is None:
+                self._exact.setdefault(topic, {})[response] = None
+                continue
+
+            node = self._root
+            tail = segments[-1] == ANY_TAIL
+            for segment in segments[:-1] if tail else segments:
+                node = node.children.setdefault(segment, _Node())
+            if tail:
+                node.tail_subscribers[response] = None
+            else:
+                node.subscribers[response] = None
+
+    def unsubscribe(
+        self,
+        response: "EventSourceResponse",
+        topics: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Unsubscribe response from given topics, or from all of them."""
+        subscribed = self._topics.get(response)
+        if subscribed is None:
+            return
+
+        for topic in list(subscribed) if topics is None else topics:
+            if topic not in subscribed:
+                continue
+            subscribed.discard(topic)
+            if _is_pattern(topic):
+                self._remove_pattern(response, topic.split(SEPARATOR))
+            else:
+                exact = self._exact[topic]
+                del exact[response]
+                if not exact:
+                    del self._exact[topic]
+        if not subscribed:
+            del self._topics[response]
+
+    def _remove_pattern(
+        self, response: "EventSourceResponse", segments: list[str]
+    ) -> None:
+        tail = segments[-1] == ANY_TAIL
+        if tail:
+            segments = segments[:-1]
+        path = [self._root]
+        for segment in segments:
+            path.append(path[-1].children[segment])
+
+        node = path[-1]
+        del (node.tail_subscribers if tail else node.subscribers)[response]
+        # prune branches without subscribers
+        for parent, segment in zip(reversed(path[:-1]), reversed(segments)):
+            if not parent.children[segment].is_empty():
+                break
+            del parent.children[segment]
+
+    def match(self, topic: str) -> list["EventSourceResponse"]:
+        """Return responses subscribed to the topic, each one once."""
+        matched: _Subscribers = dict(self._exact.get(topic, ()))
+        if not self._root.is_empty():
+            self._match(self._root, topic.split(SEPARATOR), 0, matched)
+        return list(matched)
+
+    def _match(
+        self, node: _Node, segments: list[str], index: int, matched: _Subscribers
+    ) -> None:
+        matched.update(node.tail_subscribers)
+        if index == len(segments):
+            matched.update(node.subscribers)
+            return
+
+        child = node.children.get(segments[index])
+        if child is not None:
+            self._match(child, segments, index + 1, matched)
+        child = node.children.get(ANY_SEGMENT)
+        if child is not None:
+            self._match(child, segments, index + 1, matched)
+
+    async def publish(
+        self,
+        topic: str,
+        data: _Field,
+        id: Optional[str] = None,
+        event: Optional[str] = None,
+        retry: Optional[int] = None,
+        key: Optional[str] = None,
+    ) -> int:
+        """Send data to responses subscribed to the topic.
+
+        Accepts the same arguments as ``EventSourceResponse.send``.
+        Returns number of streams the event was delivered to.
+        """
+        return await self.publish_event(
+            topic, ServerSentEvent(data, id=id, event=event, retry=retry, key=key)
+        )
+
+    async def publish_event(self, topic: str, event: ServerSentEvent) -> int:
+        """Send prepared event to responses subscribed to the topic.
+
+        Returns number of streams the event was delivered to.
+        """
+        subscribers = [r for r in self.match(topic) if r.is_connected()]
+        failed, timed_out = await _gather_limited(
+            subscribers,
+            lambda r: r.send_event(event),
+            self._concurrency,
+            self._send_timeout,
+        )
+        for response in failed:
+            self.unsubscribe(response)
+        for response in timed_out:
+            self.unsubscribe(response)
+            response.stop_streaming()
+        return len(subscribers) - len(failed) - len(timed_out)
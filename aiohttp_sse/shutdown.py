@@ -0,0 +1,145 @@
+import asyncio
+import random
+from contextlib import suppress
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+
+from .event import ServerSentEvent
+
+if TYPE_CHECKING:
+    from . import EventSourceResponse
+
+
+class ShutdownManager:
+    """Close all EventSourceResponse streams of an application on shutdown.
+
+    Once attached to the application with ``setup()``, every prepared
+    response of the application is registered automatically. On shutdown
+    each stream is sent a final ``retry:`` hint of ``retry`` milliseconds
+    plus random jitter up to ``jitter`` milliseconds, so clients reconnect
+    to the remaining workers spread over time rather than all at once.
+    Streams are closed in batches of ``batch_size`` with ``batch_delay``
+    seconds between batches, and streams not closed within ``timeout``
+    seconds are stopped without the hint::
+
+        manager = ShutdownManager(retry=1000, jitter=5000)
+        manager.setup(app)
+
+        async def hello(request):
+            async with sse_response(request) as resp:
+                await resp.wait()
+            return resp
+    """
+
+    DEFAULT_RETRY = 1000
+    DEFAULT_JITTER = 5000
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_TIMEOUT = 10
+
+    def __init__(
+        self,
+        *,
+        retry: int = DEFAULT_RETRY,
+        jitter: int = DEFAULT_JITTER,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        batch_delay: float = 0,
+        timeout: float = DEFAULT_TIMEOUT,
+    ) -> None:
+        if retry < 0:
+            raise ValueError("retry must not be negative")
+        if jitter < 0:
+            raise ValueError("jitter must not be negative")
+        if batch_size < 1:
+            raise ValueError("batch_size must be greater then 0")
+        if batch_delay < 0:
+            raise ValueError("batch_delay must not be negative")
+        if timeout <= 0:
+            raise ValueError("timeout must be greater then 0")
+
+        self._retry = retry
+        self._jitter = jitter
+        self._batch_size = batch_size
+        self._batch_delay = batch_delay
+        self._timeout = timeout
+        # dict preserves registration order, so older streams close first
+        self._streams: dict["EventSourceResponse", None] = {}
+        self._closing = False
+
+    def __len__(self) -> int:
+        return len(self._streams)
+
+    def __contains__(self, response: object) -> bool:
+        return response in self._streams
+
+    @property
+    def closing(self) -> bool:
+        return self._closing
+
+    def setup(self, app: web.Application) -> None:
+        """Attach manager to the application and close streams on shutdown."""
+        app[SHUTDOWN_MANAGER_KEY] = self
+        app.on_shutdown.append(lambda _: self.shutdown())
+
+    def register(self, response: "EventSourceResponse") -> None:
+        """Add prepared response to the streams closed on shutdown.
+
+        Response is removed automatically once streaming is stopped. Streams
+        registered during shutdown are stopped immediately.
+        """
+        if response._ping_task is None:
+            raise RuntimeError("Response is not started")
+        if self._closing:
+            response.stop_streaming()
+            return
+        if response in self._streams:
+            return
+
+        self._streams[response] = None
+        response._ping_task.add_done_callback(
+            lambda _: self._streams.pop(response, None)
+        )
+
+    async def shutdown(self) -> None:
+        """Send retry hints and close all registered streams."""
+        self._closing = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._timeout
+        streams = list(self._streams)
+        for start in range(0, len(streams), self._batch_size):
+            if start and self._batch_delay:
+                await asyncio.sleep(min(self._batch_delay, deadline - loop.time()))
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            batch = streams[start : start + self._batch_size]
+            tasks = [asyncio.create_task(self._close(r)) for r in batch]
+            _, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+
+        # out of time, stop the rest without waiting for the hint
+        for response in list(self._streams):
+            response.stop_streaming()
+        self._streams.clear()
+
+    async def _close(self, response: "EventSourceResponse") -> None:
+        if response.is_connected():
+            retry = self._retry + random.randint(0, self._jitter)
+            with suppress(ConnectionResetError, RuntimeError):
+                await response.send_event(ServerSentEvent(retry=retry))
+                if response._buffer is not None:
+                    # hint is queued after events not sent yet
+                    await response._buffer.join()
+        response.stop_streaming()
+        await response.wait()
+
+    def __repr__(self) -> str:
+        return (
+            f"<ShutdownManager retry={self._retry} jitter={self._jitter} "
+            f"batch_size={self._batch_size} batch_delay={self._batch_delay} "
+            f"timeout={self._timeout}>"
+        )
+
+
+SHUTDOWN_MANAGER_KEY = web.AppKey("aiohttp_sse_shutdown_manager", ShutdownManager)
@@ -0,0 +1,227 @@
+import asyncio
+import errno
+import json
+import logging
+import os
+import secrets
+import socket
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Any, Optional, Protocol
+
+from .event import ServerSentEvent
+
+logger = logging.getLogger(__name__)
+
+_Receiver = Callable[[ServerSentEvent], Awaitable[object]]
+
+
+class BroadcastTransport(Protocol):
+    """Pub/sub channel delivering events between processes.
+
+    Used by Broadcaster to publish events to subscribers connected to other
+    worker processes. Events published by the process itself must not be
+    passed to ``receive``, they are delivered locally by Broadcaster.
+    """
+
+    async def start(self, receive: _Receiver) -> None:
+        """Start receiving events published by other processes."""
+
+    async def publish(self, event: ServerSentEvent) -> None:
+        """Send event to other processes."""
+
+    async def close(self) -> None:
+        """Stop receiving events and release resources."""
+
+
+def _dump_event(event: ServerSentEvent) -> bytes:
+    fields: dict[str, Any] = {}
+    for name in ("data", "id", "event", "retry", "comment", "key"):
+        value = getattr(event, name)
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        if value is not None:
+            fields[name] = value
+    return json.dumps(fields, separators=(",", ":")).encode("utf-8")
+
+
+def _load_event(payload: bytes) -> ServerSentEvent:
+    fields = json.loads(payload)
+    if not isinstance(fields, dict):
+        raise ValueError("event must be JSON object")
+    return ServerSentEvent(
+        fields.get("data"),
+        id=fields.get("id"),
+        event=fields.get("event"),
+        retry=fields.get("retry"),
+        comment=fields.get("comment"),
+        key=fields.get("key"),
+    )
+
+
+class UnixSocketTransport:
+    """Broadcast events over Unix datagram sockets, implements BroadcastTransport.
+
+    Every process binds a socket in the shared ``path`` directory, and
+    publishing sends the event, serialized once, to sockets of all other
+    processes. Sockets left by crashed processes are removed on publish.
+    The list of sockets is cached and rescanned at most every
+    ``refresh_interval`` seconds or after a failed send, so a new process
+    may miss events published during that time. Events are delivered to
+    processes of the same host only, and an event must fit into a single
+    datagram (about 200 KiB by default on Linux), ``publish`` raises
+    ``ValueError`` for a larger one before sending it anywhere. Failed
+    sends to a single process are logged and skipped::
+
+        broadcaster = Broadcaster(transport=UnixSocketTransport("/run/app-sse"))
+
+        async def on_startup(app):
+            await broadcaster.start()
+
+        async def on_cleanup(app):
+            await broadcaster.close()
+
+    Not available on Windows.
+    """
+
+    DEFAULT_REFRESH_INTERVAL = 1.0
+
+    def __init__(
+        self, path: str, *, refresh_interval: float = DEFAULT_REFRESH_INTERVAL
+    ) -> None:
+        if refresh_interval < 0:
+            raise ValueError("refresh_interval must not be negative")
+
+        self._path = path
+        self._refresh_interval = refresh_interval
+        # sockets of other processes, scanned at self._refreshed
+        self._peers: list[str] = []
+        self._refreshed: Optional[float] = None
+        self._address: Optional[str] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[socket.socket] = None
+        self._reader: Optional[asyncio.Task[None]] = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def refresh_interval(self) -> float:
+        return self._refresh_interval
+
+    @property
+    def address(self) -> Optional[str]:
+        """Socket path of this process, once started."""
+        return self._address
+
+    async def start(self, receive: _Receiver) -> None:
+        if self._transport is not None:
+            raise RuntimeError("Transport is already started")
+
+        os.makedirs(self._path, exist_ok=True)
+        name = f"{os.getpid()}-{secrets.token_hex(4)}.sock"
+        address = os.path.join(self._path, name)
+        queue: asyncio.Queue[ServerSentEvent] = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            sock.bind(address)
+            self._transport, _ = await loop.create_datagram_endpoint(
+                lambda: _ReceiverProtocol(queue), sock=sock
+            )
+        except BaseException:
+            sock.close()
+            raise
+
+        self._address = address
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+        self._reader = asyncio.create_task(self._read(queue, receive))
+
+    async def publish(self, event: ServerSentEvent) -> None:
+        if self._sender is None:
+            raise RuntimeError("Transport is not started")
+
+        payload = _dump_event(event)
+        failed = False
+        for address in self._get_peers():
+            try:
+                self._sender.sendto(payload, address)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # nobody listens, the process is gone
+                with suppress(OSError):
+                    os.unlink(address)
+                failed = True
+            except BlockingIOError:
+                logger.warning("Event is dropped, %s is not reading", address)
+            except OSError as exc:
+                if exc.errno == errno.EMSGSIZE:
+                    # the same for all peers, so nothing is sent yet
+                    raise ValueError(
+                        f"event of {len(payload)} bytes does not fit into datagram"
+                    ) from exc
+                logger.warning(
+                    "Event is dropped, failed to send to %s: %s", address, exc
+                )
+        if failed:
+            self._refreshed = None
+
+    def _get_peers(self) -> list[str]:
+        # directory is scanned on the event loop, so not on every publish
+        now = asyncio.get_running_loop().time()
+        if self._refreshed is None or now - self._refreshed >= self._refresh_interval:
+            self._refreshed = now
+            self._peers = [
+                address
+                for address in (
+                    os.path.join(self._path, name)
+                    for name in os.listdir(self._path)
+                    if name.endswith(".sock")
+                )
+                if address != self._address
+            ]
+        return self._peers
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._reader
+            self._reader = None
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        if self._sender is not None:
+            self._sender.close()
+            self._sender = None
+        if self._address is not None:
+            with suppress(OSError):
+                os.unlink(self._address)
+            self._address = None
+        self._peers = []
+        self._refreshed = None
+
+    async def _read(
+        self, queue: "asyncio.Queue[ServerSentEvent]", receive: _Receiver
+    ) -> None:
+        # deliver events one by one to keep their order
+        while True:
+            event = await queue.get()
+            try:
+                await receive(event)
+            except Exception:
+                logger.exception("Failed to deliver %r", event)
+
+
+class _ReceiverProtocol(asyncio.DatagramProtocol):
+    def __init__(self, queue: "asyncio.Queue[ServerSentEvent]") -> None:
+        self._queue = queue
+
+    def datagram_received(self, data: bytes, addr: Any) -> None:
+        try:
+            event = _load_event(data)
+        except (ValueError, TypeError):
+            logger.warning("Malformed event is received: %r", data[:100])
+            return
+        self._queue.put_nowait(event)
@@ -0,0 +1,142 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from typing import Any, Optional, TypedDict
+
+import aiohttp
+from aiohttp import web
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.test_utils import TestServer, make_mocked_request
+from multidict import CIMultiDict
+
+
+class Result(TypedDict):
+    value: float
+    unit: str
+
+
+Results = dict[str, Result]
+
+
+class NullWriter(AbstractStreamWriter):
+    """Payload writer discarding everything, isolates server-side costs."""
+
+    async def write(self, chunk: Any) -> None:
+        self.output_size += len(chunk)
+
+    async def write_eof(self, chunk: bytes = b"") -> None:
+        pass
+
+    async def drain(self) -> None:
+        pass
+
+    def enable_compression(
+        self, encoding: str = "deflate", strategy: Optional[int] = None
+    ) -> None:
+        pass
+
+    def enable_chunking(self) -> None:
+        pass
+
+    async def write_headers(self, status_line: str, headers: CIMultiDict[str]) -> None:
+        pass
+
+
+class NullTransport:
+    """Transport with empty write buffer, Mock would allocate on every access."""
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def get_write_buffer_limits(self) -> tuple[int, int]:
+        return (16384, 65536)
+
+    def get_extra_info(self, name: str, default: Any = None) -> Any:
+        return default
+
+    def is_closing(self) -> bool:
+        return False
+
+
+class NullManager:
+    """Server connection manager, shared by all connections as in aiohttp."""
+
+    def connection_lost(self, handler: object, exc: Optional[BaseException]) -> None:
+        pass
+
+
+class NullProtocol:
+    """Request handler protocol without mocks, which allocate on every access."""
+
+    max_field_size = 8190
+    max_line_length = 8190
+    max_headers = 128
+    peername = None
+    sockname = None
+    ssl_context = None
+
+    def __init__(self, manager: NullManager) -> None:
+        self._manager = manager
+        self.transport: Any = None
+        self.writer: Any = None
+
+
+_manager = NullManager()
+
+
+def make_request() -> web.Request:
+    return make_mocked_request(
+        "GET",
+        "/",
+        writer=NullWriter(),
+        protocol=NullProtocol(_manager),
+        transport=NullTransport(),
+    )
+
+
+def best_of(func: Callable[[], object], number: int, repeat: int = 5) -> float:
+    """Best average time of ``func`` call in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+async def cpu_time(coro: Awaitable[object]) -> float:
+    """Process CPU time spent while awaiting ``coro``, in seconds."""
+    start = time.process_time()
+    await coro
+    return time.process_time() - start
+
+
+@asynccontextmanager
+async def serve(app: web.Application) -> AsyncIterator[TestServer]:
+    """Run application on a loopback port."""
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield server
+    finally:
+        await server.close()
+
+
+async def open_streams(
+    server: TestServer,
+    count: int,
+    on_data: Callable[[bytes], None],
+) -> tuple[aiohttp.ClientSession, list["asyncio.Task[None]"]]:
+    """Open ``count`` event streams, feeding everything received to on_data."""
+    connector = aiohttp.TCPConnector(limit=0)
+    session = aiohttp.ClientSession(connector=connector)
+
+    async def read() -> None:
+        async with session.get(server.make_url("/")) as resp:
+            async for chunk in resp.content.iter_any():
+                on_data(chunk)
+
+    tasks = [asyncio.create_task(read()) for _ in range(count)]
+    return session, tasks
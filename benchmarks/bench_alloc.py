@@ -0,0 +1,80 @@
+"""Memory allocated while building frames in steady state.
+
+Measures peak of memory allocated by a single call with tracemalloc,
+after caches are warmed up, for the current serializer and the previous
+``io.StringIO`` based implementation, and for ping frames::
+
+    $ python benchmarks/bench_alloc.py
+"""
+
+import asyncio
+import tracemalloc
+from collections.abc import Callable
+
+from _common import Results
+from bench_serialize import (
+    FIELDS,
+    LINE_SEP,
+    PAYLOADS,
+    SEP,
+    current_serialize,
+    legacy_serialize,
+)
+
+from aiohttp_sse.event import _ping_frame
+
+
+def legacy_ping() -> bytes:
+    return ": ping{0}{0}".format(SEP).encode("utf-8")
+
+
+def current_ping() -> bytes:
+    return _ping_frame(LINE_SEP)
+
+
+def allocated(func: Callable[[], object], number: int) -> int:
+    """Smallest peak of memory allocated by ``func`` call, in bytes."""
+    for _ in range(10):
+        func()  # warm up caches
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(number):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    finally:
+        tracemalloc.stop()
+    return min(peaks)
+
+
+async def run(quick: bool = False) -> Results:
+    number = 100 if quick else 1_000
+    results: Results = {}
+    for name, payload in PAYLOADS.items():
+        for label, fields in FIELDS.items():
+            for impl, func in (
+                ("legacy", legacy_serialize),
+                ("current", current_serialize),
+            ):
+                value = allocated(lambda: func(payload, **fields), number)
+                results[f"alloc.serialize.{name}.{label}.{impl}"] = {
+                    "value": value,
+                    "unit": "bytes",
+                }
+            results[f"alloc.serialize.{name}.{label}.payload"] = {
+                "value": len(payload.encode("utf-8")),
+                "unit": "bytes",
+            }
+    for impl, ping in (("legacy", legacy_ping), ("current", current_ping)):
+        results[f"alloc.ping.{impl}"] = {
+            "value": allocated(ping, number),
+            "unit": "bytes",
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run()).items():
+        print(f"{name:<45}{result['value']:>12.1f} {result['unit']}")
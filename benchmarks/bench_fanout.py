@@ -0,0 +1,97 @@
+"""Fan-out of events to many streams over loopback aiohttp server.
+
+Compares Broadcaster with gathering ``send()`` of every stream::
+
+    $ python benchmarks/bench_fanout.py
+"""
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+
+from _common import Results, open_streams, serve
+from aiohttp import web
+
+from aiohttp_sse import Broadcaster, ServerSentEvent, sse_response
+
+PAYLOAD = json.dumps({"id": 42, "values": list(range(20))})
+
+
+async def measure(
+    count: int,
+    events: int,
+    publish: Callable[[Broadcaster, str], Awaitable[object]],
+) -> tuple[float, float]:
+    """Return publish time and delivery time per event, in seconds."""
+    broadcaster = Broadcaster()
+
+    async def subscribe(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, broadcaster=broadcaster) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", subscribe)
+
+    received = 0
+    done = asyncio.Event()
+    expected = count * events * len(ServerSentEvent(PAYLOAD).encode())
+
+    def on_data(chunk: bytes) -> None:
+        nonlocal received
+        received += len(chunk)
+        if received >= expected:
+            done.set()
+
+    async with serve(app) as server:
+        session, tasks = await open_streams(server, count, on_data)
+        while len(broadcaster) < count:
+            await asyncio.sleep(0.01)
+
+        publish_time = 0.0
+        start = time.perf_counter()
+        for _ in range(events):
+            publish_start = time.perf_counter()
+            await publish(broadcaster, PAYLOAD)
+            publish_time += time.perf_counter() - publish_start
+        await done.wait()
+        delivery_time = time.perf_counter() - start
+
+        for response in list(broadcaster._subscribers):
+            response.stop_streaming()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await session.close()
+
+    return publish_time / events, delivery_time / events
+
+
+async def broadcast(broadcaster: Broadcaster, data: str) -> None:
+    await broadcaster.publish(data)
+
+
+async def gather_send(broadcaster: Broadcaster, data: str) -> None:
+    # hand-rolled fan-out as in examples before Broadcaster existed
+    await asyncio.gather(*(r.send(data) for r in broadcaster._subscribers))
+
+
+async def run(quick: bool = False) -> Results:
+    count = 200 if quick else 2_000
+    events = 20 if quick else 100
+    results: Results = {}
+    for name, publish in (("broadcaster", broadcast), ("gather", gather_send)):
+        publish_time, delivery_time = await measure(count, events, publish)
+        results[f"fanout.{count}.{name}.publish"] = {
+            "value": publish_time * 1e3,
+            "unit": "ms",
+        }
+        results[f"fanout.{count}.{name}.delivery"] = {
+            "value": delivery_time * 1e3,
+            "unit": "ms",
+        }
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run()).items():
+        print(f"{name:<45}{result['value']:>12.3f} {result['unit']}")
@@ -0,0 +1,81 @@
+"""Memory footprint of idle EventSourceResponse connections.
+
+Measures bytes allocated per prepared response, including its ping task
+and the task's coroutine frame, with a per-connection ping task and with
+shared PingScheduler, and per response object alone, not prepared::
+
+    $ python benchmarks/bench_memory.py
+"""
+
+import asyncio
+import gc
+import tracemalloc
+from typing import Optional
+
+from _common import Results, make_request
+
+from aiohttp_sse import EventSourceResponse, PingScheduler
+
+
+async def measure(count: int, scheduler: Optional[PingScheduler] = None) -> float:
+    # requests are created beforehand, they belong to aiohttp
+    requests = [make_request() for _ in range(count)]
+    responses = []
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for request in requests:
+            response = EventSourceResponse(ping_scheduler=scheduler)
+            await response.prepare(request)
+            responses.append(response)
+        # let ping tasks start and suspend in sleep()
+        await asyncio.sleep(0)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    for response in responses:
+        response.stop_streaming()
+    await asyncio.gather(*(response.wait() for response in responses))
+    if scheduler is not None:
+        await scheduler.close()
+    return (after - before) / count
+
+
+def measure_response(count: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        responses = [EventSourceResponse() for _ in range(count)]
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del responses
+    return (after - before) / count
+
+
+async def run(quick: bool = False) -> Results:
+    count = 1_000 if quick else 10_000
+    return {
+        "memory.idle_connection.ping_task": {
+            "value": await measure(count),
+            "unit": "bytes",
+        },
+        "memory.idle_connection.ping_scheduler": {
+            "value": await measure(count, PingScheduler()),
+            "unit": "bytes",
+        },
+        "memory.response": {
+            "value": measure_response(count),
+            "unit": "bytes",
+        },
+    }
+
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run()).items():
+        print(f"{name:<45}{result['value']:>12.1f} {result['unit']}")
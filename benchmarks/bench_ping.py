@@ -0,0 +1,59 @@
+"""CPU overhead of keepalive pings at high connection counts.
+
+Runs many idle connections with a short ping interval and reports CPU
+time per ping, with a per-connection ping task and with PingScheduler::
+
+    $ python benchmarks/bench_ping.py
+"""
+
+import asyncio
+from typing import Optional
+
+from _common import Results, cpu_time, make_request
+
+from aiohttp_sse import EventSourceResponse, PingScheduler
+
+PING_INTERVAL = 0.1
+
+
+async def measure(
+    count: int,
+    rounds: int,
+    scheduler: Optional[PingScheduler] = None,
+) -> float:
+    """Return CPU time per single ping, in seconds."""
+    responses = []
+    for _ in range(count):
+        response = EventSourceResponse(ping_scheduler=scheduler)
+        response.ping_interval = PING_INTERVAL
+        await response.prepare(make_request())
+        responses.append(response)
+
+    elapsed = await cpu_time(asyncio.sleep(PING_INTERVAL * rounds))
+
+    for response in responses:
+        response.stop_streaming()
+    await asyncio.gather(*(response.wait() for response in responses))
+    if scheduler is not None:
+        await scheduler.close()
+    return elapsed / (count * rounds)
+
+
+async def run(quick: bool = False) -> Results:
+    count = 1_000 if quick else 10_000
+    rounds = 5 if quick else 20
+    return {
+        f"ping.{count}.ping_task": {
+            "value": await measure(count, rounds) * 1e6,
+            "unit": "us",
+        },
+        f"ping.{count}.ping_scheduler": {
+            "value": await measure(count, rounds, PingScheduler()) * 1e6,
+            "unit": "us",
+        },
+    }
+
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run()).items():
+        print(f"{name:<45}{result['value']:>12.3f} {result['unit']}")
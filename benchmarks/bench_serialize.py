@@ -0,0 +1,95 @@
+"""Micro-benchmarks of event serialization.
+
+Compares the serializer used by ``EventSourceResponse.send()`` with the
+previous ``io.StringIO`` based implementation::
+
+    $ python benchmarks/bench_serialize.py
+"""
+
+import asyncio
+import io
+import json
+import re
+from typing import Any, Optional
+
+from _common import Results, best_of
+
+from aiohttp_sse.event import _serialize, _serialize_data
+
+LINE_SEP_EXPR = re.compile(r"\r\n|\r|\n")
+SEP = "\r\n"
+LINE_SEP = SEP.encode("utf-8")
+
+PAYLOADS = {
+    "short": "foo",
+    "compact-json": json.dumps({"id": 42, "values": list(range(50))}),
+    "multiline-json": json.dumps({"id": 42, "values": list(range(50))}, indent=2),
+}
+FIELDS: dict[str, dict[str, Any]] = {
+    "data": {},
+    "fields": {"id": "42", "event": "update"},
+}
+
+
+def legacy_serialize(
+    data: str,
+    id: Optional[str] = None,
+    event: Optional[str] = None,
+    retry: Optional[int] = None,
+) -> bytes:
+    buffer = io.StringIO()
+    if id is not None:
+        buffer.write(LINE_SEP_EXPR.sub("", f"id: {id}"))
+        buffer.write(SEP)
+
+    if event is not None:
+        buffer.write(LINE_SEP_EXPR.sub("", f"event: {event}"))
+        buffer.write(SEP)
+
+    for chunk in LINE_SEP_EXPR.split(data):
+        buffer.write(f"data: {chunk}")
+        buffer.write(SEP)
+
+    if retry is not None:
+        buffer.write(f"retry: {retry}")
+        buffer.write(SEP)
+
+    buffer.write(SEP)
+    return buffer.getvalue().encode("utf-8")
+
+
+def current_serialize(
+    data: str,
+    id: Optional[str] = None,
+    event: Optional[str] = None,
+    retry: Optional[int] = None,
+) -> bytes:
+    # mirrors dispatch in EventSourceResponse.send()
+    if id is None and event is None and retry is None:
+        return _serialize_data(data, LINE_SEP)
+    return _serialize(data, id, event, retry, None, LINE_SEP)
+
+
+async def run(quick: bool = False) -> Results:
+    number = 10_000 if quick else 100_000
+    results: Results = {}
+    for name, payload in PAYLOADS.items():
+        for label, fields in FIELDS.items():
+            assert legacy_serialize(payload, **fields) == current_serialize(
+                payload, **fields
+            )
+            for impl, func in (
+                ("legacy", legacy_serialize),
+                ("current", current_serialize),
+            ):
+                timing = best_of(lambda: func(payload, **fields), number)
+                results[f"serialize.{name}.{label}.{impl}"] = {
+                    "value": timing * 1e6,
+                    "unit": "us",
+                }
+    return results
+
+
+if __name__ == "__main__":
+    for name, result in asyncio.run(run()).items():
+        print(f"{name:<45}{result['value']:>12.3f} {result['unit']}")
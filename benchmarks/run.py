@@ -0,0 +1,112 @@
+"""Run the benchmark suite and save or compare results.
+
+Benchmarks cover event serialization, memory allocated per frame, memory
+per idle connection, fan-out over a loopback server and keepalive ping
+overhead. Every result is a
+cost, lower is better::
+
+    $ python benchmarks/run.py --output before.json
+    $ python benchmarks/run.py --output after.json --compare before.json
+
+Use ``--quick`` for a fast smoke run and ``-k`` to select suites by name
+substring, e.g. ``-k ser fan`` runs serialize and fanout suites.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from typing import Any
+
+import aiohttp
+import bench_alloc
+import bench_fanout
+import bench_memory
+import bench_ping
+import bench_serialize
+from _common import Results
+
+import aiohttp_sse
+
+SUITES = {
+    "serialize": bench_serialize.run,
+    "alloc": bench_alloc.run,
+    "memory": bench_memory.run,
+    "fanout": bench_fanout.run,
+    "ping": bench_ping.run,
+}
+
+
+async def run_suites(names: list[str], quick: bool) -> Results:
+    results: Results = {}
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        results.update(await SUITES[name](quick))
+    return results
+
+
+def compare(results: Results, baseline: Results) -> None:
+    print(f"{'benchmark':<50}{'baseline':>12}{'current':>12}{'change':>9}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["value"]
+        after = result["value"]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{name:<50}{before:>12.3f}{after:>12.3f}{change:>+8.1f}%")
+
+
+def select_suites(keywords: list[str]) -> list[str]:
+    """Names of suites containing any of the keywords, all without keywords."""
+    if not keywords:
+        return list(SUITES)
+    return [name for name in SUITES if any(k in name for k in keywords)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k",
+        dest="keywords",
+        nargs="*",
+        default=[],
+        help=f"run suites with names containing any keyword: {', '.join(SUITES)}",
+    )
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--output", help="save results to JSON file")
+    parser.add_argument("--compare", help="compare with results from JSON file")
+    args = parser.parse_args()
+
+    suites = select_suites(args.keywords)
+    if not suites:
+        parser.error(f"no suites match {' '.join(args.keywords)}")
+    results = asyncio.run(run_suites(suites, args.quick))
+    for name, result in results.items():
+        print(f"{name:<50}{result['value']:>12.3f} {result['unit']}")
+
+    if args.output:
+        report: dict[str, Any] = {
+            "meta": {
+                "date": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "aiohttp": aiohttp.__version__,
+                "aiohttp_sse": aiohttp_sse.__version__,
+                "quick": args.quick,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        print()
+        compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
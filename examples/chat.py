@@ -1,11 +1,10 @@
-import asyncio
 import json
 
 from aiohttp import web
 
-from aiohttp_sse import EventSourceResponse, sse_response
+from aiohttp_sse import Broadcaster, EventSourceResponse, sse_response
 
-channels = web.AppKey("channels", set[asyncio.Queue[str]])
+channels = web.AppKey("channels", Broadcaster)
 
 
 async def chat(_request: web.Request) -> web.Response:
@@ -85,32 +84,21 @@ async def message(request: web.Request) -> web.Response:
     app = request.app
     data = await request.post()
 
-    for queue in app[channels]:
-        payload = json.dumps(dict(data))
-        await queue.put(payload)
+    await app[channels].publish(json.dumps(dict(data)))
     return web.Response()
 
 
 async def subscribe(request: web.Request) -> EventSourceResponse:
-    async with sse_response(request) as response:
-        app = request.app
-        queue: asyncio.Queue[str] = asyncio.Queue()
+    async with sse_response(request, broadcaster=request.app[channels]) as response:
         print("Someone joined.")
-        app[channels].add(queue)
-        try:
-            while response.is_connected():
-                payload = await queue.get()
-                await response.send(payload)
-                queue.task_done()
-        finally:
-            app[channels].remove(queue)
-            print("Someone left.")
+        await response.wait()
+        print("Someone left.")
     return response
 
 
 if __name__ == "__main__":
     app = web.Application()
-    app[channels] = set()
+    app[channels] = Broadcaster()
 
     app.router.add_route("GET", "/", chat)
     app.router.add_route("POST", "/everyone", message)
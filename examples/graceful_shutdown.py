@@ -10,7 +10,12 @@ from typing import Any, Optional
 
 from aiohttp import web
 
-from aiohttp_sse import EventSourceResponse, sse_response
+from aiohttp_sse import (
+    BufferPolicy,
+    EventSourceResponse,
+    ShutdownManager,
+    sse_response,
+)
 
 streams_key = web.AppKey("streams_key", weakref.WeakSet["SSEResponse"])
 worker_key = web.AppKey("worker_key", asyncio.Task[None])
@@ -71,18 +76,13 @@ async def clean_up(app: web.Application) -> None:
         await app[worker_key]
 
 
-async def on_shutdown(app: web.Application) -> None:
-    waiters = []
-    for stream in app[streams_key]:
-        stream.stop_streaming()
-        waiters.append(stream.wait())
-
-    await asyncio.gather(*waiters, return_exceptions=True)
-    app[streams_key].clear()
-
-
 async def hello(request: web.Request) -> web.StreamResponse:
-    stream: SSEResponse = await sse_response(request, response_cls=SSEResponse)
+    # buffered stream, so slow clients don't hold up the worker
+    stream: SSEResponse = await sse_response(
+        request,
+        response_cls=SSEResponse,
+        buffer_policy=BufferPolicy(max_events=100),
+    )
     request.app[streams_key].add(stream)
     try:
         await stream.wait()
@@ -114,8 +114,10 @@ async def index(_request: web.Request) -> web.StreamResponse:
 if __name__ == "__main__":
     app = web.Application()
 
+    # on shutdown clients are asked to reconnect within 1-6 seconds,
+    # so they don't all hit the remaining workers at once
+    ShutdownManager(retry=1000, jitter=5000).setup(app)
     app.on_startup.append(on_startup)
-    app.on_shutdown.append(on_shutdown)
     app.on_cleanup.append(clean_up)
 
     app.router.add_route("GET", "/hello", hello)
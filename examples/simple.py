@@ -1,4 +1,5 @@
 import asyncio
+from collections.abc import AsyncIterator
 from datetime import datetime
 
 from aiohttp import web
@@ -6,13 +7,17 @@ from aiohttp import web
 from aiohttp_sse import sse_response
 
 
+async def server_time() -> AsyncIterator[str]:
+    while True:
+        data = f"Server Time : {datetime.now()}"
+        print(data)
+        yield data
+        await asyncio.sleep(1)
+
+
 async def hello(request: web.Request) -> web.StreamResponse:
     async with sse_response(request) as resp:
-        while resp.is_connected():
-            data = f"Server Time : {datetime.now()}"
-            print(data)
-            await resp.send(data)
-            await asyncio.sleep(1)
+        await resp.stream(server_time())
     return resp
 
 
@@ -1,5 +1,7 @@
+import asyncio
+import inspect
 from asyncio import AbstractEventLoop, get_running_loop
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Callable
 from typing import cast
 
 import pytest
@@ -19,3 +21,22 @@ async def loop(debug: bool) -> AsyncIterator[AbstractEventLoop]:
     event_loop = get_running_loop()
     event_loop.set_debug(debug)
     yield event_loop
+
+
+async def wait_until(condition: Callable[[], object], timeout: float = 5) -> None:
+    """Poll condition, sync or async, until it is true.
+
+    Fails with TimeoutError instead of hanging, e.g. when a stream is
+    never connected.
+    """
+
+    async def poll() -> None:
+        while True:
+            result = condition()
+            if inspect.isawaitable(result):
+                result = await result
+            if result:
+                return
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
@@ -0,0 +1,204 @@
+import asyncio
+import re
+from typing import Optional
+
+import pytest
+from aiohttp import web
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+from conftest import wait_until
+
+from aiohttp_sse import AdmissionController, EventSourceResponse, sse_response
+
+
+class SlowResponse(EventSourceResponse):
+    async def prepare(self, request: web.BaseRequest) -> Optional[AbstractStreamWriter]:
+        await asyncio.sleep(0.1)
+        return await super().prepare(request)
+
+
+async def admit(
+    admission: AdmissionController, response: Optional[EventSourceResponse] = None
+) -> EventSourceResponse:
+    request = make_mocked_request("GET", "/")
+    if response is None:
+        response = EventSourceResponse()
+    await admission._prepare(response, request)
+    return response
+
+
+async def test_reject(aiohttp_client: AiohttpClient) -> None:
+    admission = AdmissionController(max_connections=1, retry=2000, jitter=500)
+    streams = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, admission=admission) as sse:
+            streams.append(sse)
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: streams)
+
+    resp = await client.get("/")
+    assert resp.status == 503
+    assert resp.content_type == "text/event-stream"
+    assert resp.headers["Retry-After"] in ("2", "3")
+    match = re.fullmatch(r"retry: (\d+)\r\n\r\n", await resp.text())
+    assert match is not None
+    assert 2000 <= int(match.group(1)) <= 2500
+    assert admission.rejected == 1
+
+    streams[0].stop_streaming()
+    resp = await task
+    assert resp.status == 200
+
+
+async def test_max_connections() -> None:
+    admission = AdmissionController(max_connections=2)
+    first = await admit(admission)
+    await admit(admission)
+    assert admission.connections == 2
+
+    with pytest.raises(web.HTTPServiceUnavailable):
+        await admit(admission)
+    assert admission.connections == 2
+
+    first.stop_streaming()
+    await first.wait()
+    assert admission.connections == 1
+    await admit(admission)
+    assert admission.connections == 2
+    assert admission.rejected == 1
+
+
+async def test_rate() -> None:
+    admission = AdmissionController(rate=10, burst=2)
+    await admit(admission)
+    await admit(admission)
+
+    with pytest.raises(web.HTTPServiceUnavailable):
+        await admit(admission)
+    assert admission.connections == 2
+
+    await asyncio.sleep(0.1)
+    await admit(admission)
+
+
+async def test_rate_queue() -> None:
+    admission = AdmissionController(rate=20, burst=1, queue_timeout=0.12)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    results = await asyncio.gather(
+        *(admit(admission) for _ in range(4)), return_exceptions=True
+    )
+
+    # one from burst and two queued for 0.05 and 0.1 seconds
+    assert [isinstance(r, EventSourceResponse) for r in results] == [
+        True,
+        True,
+        True,
+        False,
+    ]
+    assert isinstance(results[3], web.HTTPServiceUnavailable)
+    assert 0.09 <= loop.time() - started < 0.2
+
+
+async def test_max_prepares() -> None:
+    admission = AdmissionController(max_prepares=1)
+
+    results = await asyncio.gather(
+        admit(admission, SlowResponse()),
+        admit(admission, SlowResponse()),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], EventSourceResponse)
+    assert isinstance(results[1], web.HTTPServiceUnavailable)
+    assert admission.connections == 1
+    assert admission._preparing == 0
+
+
+async def test_max_prepares_queue() -> None:
+    admission = AdmissionController(max_prepares=1, queue_timeout=1)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+
+    results = await asyncio.gather(
+        *(admit(admission, SlowResponse()) for _ in range(3))
+    )
+
+    assert all(r.is_connected() for r in results)
+    # prepared one by one
+    assert loop.time() - started >= 0.3
+    assert admission.connections == 3
+    assert admission._preparing == 0
+    assert not admission._waiters
+
+
+async def test_max_prepares_timeout() -> None:
+    admission = AdmissionController(max_prepares=1, queue_timeout=0.05)
+
+    results = await asyncio.gather(
+        admit(admission, SlowResponse()),
+        admit(admission, SlowResponse()),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], EventSourceResponse)
+    assert isinstance(results[1], web.HTTPServiceUnavailable)
+    assert not admission._waiters
+    assert admission._preparing == 0
+
+
+async def test_cancelled_waiter() -> None:
+    admission = AdmissionController(max_prepares=1, queue_timeout=1)
+
+    first = asyncio.create_task(admit(admission, SlowResponse()))
+    second = asyncio.create_task(admit(admission, SlowResponse()))
+    await asyncio.sleep(0.01)
+    second.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await second
+
+    await first
+    assert admission.connections == 1
+    assert admission._preparing == 0
+    assert not admission._waiters
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    (
+        ({"rate": 0}, "rate must be greater then 0"),
+        ({"burst": 0}, "burst must be greater then 0"),
+        ({"max_prepares": 0}, "max_prepares must be greater then 0"),
+        ({"max_connections": 0}, "max_connections must be greater then 0"),
+        ({"queue_timeout": -1}, "queue_timeout must not be negative"),
+        ({"retry": -1}, "retry must not be negative"),
+        ({"jitter": -1}, "jitter must not be negative"),
+    ),
+)
+def test_invalid(kwargs: dict[str, float], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        AdmissionController(**kwargs)  # type: ignore[arg-type]
+
+
+def test_default_burst() -> None:
+    assert AdmissionController(rate=0.5).burst == 1
+    assert AdmissionController(rate=10).burst == 10
+    assert AdmissionController().burst is None
+
+
+def test_repr() -> None:
+    admission = AdmissionController(rate=10, max_connections=100)
+    assert repr(admission) == (
+        "<AdmissionController rate=10 burst=10 max_prepares=None "
+        "max_connections=100 queue_timeout=0>"
+    )
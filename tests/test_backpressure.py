@@ -0,0 +1,95 @@
+import asyncio
+from unittest import mock
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+from conftest import wait_until
+
+from aiohttp_sse import EventSourceResponse, SlowConsumerPolicy, sse_response
+from aiohttp_sse.backpressure import SlowReason
+
+
+class Hook:
+    def __init__(self) -> None:
+        self.calls: list[tuple[EventSourceResponse, SlowReason]] = []
+
+    def __call__(self, response: EventSourceResponse, reason: SlowReason) -> None:
+        self.calls.append((response, reason))
+
+
+def test_policy() -> None:
+    policy = SlowConsumerPolicy()
+    assert policy.max_buffer_size is None
+    assert policy.max_drain_time is None
+    assert not policy.disconnect
+    assert policy.on_slow is None
+    assert repr(policy) == (
+        "<SlowConsumerPolicy max_buffer_size=None max_drain_time=None "
+        "disconnect=False>"
+    )
+
+
+def test_wrong_policy() -> None:
+    with pytest.raises(ValueError, match="max_buffer_size must be greater then 0"):
+        SlowConsumerPolicy(max_buffer_size=0)
+    with pytest.raises(ValueError, match="max_drain_time must be greater then 0"):
+        SlowConsumerPolicy(max_drain_time=0)
+
+
+def test_write_buffer_size() -> None:
+    response = EventSourceResponse()
+    assert response.write_buffer_size == 0
+
+
+@pytest.mark.parametrize("disconnect", (False, True))
+async def test_buffer_size(disconnect: bool) -> None:
+    hook = Hook()
+    transport = mock.Mock()
+    transport.get_write_buffer_size.return_value = 10
+    policy = SlowConsumerPolicy(max_buffer_size=10, disconnect=disconnect, on_slow=hook)
+    response = EventSourceResponse(slow_consumer=policy)
+    await response.prepare(make_mocked_request("GET", "/", transport=transport))
+    assert response.write_buffer_size == 10
+
+    await response.send("foo")
+    assert hook.calls == []
+
+    transport.get_write_buffer_size.return_value = 11
+    await response.send("foo")
+    assert hook.calls == [(response, "buffer_size")]
+    assert transport.abort.called is disconnect
+    await asyncio.sleep(0)
+    assert response.is_connected() is not disconnect
+
+    response.stop_streaming()
+    await response.wait()
+
+
+async def test_drain_time(aiohttp_client: AiohttpClient) -> None:
+    hook = Hook()
+    policy = SlowConsumerPolicy(max_drain_time=0.05, disconnect=True, on_slow=hook)
+    payload = "x" * 1024 * 1024
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, slow_consumer=policy) as sse:
+            # client does not read, so writes block once buffers are full
+            with pytest.raises(ConnectionResetError):
+                while True:
+                    await sse.send(payload)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+    await wait_until(lambda: hook.calls)
+
+    [(response, reason)] = hook.calls
+    assert reason == "drain_time"
+    await response.wait()
+    assert not response.is_connected()
+    resp.close()
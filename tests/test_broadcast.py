@@ -0,0 +1,235 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from conftest import wait_until
+
+from aiohttp_sse import (
+    Broadcaster,
+    BufferPolicy,
+    EventSourceResponse,
+    ServerSentEvent,
+    sse_response,
+)
+
+
+def make_app(broadcaster: Broadcaster, sep: str = "\r\n") -> web.Application:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, sep=sep, broadcaster=broadcaster) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    return app
+
+
+async def stop_all(broadcaster: Broadcaster) -> None:
+    for response in list(broadcaster._subscribers):
+        response.stop_streaming()
+        await response.wait()
+
+
+@pytest.mark.parametrize("concurrency", (1, 2, 100))
+async def test_publish(aiohttp_client: AiohttpClient, concurrency: int) -> None:
+    broadcaster = Broadcaster(concurrency=concurrency)
+    client = await aiohttp_client(make_app(broadcaster))
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(3)]
+    await wait_until(lambda: len(broadcaster) >= 3)
+
+    assert await broadcaster.publish("foo", event="bar") == 3
+    assert await broadcaster.publish_event(ServerSentEvent("baz", id="1")) == 3
+    await stop_all(broadcaster)
+
+    for task in tasks:
+        resp = await task
+        assert resp.status == 200
+        streamed_data = await resp.text()
+        assert streamed_data == (
+            "event: bar\r\ndata: foo\r\n\r\n" "id: 1\r\ndata: baz\r\n\r\n"
+        )
+
+    assert len(broadcaster) == 0
+
+
+async def test_conflation_key(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster()
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(conflate=True, flush_delay=0.1)
+        async with sse_response(
+            request, broadcaster=broadcaster, buffer_policy=policy
+        ) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(broadcaster) >= 1)
+
+    await broadcaster.publish("1", event="price", key="AAPL")
+    await broadcaster.publish_event(ServerSentEvent("2", event="price", key="MSFT"))
+    await broadcaster.publish("3", event="price", key="AAPL")
+    await broadcaster.publish("4", event="price")
+    await broadcaster.publish("5", event="price")
+    response = next(iter(broadcaster._subscribers))
+    assert response._buffer is not None
+    await response._buffer.join()
+    await stop_all(broadcaster)
+
+    resp = await task
+    # latest value per symbol, the rest is conflated by event type
+    assert await resp.text() == (
+        "event: price\r\ndata: 3\r\n\r\n"
+        "event: price\r\ndata: 2\r\n\r\n"
+        "event: price\r\ndata: 5\r\n\r\n"
+    )
+
+
+async def test_mixed_separators(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster()
+    client_crlf = await aiohttp_client(make_app(broadcaster))
+    client_lf = await aiohttp_client(make_app(broadcaster, sep="\n"))
+
+    task_crlf = asyncio.create_task(client_crlf.get("/"))
+    task_lf = asyncio.create_task(client_lf.get("/"))
+    await wait_until(lambda: len(broadcaster) >= 2)
+
+    assert await broadcaster.publish("foo") == 2
+    await stop_all(broadcaster)
+
+    assert await (await task_crlf).text() == "data: foo\r\n\r\n"
+    assert await (await task_lf).text() == "data: foo\n\n"
+
+
+async def test_unsubscribe_on_stop(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster()
+    client = await aiohttp_client(make_app(broadcaster))
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(broadcaster) >= 1)
+    (response,) = broadcaster._subscribers
+    assert response in broadcaster
+
+    response.stop_streaming()
+    await response.wait()
+    assert response not in broadcaster
+    assert await broadcaster.publish("foo") == 0
+    await task
+
+
+async def test_failed_stream_removed(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    broadcaster = Broadcaster()
+    client = await aiohttp_client(make_app(broadcaster))
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(2)]
+    await wait_until(lambda: len(broadcaster) >= 2)
+    broken, alive = broadcaster._subscribers
+
+    async def reset_error_write(data: bytes) -> None:
+        raise ConnectionResetError("Cannot write to closing transport")
+
+    monkeypatch.setattr(broken, "write", reset_error_write)
+    assert await broadcaster.publish("foo") == 1
+    assert broken not in broadcaster
+    assert alive in broadcaster
+
+    await stop_all(broadcaster)
+    for task in tasks:
+        await task
+
+
+async def test_stuck_stream_closed(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    broadcaster = Broadcaster(concurrency=2, send_timeout=0.1)
+    client = await aiohttp_client(make_app(broadcaster))
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(5)]
+    await wait_until(lambda: len(broadcaster) >= 5)
+    stuck = list(broadcaster._subscribers)[:2]
+
+    async def blocked_write(data: bytes) -> None:
+        await asyncio.Event().wait()
+
+    for response in stuck:
+        monkeypatch.setattr(response, "write", blocked_write)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    assert await broadcaster.publish("foo") == 3
+    assert loop.time() - started < 0.5
+    assert len(broadcaster) == 3
+    for response in stuck:
+        await response.wait()
+        assert not response.is_connected()
+
+    await stop_all(broadcaster)
+    texts = [await (await task).text() for task in tasks]
+    assert sorted(texts) == [
+        "",
+        "",
+        "data: foo\r\n\r\n",
+        "data: foo\r\n\r\n",
+        "data: foo\r\n\r\n",
+    ]
+
+
+async def test_closed_stream_skipped(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster()
+    client = await aiohttp_client(make_app(broadcaster))
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(broadcaster) >= 1)
+    (response,) = broadcaster._subscribers
+    # bypass done callback to emulate stale subscriber
+    broadcaster._subscribers[EventSourceResponse()] = None
+
+    assert await broadcaster.publish("foo") == 1
+    assert len(broadcaster) == 1
+
+    await stop_all(broadcaster)
+    await task
+
+
+async def test_subscribe_twice(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster()
+    client = await aiohttp_client(make_app(broadcaster))
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(broadcaster) >= 1)
+    (response,) = broadcaster._subscribers
+    broadcaster.subscribe(response)
+    assert len(broadcaster) == 1
+
+    broadcaster.unsubscribe(response)
+    broadcaster.unsubscribe(response)
+    assert len(broadcaster) == 0
+
+    response.stop_streaming()
+    await task
+
+
+def test_subscribe_not_prepared() -> None:
+    broadcaster = Broadcaster()
+    with pytest.raises(RuntimeError, match="Response is not started"):
+        broadcaster.subscribe(EventSourceResponse())
+
+
+def test_wrong_concurrency() -> None:
+    with pytest.raises(ValueError, match="concurrency must be greater then 0"):
+        Broadcaster(concurrency=0)
+
+
+def test_wrong_send_timeout() -> None:
+    with pytest.raises(ValueError, match="send_timeout must be greater then 0"):
+        Broadcaster(send_timeout=0)
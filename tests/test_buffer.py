@@ -0,0 +1,421 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+
+from aiohttp_sse import BufferPolicy, EventSourceResponse, sse_response
+from aiohttp_sse.buffer import OverflowPolicy, _SendBuffer
+
+
+def make_buffer(
+    overflow: OverflowPolicy,
+    max_events: Optional[int] = 2,
+    max_bytes: Optional[int] = None,
+) -> _SendBuffer:
+    policy = BufferPolicy(max_events=max_events, max_bytes=max_bytes, overflow=overflow)
+    return _SendBuffer(policy)
+
+
+def frames(buffer: _SendBuffer) -> list[bytes]:
+    return [entry.frame for entry in buffer._frames]
+
+
+class TestBufferPolicy:
+    def test_defaults(self) -> None:
+        policy = BufferPolicy()
+        assert policy.max_events is None
+        assert policy.max_bytes is None
+        assert policy.overflow == "drop_oldest"
+        assert policy.flush_delay == 0
+        assert policy.flush_size == BufferPolicy.DEFAULT_FLUSH_SIZE
+        assert policy.drain_timeout == BufferPolicy.DEFAULT_DRAIN_TIMEOUT
+        assert repr(policy) == (
+            "<BufferPolicy max_events=None max_bytes=None overflow=drop_oldest "
+            "flush_delay=0 flush_size=65536 conflate=False drain_timeout=5.0>"
+        )
+
+    @pytest.mark.parametrize("name", ("max_events", "max_bytes", "flush_size"))
+    def test_wrong_limit(self, name: str) -> None:
+        with pytest.raises(ValueError, match=f"{name} must be greater then 0"):
+            BufferPolicy(**{name: 0})  # type: ignore[arg-type]
+
+    @pytest.mark.parametrize("name", ("flush_delay", "drain_timeout"))
+    def test_negative_delay(self, name: str) -> None:
+        with pytest.raises(ValueError, match=f"{name} must not be negative"):
+            BufferPolicy(**{name: -1})  # type: ignore[arg-type]
+
+    def test_wrong_overflow(self) -> None:
+        with pytest.raises(ValueError, match="overflow must be one of"):
+            BufferPolicy(overflow="foo")  # type: ignore[arg-type]
+
+
+class TestSendBuffer:
+    def test_drop_oldest(self) -> None:
+        buffer = make_buffer("drop_oldest")
+        assert buffer.put(b"a", None)
+        assert buffer.put(b"b", None)
+        assert buffer.put(b"c", None)
+        assert frames(buffer) == [b"b", b"c"]
+        assert buffer.size == 2
+
+    def test_drop_newest(self) -> None:
+        buffer = make_buffer("drop_newest")
+        assert buffer.put(b"a", None)
+        assert buffer.put(b"b", None)
+        assert not buffer.put(b"c", None)
+        assert frames(buffer) == [b"a", b"b"]
+
+    def test_disconnect(self) -> None:
+        buffer = make_buffer("disconnect")
+        assert buffer.put(b"a", None)
+        assert buffer.put(b"b", None)
+        assert not buffer.put(b"c", None)
+        assert len(buffer) == 2
+
+    def test_coalesce(self) -> None:
+        buffer = make_buffer("coalesce")
+        assert buffer.put(b"a1", "a")
+        assert buffer.put(b"b1", "b")
+        assert buffer.put(b"a2", "a")
+        assert frames(buffer) == [b"b1", b"a2"]
+        # no queued event with the same type
+        assert buffer.put(b"c1", "c")
+        assert frames(buffer) == [b"a2", b"c1"]
+
+    async def test_conflate(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(max_events=2, conflate=True))
+        assert buffer.put(b"a1", "a")
+        assert buffer.put(b"b1", "b")
+        assert buffer.put(b"a22", "a")
+        # replaced in place, queue is bounded by number of keys
+        assert frames(buffer) == [b"a22", b"b1"]
+        assert buffer.size == 5
+
+        assert await buffer.get() == [b"a22", b"b1"]
+        buffer.task_done(2)
+        # sent event is never replaced
+        assert buffer.put(b"a3", "a")
+        assert buffer.put(b"a4", "a")
+        assert frames(buffer) == [b"a4"]
+        assert buffer._unfinished == 1
+
+    @pytest.mark.parametrize(
+        "overflow, result, expected",
+        (
+            ("drop_oldest", True, [b"a222"]),
+            ("coalesce", True, [b"a222"]),
+            ("drop_newest", False, [b"a1", b"b1"]),
+            ("disconnect", False, [b"a1", b"b1"]),
+        ),
+    )
+    def test_conflate_max_bytes(
+        self, overflow: OverflowPolicy, result: bool, expected: list[bytes]
+    ) -> None:
+        policy = BufferPolicy(max_bytes=5, overflow=overflow, conflate=True)
+        buffer = _SendBuffer(policy)
+        assert buffer.put(b"a1", "a")
+        assert buffer.put(b"b1", "b")
+        # replacement growing the buffer past the limit is an overflow
+        assert buffer.put(b"a222", "a") is result
+        assert frames(buffer) == expected
+        assert buffer.size <= 5
+        assert buffer.size == sum(map(len, expected))
+        assert buffer._unfinished == len(expected)
+
+    def test_conflate_without_key(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(max_events=2, conflate=True))
+        assert buffer.put(b"a1", "a")
+        assert buffer.put(b"x", None)
+        assert buffer.put(b"y", None)
+        assert frames(buffer) == [b"x", b"y"]
+        # dropped event is forgotten
+        assert buffer.put(b"a2", "a")
+        assert frames(buffer) == [b"y", b"a2"]
+        assert buffer._latest == {"a": buffer._frames[1]}
+
+    def test_max_bytes(self) -> None:
+        buffer = make_buffer("drop_oldest", max_events=None, max_bytes=5)
+        assert buffer.put(b"aa", None)
+        assert buffer.put(b"bb", None)
+        assert buffer.put(b"ccc", None)
+        assert frames(buffer) == [b"bb", b"ccc"]
+        assert buffer.size == 5
+
+    @pytest.mark.parametrize(
+        "overflow", ("drop_oldest", "drop_newest", "coalesce", "disconnect")
+    )
+    def test_oversized(self, overflow: OverflowPolicy) -> None:
+        buffer = make_buffer(overflow, max_events=None, max_bytes=5)
+        assert buffer.put(b"aa", "a")
+        assert buffer.put(b"bb", "b")
+        # frame larger than the limit could never be queued,
+        # queued events are kept
+        assert not buffer.put(b"dddddd", "a")
+        assert frames(buffer) == [b"aa", b"bb"]
+        assert buffer.size == 4
+
+    async def test_get_join(self) -> None:
+        buffer = make_buffer("drop_oldest")
+        getter = asyncio.create_task(buffer.get())
+        await asyncio.sleep(0)
+        assert buffer.put(b"a", None)
+        assert await getter == [b"a"]
+        assert buffer.size == 0
+
+        joiner = asyncio.create_task(buffer.join())
+        await asyncio.sleep(0)
+        assert not joiner.done()
+        buffer.task_done()
+        await joiner
+
+        await buffer.join()
+
+    async def test_get_batch(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(flush_size=4))
+        for frame in (b"aa", b"bb", b"c", b"d"):
+            assert buffer.put(frame, None)
+
+        assert await buffer.get() == [b"aa", b"bb"]
+        assert await buffer.get() == [b"c", b"d"]
+        assert buffer.size == 0
+
+    async def test_get_oversized(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(flush_size=2))
+        assert buffer.put(b"aaa", None)
+        assert buffer.put(b"b", None)
+        assert await buffer.get() == [b"aaa"]
+        assert await buffer.get() == [b"b"]
+
+    async def test_get_delay(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(flush_delay=0.1, flush_size=4))
+        assert buffer.put(b"a", None)
+        getter = asyncio.create_task(buffer.get())
+        await asyncio.sleep(0.01)
+        assert not getter.done()
+
+        assert buffer.put(b"b", None)
+        await asyncio.sleep(0)
+        assert not getter.done()
+        assert await getter == [b"a", b"b"]
+
+    async def test_get_delay_filled(self) -> None:
+        buffer = _SendBuffer(BufferPolicy(flush_delay=999, flush_size=2))
+        assert buffer.put(b"a", None)
+        getter = asyncio.create_task(buffer.get())
+        await asyncio.sleep(0)
+        assert buffer.put(b"b", None)
+        assert buffer.put(b"c", None)
+        assert await getter == [b"a", b"b"]
+
+    async def test_clear(self) -> None:
+        buffer = make_buffer("drop_oldest")
+        assert buffer.put(b"a", None)
+        joiner = asyncio.create_task(buffer.join())
+        await asyncio.sleep(0)
+        buffer.clear()
+        await joiner
+        assert len(buffer) == 0
+
+
+async def test_send_buffered(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(max_events=10)
+        async with sse_response(request, buffer_policy=policy) as sse:
+            await sse.send("foo")
+            assert sse.send_nowait("bar", event="baz")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    streamed_data = await resp.text()
+    assert streamed_data == "data: foo\r\n\r\nevent: baz\r\ndata: bar\r\n\r\n"
+
+
+async def test_send_conflated(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(conflate=True)
+        async with sse_response(request, buffer_policy=policy) as sse:
+            for i in range(3):
+                await sse.send(str(i), event="price", key="foo")
+                assert sse.send_nowait(str(i), event="price", key="bar")
+            await sse.send("baz", event="price")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    streamed_data = await resp.text()
+    assert streamed_data == (
+        "event: price\r\ndata: 2\r\n\r\n"
+        "event: price\r\ndata: 2\r\n\r\n"
+        "event: price\r\ndata: baz\r\n\r\n"
+    )
+
+
+async def test_coalesced_writes(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    writes = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(flush_delay=0.05)
+        async with sse_response(request, buffer_policy=policy) as sse:
+            original_write = sse.write
+
+            async def write(data: bytes) -> None:
+                writes.append(data)
+                await original_write(data)
+
+            monkeypatch.setattr(sse, "write", write)
+            for i in range(3):
+                await sse.send(str(i))
+                await asyncio.sleep(0.01)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    expected = "data: 0\r\n\r\ndata: 1\r\n\r\ndata: 2\r\n\r\n"
+    assert await resp.text() == expected
+    assert writes == [expected.encode()]
+
+
+async def test_slow_consumer_disconnected(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(max_events=1, overflow="disconnect")
+        async with sse_response(request, buffer_policy=policy) as sse:
+            assert sse.send_nowait("foo")
+            assert not sse.send_nowait("bar")
+            await sse.wait()
+            assert not sse.is_connected()
+            assert not sse.send_nowait("baz")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+    assert "bar" not in await resp.text()
+
+
+async def test_write_failure(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        sse = EventSourceResponse(buffer_policy=BufferPolicy())
+        await sse.prepare(request)
+
+        async def reset_error_write(data: bytes) -> None:
+            raise ConnectionResetError("Cannot write to closing transport")
+
+        monkeypatch.setattr(sse, "write", reset_error_write)
+        await sse.send("foo")
+        await sse.wait()
+        assert sse._flush_task is not None
+        await asyncio.sleep(0)
+        assert sse._flush_task.done()
+        assert sse._buffer is not None
+        assert len(sse._buffer) == 0
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+
+async def test_write_after_eof(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    streams = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        sse = EventSourceResponse(buffer_policy=BufferPolicy())
+        await sse.prepare(request)
+        streams.append(sse)
+
+        async def eof_error_write(data: bytes) -> None:
+            raise RuntimeError("Cannot call write() after write_eof()")
+
+        monkeypatch.setattr(sse, "write", eof_error_write)
+        await sse.send("foo")
+        await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await asyncio.wait_for(client.get("/"), 5)
+    assert resp.status == 200
+
+    (sse,) = streams
+    assert not sse.is_connected()
+    assert sse._flush_task is not None
+    await asyncio.sleep(0)
+    assert sse._flush_task.done()
+    assert sse._flush_task.exception() is None
+
+
+async def test_send_nowait_errors() -> None:
+    with pytest.raises(RuntimeError, match="requires buffer_policy"):
+        EventSourceResponse().send_nowait("foo")
+
+    with pytest.raises(RuntimeError, match="Response is not started"):
+        EventSourceResponse(buffer_policy=BufferPolicy()).send_nowait("foo")
+
+
+@pytest.mark.parametrize("drain_timeout", (0, 0.1))
+async def test_drain_timeout(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+    drain_timeout: float,
+) -> None:
+    responses = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        policy = BufferPolicy(drain_timeout=drain_timeout)
+        async with sse_response(request, buffer_policy=policy) as sse:
+            responses.append(sse)
+
+            async def blocked_write(data: bytes) -> None:
+                await asyncio.Event().wait()
+
+            monkeypatch.setattr(sse, "write", blocked_write)
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    resp = await client.get("/")
+    assert resp.status == 200
+    # handler leaves the context, the blocked write is not waited forever
+    assert await asyncio.wait_for(resp.text(), 2) == ""
+    assert drain_timeout <= loop.time() - started < 1
+    assert not responses[0].is_connected()
@@ -0,0 +1,179 @@
+import asyncio
+import zlib
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+
+from aiohttp_sse import EventSourceResponse, sse_response
+from aiohttp_sse.compression import HAS_BROTLI, _negotiate, _StreamCompressor
+
+
+@pytest.mark.parametrize(
+    ("accept_encoding", "expected"),
+    (
+        ("", None),
+        ("identity", None),
+        ("gzip", "gzip"),
+        ("deflate", "deflate"),
+        ("deflate, gzip", "gzip"),
+        ("GZIP;q=0.5, deflate", "gzip"),
+        ("gzip;q=0, deflate", "deflate"),
+        ("gzip;q=0.0", None),
+        ("gzip;q=foo", None),
+    ),
+)
+def test_negotiate(accept_encoding: str, expected: str) -> None:
+    assert _negotiate(accept_encoding) == expected
+
+
+@pytest.mark.skipif(not HAS_BROTLI, reason="brotli is not installed")
+def test_negotiate_brotli() -> None:
+    assert _negotiate("gzip, deflate, br") == "br"
+
+
+@pytest.mark.parametrize(
+    ("encoding", "wbits"),
+    (("gzip", 16 + zlib.MAX_WBITS), ("deflate", zlib.MAX_WBITS)),
+)
+def test_stream_compressor(encoding: str, wbits: int) -> None:
+    compressor = _StreamCompressor(encoding)
+    decompressor = zlib.decompressobj(wbits=wbits)
+    event = b'data: {"foo": "bar"}\r\n\r\n'
+
+    # every chunk could be decoded without waiting for the next one
+    first = compressor.compress(event)
+    assert decompressor.decompress(first) == event
+    second = compressor.compress(event)
+    assert decompressor.decompress(second) == event
+    # shared dictionary, repeated event is referenced
+    assert len(second) < len(first)
+
+    assert decompressor.decompress(compressor.finish()) == b""
+    assert decompressor.eof
+
+
+def test_stream_compressor_unsupported() -> None:
+    with pytest.raises(ValueError, match="unsupported content coding 'foo'"):
+        _StreamCompressor("foo")
+
+
+@pytest.mark.parametrize("encoding", ("gzip", "deflate"))
+async def test_compressed_stream(aiohttp_client: AiohttpClient, encoding: str) -> None:
+    received = asyncio.Event()
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, compress=True) as sse:
+            assert sse.compression
+            await sse.send("foo")
+            # event is flushed, client gets it before the stream ends
+            await received.wait()
+            await sse.send("bar", event="baz")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/", headers={"Accept-Encoding": encoding})
+    assert resp.status == 200
+    assert resp.headers["Content-Encoding"] == encoding
+    assert resp.headers["Vary"] == "Accept-Encoding"
+
+    assert await resp.content.readuntil(b"\r\n\r\n") == b"data: foo\r\n\r\n"
+    received.set()
+    assert await resp.text() == "event: baz\r\ndata: bar\r\n\r\n"
+
+
+async def test_compressed_ping(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        sse = EventSourceResponse()
+        sse.enable_compression()
+        sse.ping_interval = 0.01
+        async with sse:
+            await sse.prepare(request)
+            await asyncio.sleep(0.015)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert await resp.text() == ": ping\r\n\r\n"
+
+
+async def test_not_accepted(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        sse = EventSourceResponse()
+        sse.enable_compression()
+        assert sse.compression
+        async with sse:
+            await sse.prepare(request)
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in resp.headers
+    assert resp.headers["Vary"] == "Accept-Encoding"
+    assert await resp.text() == "data: foo\r\n\r\n"
+
+
+@pytest.mark.parametrize(
+    ("force", "encoding"),
+    ((True, "deflate"), (web.ContentCoding.gzip, "gzip")),
+)
+async def test_force(
+    aiohttp_client: AiohttpClient, force: web.ContentCoding, encoding: str
+) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        sse = EventSourceResponse()
+        sse.enable_compression(force)
+        async with sse:
+            await sse.prepare(request)
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/", headers={"Accept-Encoding": "identity"})
+    assert resp.headers["Content-Encoding"] == encoding
+    assert "Vary" not in resp.headers
+    assert await resp.read() == b"data: foo\r\n\r\n"
+
+
+async def test_sse_response_force(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, compress=web.ContentCoding.gzip) as sse:
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/", headers={"Accept-Encoding": "identity"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert await resp.read() == b"data: foo\r\n\r\n"
+
+
+async def test_compression_after_prepare(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request) as sse:
+            with pytest.raises(RuntimeError, match="Response is already started"):
+                sse.enable_compression()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
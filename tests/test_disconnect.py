@@ -0,0 +1,109 @@
+from unittest import mock
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_sse.disconnect import (
+    _aiohttp_supported,
+    _ConnectionLostHook,
+    _watch_disconnect,
+)
+
+
+def test_hook(caplog: pytest.LogCaptureFixture) -> None:
+    connection_lost = mock.Mock()
+    hook = _ConnectionLostHook(connection_lost)
+    calls: list[str] = []
+
+    def failing() -> None:
+        raise ValueError("foo")
+
+    def removed() -> None:
+        calls.append("removed")
+
+    hook.add("first", lambda: calls.append("first"))
+    hook.add("first", removed)
+    hook.add("first", failing)
+    hook.add("first", lambda: calls.append("after failure"))
+    hook.add("second", lambda: calls.append("second"))
+    hook.remove("first", removed)
+    hook.remove("first", removed)
+    hook.remove("third", removed)
+
+    hook("first", None)
+    connection_lost.assert_called_once_with("first", None)
+    assert calls == ["first", "after failure"]
+    assert "Error in connection lost callback" in caplog.text
+    # called once per connection
+    hook("first", None)
+    assert calls == ["first", "after failure"]
+    assert list(hook._callbacks) == ["second"]
+
+
+def test_hook_single_callback() -> None:
+    hook = _ConnectionLostHook(mock.Mock())
+    calls: list[str] = []
+
+    def first() -> None:
+        calls.append("first")
+
+    def second() -> None:
+        calls.append("second")
+
+    hook.add("protocol", first)
+    # single callback is stored without a list
+    assert hook._callbacks["protocol"] is first
+    hook.add("protocol", second)
+    hook.remove("protocol", first)
+    assert hook._callbacks["protocol"] is second
+    hook.remove("protocol", first)
+    hook.remove("protocol", second)
+    assert not hook._callbacks
+
+    hook.add("protocol", first)
+    hook("protocol", None)
+    assert calls == ["first"]
+
+
+def test_watch() -> None:
+    original = mock.Mock()
+    manager = mock.Mock(connection_lost=original)
+    request = make_mocked_request("GET", "/", protocol=mock.Mock(_manager=manager))
+    calls: list[str] = []
+
+    def first() -> None:
+        calls.append("first")
+
+    hook = _watch_disconnect(request, first)
+    assert manager.connection_lost is hook
+    # hook is installed once per server
+    assert _watch_disconnect(request, lambda: calls.append("second")) is hook
+    assert isinstance(hook, _ConnectionLostHook)
+
+    hook.remove(request.protocol, first)
+    hook(request.protocol, None)
+    original.assert_called_once_with(request.protocol, None)
+    assert calls == ["second"]
+
+
+def test_watch_unsupported() -> None:
+    request = make_mocked_request("GET", "/", protocol=mock.Mock(_manager=None))
+    assert _watch_disconnect(request, lambda: None) is None
+
+
+@pytest.mark.parametrize(
+    "version, supported",
+    (("3.9.0", True), ("3.13.5", True), ("3.8.6", False), ("4.0.0a1", False)),
+)
+def test_aiohttp_supported(version: str, supported: bool) -> None:
+    assert _aiohttp_supported(version) is supported
+
+
+def test_watch_unsupported_aiohttp(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(aiohttp, "__version__", "4.0.0")
+    manager = mock.Mock()
+    request = make_mocked_request("GET", "/", protocol=mock.Mock(_manager=manager))
+    with pytest.warns(RuntimeWarning, match="not supported with aiohttp 4.0.0"):
+        assert _watch_disconnect(request, lambda: None) is None
+    assert not isinstance(manager.connection_lost, _ConnectionLostHook)
@@ -0,0 +1,88 @@
+from array import array
+
+import pytest
+
+from aiohttp_sse import ServerSentEvent
+from aiohttp_sse.event import _event_line, _is_single_line, _ping_frame, _serialize_data
+
+
+@pytest.mark.parametrize("sep", ["\n", "\r", "\r\n"], ids=("LF", "CR", "CR+LF"))
+def test_encode(sep: str) -> None:
+    event = ServerSentEvent("foo\nbar", id="xyz", event="bar", retry=1)
+    expected = "id: xyz{0}event: bar{0}data: foo{0}data: bar{0}retry: 1{0}{0}"
+    assert event.encode(sep) == expected.format(sep).encode("utf-8")
+
+
+def test_encode_cached() -> None:
+    event = ServerSentEvent("foo")
+    assert event.encode() is event.encode()
+    assert event.encode("\n") is event.encode("\n")
+    assert event.encode() != event.encode("\n")
+
+
+def test_encode_bytes() -> None:
+    event = ServerSentEvent(b"foo\r\nbar", comment=b"baz")
+    assert event.encode("\n") == b": baz\ndata: foo\ndata: bar\n\n"
+
+
+def test_comment_only() -> None:
+    event = ServerSentEvent(comment="hello\nworld")
+    assert event.encode() == b": hello\r\n: world\r\n\r\n"
+
+
+def test_fields_sanitized() -> None:
+    event = ServerSentEvent("foo", id="x\ny", event="b\r\nar")
+    assert event.encode("\n") == b"id: xy\nevent: bar\ndata: foo\n\n"
+
+
+def test_memoryview() -> None:
+    assert _is_single_line(memoryview(b"foo"))
+    assert not _is_single_line(memoryview(b"foo\rbar"))
+    assert _serialize_data(memoryview(b"foo\nbar")[4:], b"\n") == b"data: bar\n\n"
+    assert _serialize_data(memoryview(b"foo\r\nbar"), b"\n") == (
+        b"data: foo\ndata: bar\n\n"
+    )
+    # not byte format views are sent as raw bytes
+    data = array("i", [0x0A0A0A0A])
+    assert _serialize_data(memoryview(data), b"\n") == b"data: \n" * 5 + b"\n"
+    ints = array("i", [0x41424344])
+    assert _serialize_data(memoryview(ints), b"\n") == (
+        b"data: " + ints.tobytes() + b"\n\n"
+    )
+
+
+def test_attributes() -> None:
+    event = ServerSentEvent("foo", id="1", event="bar", retry=5, comment="c")
+    assert event.data == "foo"
+    assert event.id == "1"
+    assert event.event == "bar"
+    assert event.retry == 5
+    assert event.comment == "c"
+    assert event.key is None
+    assert ServerSentEvent("foo", key="baz").key == "baz"
+    assert repr(event) == ("<ServerSentEvent data='foo' id='1' event='bar' retry=5>")
+
+
+def test_immutable() -> None:
+    event = ServerSentEvent("foo")
+    with pytest.raises(AttributeError):
+        event.data = "bar"  # type: ignore[misc]
+
+
+def test_retry_type() -> None:
+    with pytest.raises(TypeError, match="retry argument must be int"):
+        ServerSentEvent("foo", retry="one")  # type: ignore[arg-type]
+
+
+def test_event_line_cached() -> None:
+    line = _event_line("update", b"\r\n")
+    assert line == b"event: update\r\n"
+    assert _event_line("update", b"\r\n") is line
+    assert _event_line("update", b"\n") == b"event: update\n"
+    assert _event_line("up\ndate", b"\n") == b"event: update\n"
+
+
+def test_ping_frame() -> None:
+    assert _ping_frame(b"\r\n") == b": ping\r\n\r\n"
+    assert _ping_frame(b"\r\n") is _ping_frame(b"\r\n")
+    assert _ping_frame(b"\n") == b": ping\n\n"
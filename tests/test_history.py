@@ -0,0 +1,194 @@
+import asyncio
+from collections.abc import Sequence
+from typing import Optional
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from conftest import wait_until
+
+from aiohttp_sse import (
+    Broadcaster,
+    EventSourceResponse,
+    MemoryEventHistory,
+    ServerSentEvent,
+    sse_response,
+)
+
+
+async def fill(history: MemoryEventHistory, *ids: str) -> None:
+    for event_id in ids:
+        await history.append(ServerSentEvent(f"data-{event_id}", id=event_id))
+
+
+async def after_ids(history: MemoryEventHistory, last_event_id: str) -> list[str]:
+    events = await history.after(last_event_id)
+    assert events is not None
+    return [event.id for event in events if event.id is not None]
+
+
+class TestMemoryEventHistory:
+    async def test_after(self) -> None:
+        history = MemoryEventHistory()
+        await fill(history, "1", "2", "3")
+        await history.append(ServerSentEvent("no id"))
+
+        assert len(history) == 3
+        assert await after_ids(history, "1") == ["2", "3"]
+        assert await after_ids(history, "3") == []
+        assert await history.after("unknown") is None
+
+    async def test_max_events(self) -> None:
+        history = MemoryEventHistory(max_events=2)
+        await fill(history, *map(str, range(10)))
+
+        assert len(history) == 2
+        assert await history.after("7") is None
+        assert await after_ids(history, "8") == ["9"]
+
+    async def test_max_bytes(self) -> None:
+        event_size = len(ServerSentEvent("data-1", id="1").encode())
+        history = MemoryEventHistory(max_events=None, max_bytes=event_size * 2)
+        await fill(history, "1", "2", "3")
+
+        assert len(history) == 2
+        assert await history.after("1") is None
+        assert await after_ids(history, "2") == ["3"]
+
+    async def test_max_age(self) -> None:
+        history = MemoryEventHistory(max_age=0.05)
+        await fill(history, "1")
+        await asyncio.sleep(0.1)
+        await fill(history, "2")
+
+        assert await history.after("1") is None
+        assert await after_ids(history, "2") == []
+        await asyncio.sleep(0.1)
+        assert await history.after("2") is None
+        assert len(history) == 0
+
+    async def test_duplicate_id(self) -> None:
+        history = MemoryEventHistory(max_events=2)
+        await fill(history, "1", "2", "1")
+
+        assert await after_ids(history, "1") == []
+        assert await after_ids(history, "2") == ["1"]
+
+    @pytest.mark.parametrize("name", ("max_events", "max_bytes", "max_age"))
+    def test_wrong_limit(self, name: str) -> None:
+        with pytest.raises(ValueError, match=f"{name} must be greater then 0"):
+            MemoryEventHistory(**{name: 0})
+
+
+async def test_replay(aiohttp_client: AiohttpClient) -> None:
+    history = MemoryEventHistory()
+    await fill(history, "1", "2", "3")
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, history=history) as sse:
+            await sse.send("live")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    headers = {EventSourceResponse.DEFAULT_LAST_EVENT_HEADER: "1"}
+    async with client.get("/", headers=headers) as resp:
+        assert await resp.text() == (
+            "id: 2\r\ndata: data-2\r\n\r\n"
+            "id: 3\r\ndata: data-3\r\n\r\n"
+            "data: live\r\n\r\n"
+        )
+
+    async with client.get("/") as resp:
+        assert await resp.text() == "data: live\r\n\r\n"
+
+    headers = {EventSourceResponse.DEFAULT_LAST_EVENT_HEADER: "unknown"}
+    async with client.get("/", headers=headers) as resp:
+        assert await resp.text() == "data: live\r\n\r\n"
+
+
+class ListHistory:
+    """Storage keeping all events, including ones without id."""
+
+    def __init__(self, inclusive: bool = False) -> None:
+        self.events: list[ServerSentEvent] = []
+        self.inclusive = inclusive
+
+    async def append(self, event: ServerSentEvent) -> None:
+        self.events.append(event)
+
+    async def after(self, last_event_id: str) -> Optional[Sequence[ServerSentEvent]]:
+        ids = [event.id for event in self.events]
+        if last_event_id not in ids:
+            return None
+        start = ids.index(last_event_id)
+        return self.events[start if self.inclusive else start + 1 :]
+
+
+@pytest.mark.parametrize(
+    "history, expected",
+    (
+        # event without id is the last one, nothing to continue from
+        (ListHistory(), "id: 2\r\ndata: foo\r\n\r\ndata: bar\r\n\r\n"),
+        # storage returns the last event again
+        (
+            ListHistory(inclusive=True),
+            "id: 1\r\ndata: -\r\n\r\nid: 2\r\ndata: foo\r\n\r\n"
+            "id: 2\r\ndata: foo\r\n\r\n",
+        ),
+    ),
+    ids=("without_id", "same_tail"),
+)
+async def test_replay_custom_history(
+    aiohttp_client: AiohttpClient, history: ListHistory, expected: str
+) -> None:
+    history.events.clear()
+    await history.append(ServerSentEvent("-", id="1"))
+    await history.append(ServerSentEvent("foo", id="2"))
+    if not history.inclusive:
+        await history.append(ServerSentEvent("bar"))
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, history=history) as sse:
+            await sse.send("live")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    headers = {EventSourceResponse.DEFAULT_LAST_EVENT_HEADER: "1"}
+    async with client.get("/", headers=headers) as resp:
+        text = await asyncio.wait_for(resp.text(), 5)
+    assert text == expected + "data: live\r\n\r\n"
+
+
+async def test_broadcaster_history(aiohttp_client: AiohttpClient) -> None:
+    broadcaster = Broadcaster(history=MemoryEventHistory())
+    assert broadcaster.history is not None
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, broadcaster=broadcaster) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    await broadcaster.publish("foo", id="1")
+    await broadcaster.publish("bar", id="2")
+
+    headers = {EventSourceResponse.DEFAULT_LAST_EVENT_HEADER: "1"}
+    task = asyncio.create_task(client.get("/", headers=headers))
+    await wait_until(lambda: len(broadcaster))
+    await broadcaster.publish("baz", id="3")
+
+    (sse,) = broadcaster._subscribers
+    sse.stop_streaming()
+    resp = await task
+    assert await resp.text() == (
+        "id: 2\r\ndata: bar\r\n\r\n" "id: 3\r\ndata: baz\r\n\r\n"
+    )
@@ -0,0 +1,177 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from conftest import wait_until
+
+from aiohttp_sse import EventSourceResponse, PingScheduler, sse_response
+
+streams = web.AppKey("streams", list[EventSourceResponse])
+
+
+def make_app(scheduler: PingScheduler, ping_interval: float) -> web.Application:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, ping_scheduler=scheduler) as sse:
+            sse.ping_interval = ping_interval
+            request.app[streams].append(sse)
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app[streams] = []
+    app.router.add_route("GET", "/", func)
+    return app
+
+
+async def test_shared_ping(aiohttp_client: AiohttpClient) -> None:
+    scheduler = PingScheduler()
+    app = make_app(scheduler, 0.2)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(3)]
+    await wait_until(lambda: len(app[streams]) >= 3)
+    assert len(scheduler) == 3
+    assert len(scheduler._tasks) == 1
+
+    await asyncio.sleep(0.3)
+    for sse in app[streams]:
+        assert sse.is_connected()
+        sse.stop_streaming()
+        await sse.wait()
+        assert not sse.is_connected()
+
+    for task in tasks:
+        resp = await task
+        assert resp.status == 200
+        assert await resp.text() == ": ping\r\n\r\n"
+
+    await asyncio.sleep(0)
+    assert len(scheduler) == 0
+    assert not scheduler._tasks
+
+
+async def test_change_interval(aiohttp_client: AiohttpClient) -> None:
+    scheduler = PingScheduler()
+    app = make_app(scheduler, 999)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(2)]
+    await wait_until(lambda: len(app[streams]) >= 2)
+    assert list(scheduler._buckets) == [999]
+
+    fast, slow = app[streams]
+    fast.ping_interval = 0.2
+    fast.ping_interval = 0.2
+    assert sorted(scheduler._buckets) == [0.2, 999]
+
+    await asyncio.sleep(0.3)
+    for sse in app[streams]:
+        sse.stop_streaming()
+
+    texts = {await (await task).text() for task in tasks}
+    assert texts == {": ping\r\n\r\n", ""}
+
+
+async def test_idle_ping(aiohttp_client: AiohttpClient) -> None:
+    scheduler = PingScheduler()
+    app = make_app(scheduler, 0.2)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(2)]
+    await wait_until(lambda: len(app[streams]) >= 2)
+    busy, idle = app[streams]
+    busy.idle_ping = idle.idle_ping = True
+
+    for _ in range(5):
+        await busy.send("foo")
+        await asyncio.sleep(0.1)
+    for sse in app[streams]:
+        sse.stop_streaming()
+
+    texts = {await (await task).text() for task in tasks}
+    assert texts == {"data: foo\r\n\r\n" * 5, ": ping\r\n\r\n" * 2}
+
+
+async def test_ping_failure(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    scheduler = PingScheduler()
+    app = make_app(scheduler, 0.2)
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(app[streams]) >= 1)
+    (sse,) = app[streams]
+
+    async def reset_error_write(data: bytes) -> None:
+        raise ConnectionResetError("Cannot write to closing transport")
+
+    monkeypatch.setattr(sse, "write", reset_error_write)
+    await sse.wait()
+    assert not sse.is_connected()
+    assert sse not in scheduler
+
+    resp = await task
+    assert resp.status == 200
+
+
+async def test_stuck_streams(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    scheduler = PingScheduler(concurrency=2)
+    app = make_app(scheduler, 0.05)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(7)]
+    await wait_until(lambda: len(app[streams]) >= 7)
+    stuck, full, *healthy = app[streams]
+    calls = []
+
+    async def blocked_write_ping() -> None:
+        calls.append(True)
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(stuck, "_write_ping", blocked_write_ping)
+    assert full._req is not None and full._req.transport is not None
+    monkeypatch.setattr(full._req.transport, "get_write_buffer_size", lambda: 2**20)
+    monkeypatch.setattr(full, "_write_ping", blocked_write_ping)
+
+    await asyncio.sleep(0.5)
+    # pings to the stuck stream time out, full buffer is not pinged at all
+    assert 1 < len(calls) < 10
+    assert stuck.is_connected()
+    assert full.is_connected()
+    for sse in app[streams]:
+        sse.stop_streaming()
+
+    texts = [await (await task).text() for task in tasks]
+    assert texts[:2] == ["", ""]
+    for text in texts[2:]:
+        assert text.count(": ping") >= 3
+
+
+async def test_close(aiohttp_client: AiohttpClient) -> None:
+    scheduler = PingScheduler()
+    app = make_app(scheduler, 999)
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(app[streams]) >= 1)
+    (ping_task,) = scheduler._tasks.values()
+
+    await scheduler.close()
+    assert ping_task.cancelled()
+    assert len(scheduler) == 0
+
+    (sse,) = app[streams]
+    assert sse.is_connected()
+    sse.stop_streaming()
+    await task
+
+
+def test_wrong_concurrency() -> None:
+    with pytest.raises(ValueError, match="concurrency must be greater then 0"):
+        PingScheduler(concurrency=0)
@@ -0,0 +1,278 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_sse import (
+    BufferPolicy,
+    EventSourceResponse,
+    Histogram,
+    MetricsRegistry,
+    PingScheduler,
+    RetryPolicy,
+    ServerSentEvent,
+    StreamMetrics,
+    sse_response,
+)
+
+
+def test_stream_metrics() -> None:
+    metrics = StreamMetrics()
+    metrics._add_write(10, 0.5, blocked=False)
+    metrics._add_write(20, 1.5, blocked=True)
+    metrics._add_write(30, 1.0, blocked=False)
+
+    assert metrics.writes == 3
+    assert metrics.bytes == 60
+    assert metrics.write_time == 3.0
+    assert metrics.max_write_time == 1.5
+    assert metrics.blocked_writes == 1
+    assert metrics.blocked_time == 1.5
+    assert repr(metrics) == (
+        "<StreamMetrics events=0 bytes=60 pings=0 writes=3 "
+        "write_time=3.000000 blocked_time=1.500000>"
+    )
+
+
+def test_registry() -> None:
+    registry = MetricsRegistry()
+    finished: list[StreamMetrics] = []
+    registry.add_hook(finished.append)
+
+    first, second = StreamMetrics(), StreamMetrics()
+    first._add_write(10, 0.5, blocked=False)
+    second._add_write(20, 1.0, blocked=True)
+    registry._start(first)
+    registry._start(second)
+    assert registry.active == 2
+    assert list(registry) == [first, second]
+
+    registry._finish(first)
+    registry._finish(first)
+    assert finished == [first]
+    assert registry.active == 1
+    assert registry.total_streams == 2
+
+    totals = registry.totals()
+    assert totals.writes == 2
+    assert totals.bytes == 30
+    assert totals.max_write_time == 1.0
+    assert totals.blocked_time == 1.0
+
+    registry.remove_hook(finished.append)
+    registry._finish(second)
+    assert finished == [first]
+    assert registry.active == 0
+    assert registry.totals().bytes == 30
+
+
+async def test_failing_hook(caplog: pytest.LogCaptureFixture) -> None:
+    registry = MetricsRegistry()
+    finished: list[StreamMetrics] = []
+
+    def fail(metrics: StreamMetrics) -> None:
+        raise RuntimeError("foo")
+
+    registry.add_hook(fail)
+    registry.add_hook(finished.append)
+    policy = RetryPolicy(max_lag=1)
+    response = EventSourceResponse(metrics=registry, retry_policy=policy)
+    await response.prepare(make_mocked_request("GET", "/"))
+    assert policy._probe_task is not None
+
+    response.stop_streaming()
+    await response.wait()
+    # the rest of the cleanup is not skipped
+    assert registry.active == 0
+    assert finished == [response.metrics]
+    assert "Error in stream metrics hook" in caplog.text
+    assert len(policy) == 0
+    assert policy._probe_task is None
+
+
+def test_disabled() -> None:
+    assert EventSourceResponse().metrics is None
+
+
+@pytest.mark.parametrize(
+    "buffer_policy", (None, BufferPolicy()), ids=("unbuffered", "buffered")
+)
+async def test_stream(
+    aiohttp_client: AiohttpClient, buffer_policy: BufferPolicy
+) -> None:
+    registry = MetricsRegistry()
+    finished: list[StreamMetrics] = []
+    registry.add_hook(finished.append)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(
+            request, metrics=registry, buffer_policy=buffer_policy
+        ) as sse:
+            assert registry.active == 1
+            sse.ping_interval = 0.01
+            await sse.send("foo")
+            await sse.send_event(ServerSentEvent("bar"))
+            await sse.send_many(["baz", ServerSentEvent("qux")])
+            await asyncio.sleep(0.015)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    body = await resp.read()
+
+    assert registry.active == 0
+    [metrics] = finished
+    assert metrics.events == 4
+    assert metrics.pings == 1
+    assert metrics.bytes == len(body)
+    assert metrics.writes >= 2
+    assert metrics.write_time >= metrics.max_write_time > 0
+    assert metrics.blocked_writes == 0
+
+
+async def test_blocked_write(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def write(self: web.StreamResponse, data: bytes) -> None:
+        # waiting for the client to drain the transport buffer
+        await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(web.StreamResponse, "write", write)
+    sse = EventSourceResponse(metrics=MetricsRegistry())
+    await sse.write(b"foo")
+
+    assert sse.metrics is not None
+    assert sse.metrics.blocked_writes == 1
+    assert sse.metrics.blocked_time >= 0.01
+
+
+def test_histogram() -> None:
+    histogram = Histogram()
+    assert histogram.percentile(50) == 0
+    assert histogram.mean == 0
+
+    for micros in range(1, 101):
+        histogram.record(micros / 1e6)
+    histogram.record(-1)
+
+    assert histogram.count == 101
+    assert histogram.min == 0
+    assert histogram.max == pytest.approx(100e-6)
+    assert histogram.mean == pytest.approx(50.5e-6 * 100 / 101)
+    # exact below 32 microseconds
+    assert histogram.percentile(20) == pytest.approx(20e-6)
+    # within 1/16 above
+    assert 50e-6 <= histogram.percentile(50) <= 50e-6 * (1 + 1 / 16)
+    assert 99e-6 <= histogram.percentile(99) <= 100e-6
+    assert histogram.percentile(100) == histogram.max
+    assert sum(count for _, count in histogram.buckets()) == 101
+
+    with pytest.raises(ValueError, match="percent must be between 0 and 100"):
+        histogram.percentile(101)
+
+
+@pytest.mark.parametrize("duration", (0.001, 1, 3600, 10**6))
+def test_histogram_precision(duration: float) -> None:
+    histogram = Histogram()
+    histogram.record(duration)
+    [(upper, count)] = histogram.buckets()
+    assert count == 1
+    if duration < 10**5:
+        assert duration <= upper <= duration * (1 + 1 / 16)
+    else:
+        # counted in the last bucket
+        assert upper < duration
+
+
+def test_histogram_merge() -> None:
+    first, second = Histogram(), Histogram()
+    first.record(0.002)
+    second.record(0.001)
+    second.record(0.003)
+    first._merge(second)
+    first._merge(Histogram())
+
+    assert first.count == 3
+    assert first.min == 0.001
+    assert first.max == 0.003
+    assert first.sum == pytest.approx(0.006)
+    assert repr(first).startswith("<Histogram count=3 mean=0.002000 ")
+
+
+def test_profile_disabled() -> None:
+    assert MetricsRegistry().profile is None
+
+
+@pytest.mark.parametrize(
+    "buffer_policy", (None, BufferPolicy()), ids=("unbuffered", "buffered")
+)
+async def test_profile(
+    aiohttp_client: AiohttpClient, buffer_policy: BufferPolicy
+) -> None:
+    registry = MetricsRegistry(profile=True)
+    profile = registry.profile
+    assert profile is not None
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(
+            request, metrics=registry, buffer_policy=buffer_policy
+        ) as sse:
+            sse.ping_interval = 0.01
+            await sse.send("foo", event="bar")
+            await sse.send_event(ServerSentEvent("baz"))
+            await asyncio.sleep(0.015)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    await resp.read()
+
+    assert profile.serialize_time.count == 1
+    assert profile.send_latency.count == 2
+    assert profile.write_time.count >= 2
+    assert profile.loop_lag.count == 1
+    assert profile.send_latency.max > 0
+    assert repr(profile).startswith("<LatencyProfile send_latency=<Histogram ")
+
+
+async def test_profile_send_nowait() -> None:
+    registry = MetricsRegistry(profile=True)
+    profile = registry.profile
+    assert profile is not None
+    sse = EventSourceResponse(metrics=registry, buffer_policy=BufferPolicy())
+    await sse.prepare(make_mocked_request("GET", "/"))
+
+    assert sse.send_nowait("foo")
+    async with sse:
+        pass
+
+    assert profile.serialize_time.count == 1
+    assert profile.send_latency.count == 1
+
+
+async def test_profile_scheduler(aiohttp_client: AiohttpClient) -> None:
+    registry = MetricsRegistry(profile=True)
+    profile = registry.profile
+    assert profile is not None
+    scheduler = PingScheduler(metrics=registry)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, ping_scheduler=scheduler) as sse:
+            sse.ping_interval = 0.01
+            await asyncio.sleep(0.015)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert await resp.text() == ": ping\r\n\r\n"
+    assert profile.loop_lag.count == 1
+    assert profile.loop_lag.min >= 0
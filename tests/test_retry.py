@@ -0,0 +1,203 @@
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+
+from aiohttp_sse import (
+    BufferPolicy,
+    EventSourceResponse,
+    RetryPolicy,
+    ServerSentEvent,
+    sse_response,
+)
+
+
+async def test_retry_field(aiohttp_client: AiohttpClient) -> None:
+    load = 0.0
+    policy = RetryPolicy(min_retry=1000, max_retry=5000, signal=lambda: load)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        nonlocal load
+        async with sse_response(request, retry_policy=policy) as sse:
+            await sse.send("foo")
+            await sse.send("bar")
+            load = 0.5
+            policy._updated = None
+            await sse.send("baz")
+            await sse.send_event(ServerSentEvent("qux"))
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    resp = await client.get("/")
+    assert resp.status == 200
+    assert await resp.text() == (
+        "retry: 1000\r\n\r\ndata: foo\r\n\r\n"
+        "data: bar\r\n\r\n"
+        "retry: 3000\r\n\r\ndata: baz\r\n\r\n"
+        "data: qux\r\n\r\n"
+    )
+    assert len(policy) == 0
+
+
+async def test_retry_ping(aiohttp_client: AiohttpClient) -> None:
+    policy = RetryPolicy(min_retry=2000)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, sep="\n", retry_policy=policy) as sse:
+            sse.ping_interval = 0.1
+            await asyncio.sleep(0.15)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    resp = await client.get("/")
+    assert await resp.text() == "retry: 2000\n\n: ping\n\n"
+
+
+async def test_retry_buffered() -> None:
+    policy = RetryPolicy(min_retry=2000)
+    request = make_mocked_request("GET", "/")
+    response = EventSourceResponse(
+        buffer_policy=BufferPolicy(flush_delay=1), retry_policy=policy
+    )
+    await response.prepare(request)
+    assert response.retry_policy is policy
+    assert len(policy) == 1
+
+    response.send_nowait("foo")
+    response.send_nowait("bar")
+    assert response._buffer is not None
+    # retry field is added on write, not queued
+    assert [e.frame for e in response._buffer._frames] == [
+        b"data: foo\r\n\r\n",
+        b"data: bar\r\n\r\n",
+    ]
+
+    response.stop_streaming()
+    await response.wait()
+    assert len(policy) == 0
+
+
+async def test_retry_conflated(aiohttp_client: AiohttpClient) -> None:
+    load = 0.0
+    policy = RetryPolicy(min_retry=1000, max_retry=5000, signal=lambda: load)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        nonlocal load
+        async with sse_response(
+            request,
+            buffer_policy=BufferPolicy(conflate=True),
+            retry_policy=policy,
+        ) as sse:
+            sse.send_nowait("a", event="price")
+            load = 1
+            policy._updated = None
+            sse.send_nowait("b", event="price")
+            sse.send_nowait("c", event="price")
+            assert sse._buffer is not None
+            await sse._buffer.join()
+            sse.send_nowait("d", event="price")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    resp = await client.get("/")
+    # replaced events do not take retry field with them
+    assert await resp.text() == (
+        "retry: 5000\r\n\r\nevent: price\r\ndata: c\r\n\r\n"
+        "event: price\r\ndata: d\r\n\r\n"
+    )
+
+
+async def test_connections_load() -> None:
+    policy = RetryPolicy(min_retry=0, max_retry=10000, max_connections=4)
+    responses = []
+    for _ in range(3):
+        response = EventSourceResponse(retry_policy=policy)
+        await response.prepare(make_mocked_request("GET", "/"))
+        responses.append(response)
+
+    assert policy.load == 0.75
+    assert policy.retry == 8000
+
+    for response in responses:
+        response.stop_streaming()
+        await response.wait()
+    assert policy.load == 0
+
+
+async def test_lag_load() -> None:
+    policy = RetryPolicy(max_lag=0.1, interval=0.05)
+    response = EventSourceResponse(retry_policy=policy)
+    await response.prepare(make_mocked_request("GET", "/"))
+    assert policy._probe_task is not None
+
+    await asyncio.sleep(0.01)
+    # block the loop
+    time.sleep(0.1)
+    await asyncio.sleep(0.01)
+    assert policy.lag >= 0.05
+    assert policy.load >= 0.5
+
+    response.stop_streaming()
+    await response.wait()
+    assert policy._probe_task is None
+
+
+def test_signal_load() -> None:
+    load = 2.0
+    policy = RetryPolicy(min_retry=1000, max_retry=3000, signal=lambda: load)
+    assert policy.load == 1
+    assert policy.retry == 3000
+
+    load = -1
+    assert policy.load == 0
+    # cached until interval passes
+    assert policy.retry == 3000
+    policy._updated = None
+    assert policy.retry == 1000
+
+
+@pytest.mark.parametrize(
+    "load, retry",
+    ((0.0, 1000), (0.1, 4000), (0.24, 8000), (0.5, 16000), (1.0, 31000)),
+)
+def test_step(load: float, retry: int) -> None:
+    policy = RetryPolicy(
+        min_retry=1000, max_retry=31000, step=4000, signal=lambda: load
+    )
+    assert policy.retry == retry
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    (
+        ({"min_retry": -1}, "min_retry must not be negative"),
+        ({"max_retry": 10}, "max_retry must not be less than min_retry"),
+        ({"step": 0}, "step must be greater then 0"),
+        ({"max_connections": 0}, "max_connections must be greater then 0"),
+        ({"max_lag": 0}, "max_lag must be greater then 0"),
+        ({"interval": 0}, "interval must be greater then 0"),
+    ),
+)
+def test_invalid(kwargs: dict[str, float], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        RetryPolicy(**kwargs)  # type: ignore[arg-type]
+
+
+def test_repr() -> None:
+    policy = RetryPolicy(max_connections=100)
+    assert repr(policy) == (
+        "<RetryPolicy min_retry=1000 max_retry=30000 step=1000 "
+        "max_connections=100 max_lag=None>"
+    )
@@ -0,0 +1,181 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+from conftest import wait_until
+
+from aiohttp_sse import EventSourceResponse, ServerSentEvent, TopicRouter, sse_response
+
+
+async def make_response() -> EventSourceResponse:
+    response = EventSourceResponse()
+    await response.prepare(make_mocked_request("GET", "/"))
+    return response
+
+
+@pytest.mark.parametrize(
+    ("pattern", "matching", "not_matching"),
+    (
+        ("orders", ("orders",), ("orders.eu", "order")),
+        ("orders.*", ("orders.eu", "orders.us"), ("orders", "orders.eu.42")),
+        ("orders.*.42", ("orders.eu.42",), ("orders.eu.43", "orders.eu")),
+        ("*.eu", ("orders.eu", "users.eu"), ("orders.us", "eu")),
+        ("orders.#", ("orders", "orders.eu", "orders.eu.42"), ("users.eu",)),
+        ("#", ("orders", "orders.eu.42"), ()),
+        ("*.eu.#", ("orders.eu", "orders.eu.42"), ("orders.us.42",)),
+    ),
+)
+async def test_match(
+    pattern: str, matching: tuple[str, ...], not_matching: tuple[str, ...]
+) -> None:
+    router = TopicRouter()
+    response = await make_response()
+    router.subscribe(response, [pattern])
+
+    for topic in matching:
+        assert router.match(topic) == [response], topic
+    for topic in not_matching:
+        assert router.match(topic) == [], topic
+
+    response.stop_streaming()
+    await response.wait()
+
+
+async def test_match_once() -> None:
+    router = TopicRouter()
+    first, second = await make_response(), await make_response()
+    router.subscribe(first, ["orders.eu", "orders.*", "orders.#", "#"])
+    router.subscribe(second, ["orders.us"])
+
+    assert router.match("orders.eu") == [first]
+    assert set(router.match("orders.us")) == {first, second}
+    assert router.topics(first) == {"orders.eu", "orders.*", "orders.#", "#"}
+
+    for response in (first, second):
+        response.stop_streaming()
+        await response.wait()
+
+
+@pytest.mark.parametrize("pattern", ("#.orders", "orders.#.eu", "orders*", "or#"))
+async def test_wrong_pattern(pattern: str) -> None:
+    router = TopicRouter()
+    response = await make_response()
+    with pytest.raises(ValueError):
+        router.subscribe(response, ["orders", pattern])
+    # nothing is subscribed on error
+    assert response not in router
+
+    response.stop_streaming()
+    await response.wait()
+
+
+async def test_unsubscribe() -> None:
+    router = TopicRouter()
+    response = await make_response()
+    router.subscribe(response, ["orders", "orders.*.42", "users.#"])
+    assert len(router) == 1
+
+    router.unsubscribe(response, ["orders.*.42", "unknown"])
+    assert router.topics(response) == {"orders", "users.#"}
+    assert router.match("orders.eu.42") == []
+    assert router.match("users.eu") == [response]
+    # empty branches are pruned
+    assert "orders" not in router._root.children
+
+    router.unsubscribe(response)
+    assert response not in router
+    assert router.topics(response) == frozenset()
+    assert router._root.is_empty()
+    assert not router._exact
+    # unsubscribing twice is no-op
+    router.unsubscribe(response)
+
+    response.stop_streaming()
+    await response.wait()
+
+
+async def test_unsubscribe_on_close() -> None:
+    router = TopicRouter()
+    response = await make_response()
+    router.subscribe(response, ["orders", "users.*"])
+
+    response.stop_streaming()
+    await response.wait()
+    assert len(router) == 0
+    assert router._root.is_empty()
+
+
+def test_not_started() -> None:
+    router = TopicRouter()
+    with pytest.raises(RuntimeError, match="Response is not started"):
+        router.subscribe(EventSourceResponse(), ["orders"])
+
+
+def test_wrong_concurrency() -> None:
+    with pytest.raises(ValueError, match="concurrency must be greater then 0"):
+        TopicRouter(concurrency=0)
+
+
+def test_wrong_send_timeout() -> None:
+    with pytest.raises(ValueError, match="send_timeout must be greater then 0"):
+        TopicRouter(send_timeout=0)
+
+
+async def test_stuck_stream_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    router = TopicRouter(concurrency=1, send_timeout=0.05)
+    stuck, alive = await make_response(), await make_response()
+    router.subscribe(stuck, ["orders"])
+    router.subscribe(alive, ["orders"])
+
+    async def blocked_send_event(event: ServerSentEvent) -> None:
+        await asyncio.Event().wait()
+
+    sent = []
+
+    async def send_event(event: ServerSentEvent) -> None:
+        sent.append(event)
+
+    monkeypatch.setattr(stuck, "send_event", blocked_send_event)
+    monkeypatch.setattr(alive, "send_event", send_event)
+
+    assert await router.publish("orders", "foo") == 1
+    assert len(sent) == 1
+    assert stuck not in router
+    assert alive in router
+    await stuck.wait()
+    assert not stuck.is_connected()
+
+    alive.stop_streaming()
+    await alive.wait()
+
+
+async def test_publish(aiohttp_client: AiohttpClient) -> None:
+    router = TopicRouter()
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request) as sse:
+            router.subscribe(sse, request.query.getall("topic"))
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    eu = asyncio.create_task(client.get("/", params={"topic": "orders.eu"}))
+    wildcard = asyncio.create_task(client.get("/", params={"topic": "orders.*"}))
+    await wait_until(lambda: len(router) >= 2)
+
+    assert await router.publish("orders.eu", "foo", event="bar") == 2
+    assert await router.publish_event("orders.us", ServerSentEvent("baz")) == 1
+    assert await router.publish("users.eu", "qux") == 0
+
+    for response in list(router._topics):
+        response.stop_streaming()
+
+    assert await (await eu).text() == "event: bar\r\ndata: foo\r\n\r\n"
+    assert await (await wildcard).text() == (
+        "event: bar\r\ndata: foo\r\n\r\n" "data: baz\r\n\r\n"
+    )
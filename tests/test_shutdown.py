@@ -0,0 +1,138 @@
+import asyncio
+import re
+from typing import Optional
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from aiohttp.test_utils import make_mocked_request
+from conftest import wait_until
+
+from aiohttp_sse import BufferPolicy, EventSourceResponse, ShutdownManager, sse_response
+
+
+def make_app(
+    manager: ShutdownManager, buffer_policy: Optional[BufferPolicy] = None
+) -> web.Application:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, buffer_policy=buffer_policy) as sse:
+            await sse.send("foo")
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    manager.setup(app)
+    app.router.add_route("GET", "/", func)
+    return app
+
+
+@pytest.mark.parametrize("batch_size", (1, 2, 100))
+async def test_shutdown(aiohttp_client: AiohttpClient, batch_size: int) -> None:
+    manager = ShutdownManager(retry=1000, jitter=500, batch_size=batch_size)
+    app = make_app(manager)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(3)]
+    await wait_until(lambda: len(manager) >= 3)
+
+    await app.shutdown()
+    assert len(manager) == 0
+    assert manager.closing
+
+    for task in tasks:
+        resp = await task
+        assert resp.status == 200
+        streamed_data = await resp.text()
+        match = re.fullmatch(r"data: foo\r\n\r\nretry: (\d+)\r\n\r\n", streamed_data)
+        assert match is not None
+        assert 1000 <= int(match.group(1)) <= 1500
+
+
+async def test_shutdown_buffered(aiohttp_client: AiohttpClient) -> None:
+    manager = ShutdownManager(retry=1000, jitter=0)
+    app = make_app(manager, buffer_policy=BufferPolicy(flush_delay=0.1))
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(manager) >= 1)
+
+    await app.shutdown()
+    resp = await task
+    assert await resp.text() == "data: foo\r\n\r\nretry: 1000\r\n\r\n"
+
+
+async def test_shutdown_timeout(aiohttp_client: AiohttpClient) -> None:
+    manager = ShutdownManager(batch_size=1, batch_delay=1, timeout=0.1)
+    app = make_app(manager)
+    client = await aiohttp_client(app)
+
+    tasks = [asyncio.create_task(client.get("/")) for _ in range(2)]
+    await wait_until(lambda: len(manager) >= 2)
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await app.shutdown()
+    assert loop.time() - started < 0.5
+    assert len(manager) == 0
+
+    texts = sorted([await (await task).text() for task in tasks])
+    assert texts[0] == "data: foo\r\n\r\n"
+    assert texts[1].startswith("data: foo\r\n\r\nretry: ")
+
+
+async def test_register_closing() -> None:
+    manager = ShutdownManager()
+    await manager.shutdown()
+
+    app = web.Application()
+    manager.setup(app)
+    request = make_mocked_request("GET", "/", app=app)
+    response = EventSourceResponse()
+    await response.prepare(request)
+    await response.wait()
+
+    assert not response.is_connected()
+    assert len(manager) == 0
+
+
+async def test_register_not_started() -> None:
+    with pytest.raises(RuntimeError, match="not started"):
+        ShutdownManager().register(EventSourceResponse())
+
+
+async def test_unregister_on_stop() -> None:
+    manager = ShutdownManager()
+    app = web.Application()
+    manager.setup(app)
+    request = make_mocked_request("GET", "/", app=app)
+    response = EventSourceResponse()
+    await response.prepare(request)
+    manager.register(response)
+    assert response in manager
+    assert len(manager) == 1
+
+    response.stop_streaming()
+    await response.wait()
+    assert response not in manager
+
+
+@pytest.mark.parametrize(
+    "kwargs, message",
+    (
+        ({"retry": -1}, "retry must not be negative"),
+        ({"jitter": -1}, "jitter must not be negative"),
+        ({"batch_size": 0}, "batch_size must be greater then 0"),
+        ({"batch_delay": -1}, "batch_delay must not be negative"),
+        ({"timeout": 0}, "timeout must be greater then 0"),
+    ),
+)
+def test_invalid(kwargs: dict[str, float], message: str) -> None:
+    with pytest.raises(ValueError, match=message):
+        ShutdownManager(**kwargs)  # type: ignore[arg-type]
+
+
+def test_repr() -> None:
+    manager = ShutdownManager(retry=100, jitter=50, batch_size=10, timeout=5)
+    assert repr(manager) == (
+        "<ShutdownManager retry=100 jitter=50 batch_size=10 batch_delay=0 timeout=5>"
+    )
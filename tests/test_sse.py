@@ -1,12 +1,16 @@
 import asyncio
 import sys
+from collections.abc import AsyncIterator
+from typing import Union
 
+import aiohttp
 import pytest
 from aiohttp import web
 from aiohttp.pytest_plugin import AiohttpClient
 from aiohttp.test_utils import make_mocked_request
 
-from aiohttp_sse import EventSourceResponse, sse_response
+from aiohttp_sse import EventSourceResponse, ServerSentEvent, sse_response
+from aiohttp_sse.disconnect import _ConnectionLostHook
 
 socket = web.AppKey("socket", list[EventSourceResponse])
 
@@ -60,6 +64,258 @@ async def test_func(with_sse_response: bool, aiohttp_client: AiohttpClient) -> N
     assert streamed_data == expected
 
 
+@pytest.mark.parametrize("sep", ["\n", "\r\n"], ids=("LF", "CR+LF"))
+async def test_send_event(aiohttp_client: AiohttpClient, sep: str) -> None:
+    event = ServerSentEvent("foo", event="bar", id="xyz", retry=1)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, sep=sep) as sse:
+            await sse.send_event(event)
+            await sse.send_event(event)
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    streamed_data = await resp.text()
+    expected = "id: xyz{0}event: bar{0}data: foo{0}retry: 1{0}{0}".format(sep)
+    assert streamed_data == expected * 2
+
+
+async def test_send_bytes(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request) as sse:
+            await sse.send(b'{"foo": "\xc3\xa9"}')
+            await sse.send(memoryview(b"foo\nbar"), id=b"x\ny", event=b"baz")
+            await sse.send(bytearray(b"foo"), id=42)  # type: ignore[arg-type]
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    streamed_data = await resp.text()
+    expected = (
+        'data: {"foo": "\u00e9"}\r\n\r\n'
+        "id: xy\r\nevent: baz\r\ndata: foo\r\ndata: bar\r\n\r\n"
+        "id: 42\r\ndata: foo\r\n\r\n"
+    )
+    assert streamed_data == expected
+
+
+async def test_send_many(
+    aiohttp_client: AiohttpClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    writes = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request) as sse:
+            original_write = sse.write
+
+            async def write(data: bytes) -> None:
+                writes.append(data)
+                await original_write(data)
+
+            monkeypatch.setattr(sse, "write", write)
+            await sse.send_many(["foo", ServerSentEvent("bar", id="1")])
+            await sse.send_many([])
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    resp = await client.get("/")
+    assert resp.status == 200
+
+    expected = "data: foo\r\n\r\nid: 1\r\ndata: bar\r\n\r\n"
+    assert await resp.text() == expected
+    assert writes == [expected.encode()]
+
+
+class TestStream:
+    async def test_batching(
+        self, aiohttp_client: AiohttpClient, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        writes = []
+        closed = []
+
+        async def source() -> AsyncIterator[Union[str, ServerSentEvent]]:
+            try:
+                # ready at once, sent using single write
+                yield "foo"
+                yield ServerSentEvent("bar", id="1")
+                await asyncio.sleep(0.01)
+                yield "baz"
+            finally:
+                closed.append(True)
+
+        async def func(request: web.Request) -> web.StreamResponse:
+            async with sse_response(request) as sse:
+                original_write = sse.write
+
+                async def write(data: bytes) -> None:
+                    writes.append(data)
+                    await original_write(data)
+
+                monkeypatch.setattr(sse, "write", write)
+                await sse.stream(source())
+            return sse
+
+        app = web.Application()
+        app.router.add_route("GET", "/", func)
+
+        client = await aiohttp_client(app)
+        resp = await client.get("/")
+        assert resp.status == 200
+
+        assert await resp.text() == (
+            "data: foo\r\n\r\nid: 1\r\ndata: bar\r\n\r\ndata: baz\r\n\r\n"
+        )
+        assert writes == [
+            b"data: foo\r\n\r\nid: 1\r\ndata: bar\r\n\r\n",
+            b"data: baz\r\n\r\n",
+        ]
+        assert closed == [True]
+
+    async def test_stop_streaming(self, aiohttp_client: AiohttpClient) -> None:
+        closed = []
+
+        async def source() -> AsyncIterator[str]:
+            try:
+                while True:
+                    yield "foo"
+                    await asyncio.sleep(0.01)
+            finally:
+                closed.append(True)
+
+        async def func(request: web.Request) -> web.StreamResponse:
+            async with sse_response(request) as sse:
+                loop = asyncio.get_running_loop()
+                loop.call_later(0.005, sse.stop_streaming)
+                await sse.stream(source())
+                assert closed == [True]
+            return sse
+
+        app = web.Application()
+        app.router.add_route("GET", "/", func)
+
+        client = await aiohttp_client(app)
+        resp = await client.get("/")
+        assert await resp.text() == "data: foo\r\n\r\n"
+
+    async def test_source_error(self, aiohttp_client: AiohttpClient) -> None:
+        async def source() -> AsyncIterator[str]:
+            yield "foo"
+            await asyncio.sleep(0)
+            raise ValueError("bar")
+
+        async def func(request: web.Request) -> web.StreamResponse:
+            async with sse_response(request) as sse:
+                with pytest.raises(ValueError, match="bar"):
+                    await sse.stream(source())
+            return sse
+
+        app = web.Application()
+        app.router.add_route("GET", "/", func)
+
+        client = await aiohttp_client(app)
+        resp = await client.get("/")
+        assert await resp.text() == "data: foo\r\n\r\n"
+
+    async def test_aclose(self) -> None:
+        class Source:
+            def __init__(self) -> None:
+                self.closed = False
+
+            def __aiter__(self) -> "Source":
+                return self
+
+            async def __anext__(self) -> str:
+                raise StopAsyncIteration
+
+            async def aclose(self) -> None:
+                self.closed = True
+
+        sse = EventSourceResponse()
+        await sse.prepare(make_mocked_request("GET", "/"))
+        source = Source()
+        await sse.stream(source)
+        assert source.closed
+
+        sse.stop_streaming()
+        await sse.wait()
+
+    async def test_read_ahead(
+        self,
+        aiohttp_client: AiohttpClient,
+        monkeypatch: pytest.MonkeyPatch,
+    ) -> None:
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for i in range(20):
+            queue.put_nowait(str(i))
+        writes = []
+        unblocked = asyncio.Event()
+
+        async def source() -> AsyncIterator[str]:
+            while not queue.empty():
+                yield await queue.get()
+
+        async def func(request: web.Request) -> web.StreamResponse:
+            async with sse_response(request) as sse:
+                original_write = sse.write
+
+                async def slow_write(data: bytes) -> None:
+                    writes.append(data)
+                    await unblocked.wait()
+                    await original_write(data)
+
+                monkeypatch.setattr(sse, "write", slow_write)
+                task = asyncio.create_task(sse.stream(source(), max_pending=3))
+                await asyncio.sleep(0.05)
+                # the first batch is being written and only the next one
+                # is read ahead, the source is not drained
+                assert len(writes) == 1
+                assert queue.qsize() == 14
+                unblocked.set()
+                await task
+            return sse
+
+        app = web.Application()
+        app.router.add_route("GET", "/", func)
+
+        client = await aiohttp_client(app)
+        resp = await client.get("/")
+        assert await resp.text() == "".join(f"data: {i}\r\n\r\n" for i in range(20))
+        assert all(data.count(b"data:") <= 3 for data in writes)
+
+    async def test_not_started(self) -> None:
+        async def source() -> AsyncIterator[str]:
+            yield "foo"  # pragma: no cover
+
+        with pytest.raises(RuntimeError, match="Response is not started"):
+            await EventSourceResponse().stream(source())
+
+    async def test_wrong_max_pending(self) -> None:
+        async def source() -> AsyncIterator[str]:
+            yield "foo"  # pragma: no cover
+
+        sse = EventSourceResponse()
+        await sse.prepare(make_mocked_request("GET", "/"))
+        with pytest.raises(ValueError, match="max_pending must be greater then 0"):
+            await sse.stream(source(), max_pending=0)
+        sse.stop_streaming()
+        await sse.wait()
+
+
 async def test_wait_stop_streaming(aiohttp_client: AiohttpClient) -> None:
     async def func(request: web.Request) -> web.StreamResponse:
         app = request.app
@@ -125,10 +381,11 @@ async def test_wait_stop_streaming_errors() -> None:
     assert str(ctx.value) == "Response is not started"
 
 
-def test_compression_not_implemented() -> None:
+def test_compression_disabled() -> None:
     response = EventSourceResponse()
-    with pytest.raises(NotImplementedError):
-        response.enable_compression()
+    assert not response.compression
+    response.enable_compression()
+    assert response.compression
 
 
 class TestPingProperty:
@@ -189,6 +446,38 @@ async def test_ping(aiohttp_client: AiohttpClient) -> None:
     assert streamed_data == expected
 
 
+class TestIdlePing:
+    def test_default_value(self) -> None:
+        response = EventSourceResponse()
+        assert response.idle_ping is False
+
+    def test_wrong_type(self) -> None:
+        response = EventSourceResponse()
+        with pytest.raises(TypeError, match="idle ping must be bool"):
+            response.idle_ping = 1  # type: ignore[assignment]
+
+    async def test_skip_busy(self, aiohttp_client: AiohttpClient) -> None:
+        async def func(request: web.Request) -> web.StreamResponse:
+            async with sse_response(request) as sse:
+                sse.ping_interval = 0.3
+                sse.idle_ping = True
+                for _ in range(5):
+                    await sse.send("foo")
+                    await asyncio.sleep(0.1)
+                await asyncio.sleep(0.4)
+            return sse
+
+        app = web.Application()
+        app.router.add_route("GET", "/", func)
+
+        client = await aiohttp_client(app)
+        resp = await client.get("/")
+        assert resp.status == 200
+
+        streamed_data = await resp.text()
+        assert streamed_data == "data: foo\r\n\r\n" * 5 + ": ping\r\n\r\n"
+
+
 async def test_ping_reset(
     aiohttp_client: AiohttpClient,
     monkeypatch: pytest.MonkeyPatch,
@@ -474,6 +763,105 @@ async def test_connection_is_not_alive(aiohttp_client: AiohttpClient) -> None:
         assert resp.status == 200
 
 
+async def test_disconnect(unused_tcp_port: int) -> None:
+    disconnected: list[EventSourceResponse] = []
+    finished = asyncio.Event()
+    streaming = asyncio.Event()
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(
+            request, on_disconnect=disconnected.append, watch_disconnect=True
+        ) as sse:
+            sse.ping_interval = 999
+            streaming.set()
+            # resolved on disconnect, not on the next ping
+            await sse.wait()
+            assert not sse.is_connected()
+            assert disconnected == [sse]
+            finished.set()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    # aiohttp test server cancels handlers on disconnect, unlike default one
+    runner = web.AppRunner(app, handler_cancellation=False)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", unused_tcp_port)
+    await site.start()
+    try:
+        async with aiohttp.ClientSession() as session:
+            resp = await session.get(site.name)
+            assert resp.status == 200
+            await streaming.wait()
+            resp.close()
+            await asyncio.wait_for(finished.wait(), timeout=5)
+    finally:
+        await runner.cleanup()
+
+
+async def test_disconnect_after_stop(aiohttp_client: AiohttpClient) -> None:
+    disconnected: list[EventSourceResponse] = []
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(
+            request, on_disconnect=disconnected.append, watch_disconnect=True
+        ) as sse:
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    async with client.get("/") as resp:
+        assert await resp.text() == "data: foo\r\n\r\n"
+    # stopped stream is not watched anymore
+    assert client.server.runner is not None
+    hook = client.server.runner.server.connection_lost  # type: ignore[union-attr]
+    assert isinstance(hook, _ConnectionLostHook)
+    assert hook._callbacks == {}
+
+    await client.close()
+    # streaming was stopped by the server, not by the client
+    assert disconnected == []
+
+
+async def test_disconnect_not_watched(aiohttp_client: AiohttpClient) -> None:
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request) as sse:
+            await sse.send("foo")
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+
+    client = await aiohttp_client(app)
+    async with client.get("/") as resp:
+        assert await resp.text() == "data: foo\r\n\r\n"
+    # server is not patched unless asked for
+    assert client.server.runner is not None
+    hook = client.server.runner.server.connection_lost  # type: ignore[union-attr]
+    assert not isinstance(hook, _ConnectionLostHook)
+
+    with pytest.raises(ValueError, match="on_disconnect requires watch_disconnect"):
+        EventSourceResponse(on_disconnect=lambda sse: None)
+
+
+async def test_compact_state() -> None:
+    first = EventSourceResponse(sep="\n")
+    second = EventSourceResponse(sep="\n")
+    await first.prepare(make_mocked_request("GET", "/"))
+
+    # SSE state is kept in slots, not in instance dict
+    assert not set(EventSourceResponse.__slots__) & set(vars(first))
+    # encoded separator is shared between responses
+    assert first._line_sep is second._line_sep
+
+    first.stop_streaming()
+    await first.wait()
+
+
 class TestLastEventId:
     async def test_success(self, aiohttp_client: AiohttpClient) -> None:
         async def func(request: web.Request) -> web.StreamResponse:
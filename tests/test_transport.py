@@ -0,0 +1,283 @@
+import asyncio
+import os
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+from aiohttp.pytest_plugin import AiohttpClient
+from conftest import wait_until
+
+from aiohttp_sse import (
+    Broadcaster,
+    MemoryEventHistory,
+    ServerSentEvent,
+    UnixSocketTransport,
+    sse_response,
+)
+from aiohttp_sse.transport import _dump_event, _load_event
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Unix datagram sockets are not available"
+)
+
+
+class Receiver:
+    def __init__(self) -> None:
+        self.events: list[ServerSentEvent] = []
+        self.received = asyncio.Event()
+
+    async def __call__(self, event: ServerSentEvent) -> None:
+        self.events.append(event)
+        self.received.set()
+
+
+def test_serialization() -> None:
+    event = ServerSentEvent(b"foo\nbar", id="1", event="baz", retry=5, comment="c")
+    payload = _dump_event(event)
+    assert payload == (
+        b'{"data":"foo\\nbar","id":"1","event":"baz","retry":5,"comment":"c"}'
+    )
+    assert _load_event(payload).encode() == event.encode()
+    assert _load_event(_dump_event(ServerSentEvent("foo"))).encode() == (
+        b"data: foo\r\n\r\n"
+    )
+
+    keyed = _load_event(_dump_event(ServerSentEvent("foo", event="bar", key="baz")))
+    assert keyed.key == "baz"
+
+    with pytest.raises(ValueError, match="event must be JSON object"):
+        _load_event(b"[]")
+
+
+async def test_publish(tmp_path: Path) -> None:
+    first, second = UnixSocketTransport(str(tmp_path)), UnixSocketTransport(
+        str(tmp_path)
+    )
+    first_receiver, second_receiver = Receiver(), Receiver()
+    await first.start(first_receiver)
+    await second.start(second_receiver)
+    try:
+        assert first.address is not None
+        assert first.address.startswith(str(tmp_path))
+        assert first.address != second.address
+
+        await first.publish(ServerSentEvent("foo", id="1"))
+        await first.publish(ServerSentEvent("bar", id="2"))
+        await wait_until(lambda: len(second_receiver.events) >= 2)
+
+        assert [e.data for e in second_receiver.events] == ["foo", "bar"]
+        # own events are not received
+        assert not first_receiver.events
+    finally:
+        await first.close()
+        await second.close()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+async def test_stale_socket(tmp_path: Path) -> None:
+    stale = tmp_path / "1-stale.sock"
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(str(stale))
+    sock.close()
+    other = tmp_path / "other.txt"
+    other.write_text("foo")
+
+    transport = UnixSocketTransport(str(tmp_path))
+    await transport.start(Receiver())
+    try:
+        await transport.publish(ServerSentEvent("foo"))
+    finally:
+        await transport.close()
+
+    assert not stale.exists()
+    assert other.exists()
+
+
+async def test_peers_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    scans = []
+    listdir = os.listdir
+
+    def counting_listdir(path: str) -> list[str]:
+        scans.append(path)
+        return listdir(path)
+
+    monkeypatch.setattr(os, "listdir", counting_listdir)
+    publisher = UnixSocketTransport(str(tmp_path), refresh_interval=0.1)
+    assert publisher.refresh_interval == 0.1
+    receiver = Receiver()
+    late = UnixSocketTransport(str(tmp_path))
+    await publisher.start(Receiver())
+    try:
+        await publisher.publish(ServerSentEvent("foo"))
+        await late.start(receiver)
+        await publisher.publish(ServerSentEvent("bar"))
+        assert len(scans) == 1
+        assert not receiver.events
+
+        # new process is found once the list is refreshed
+        await asyncio.sleep(0.1)
+        await publisher.publish(ServerSentEvent("baz"))
+        assert len(scans) == 2
+        await receiver.received.wait()
+        assert [e.data for e in receiver.events] == ["baz"]
+
+        # failed send rescans on the next publish
+        await late.close()
+        await publisher.publish(ServerSentEvent("qux"))
+        await publisher.publish(ServerSentEvent("quux"))
+        assert len(scans) == 3
+        assert publisher._peers == []
+    finally:
+        await publisher.close()
+        await late.close()
+
+
+async def test_failed_peer(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    publisher = UnixSocketTransport(str(tmp_path))
+    denied, other = UnixSocketTransport(str(tmp_path)), UnixSocketTransport(
+        str(tmp_path)
+    )
+    receiver = Receiver()
+    await publisher.start(Receiver())
+    await denied.start(Receiver())
+    await other.start(receiver)
+    assert publisher._sender is not None
+    sender = publisher._sender
+
+    class Sender:
+        def sendto(self, data: bytes, address: str) -> int:
+            if address == denied.address:
+                raise PermissionError(13, "Permission denied")
+            return sender.sendto(data, address)
+
+    publisher._sender = Sender()  # type: ignore[assignment]
+    try:
+        await publisher.publish(ServerSentEvent("foo"))
+        await wait_until(lambda: receiver.events)
+    finally:
+        publisher._sender = sender
+        await publisher.close()
+        await denied.close()
+        await other.close()
+
+    assert [e.data for e in receiver.events] == ["foo"]
+    assert "failed to send to" in caplog.text
+
+
+async def test_too_large(tmp_path: Path, aiohttp_client: AiohttpClient) -> None:
+    publisher = Broadcaster(transport=UnixSocketTransport(str(tmp_path)))
+    receiver = Receiver()
+    peer = UnixSocketTransport(str(tmp_path))
+    await publisher.start()
+    await peer.start(receiver)
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, broadcaster=publisher) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(publisher) >= 1)
+    try:
+        with pytest.raises(ValueError, match="does not fit into datagram"):
+            await publisher.publish("x" * 1024 * 1024)
+        assert await publisher.publish("foo") == 1
+        await wait_until(lambda: receiver.events)
+    finally:
+        await publisher.close()
+        await peer.close()
+
+    for response in list(publisher._subscribers):
+        response.stop_streaming()
+    resp = await task
+    # the large event is delivered nowhere
+    assert await resp.text() == "data: foo\r\n\r\n"
+    assert [e.data for e in receiver.events] == ["foo"]
+
+
+def test_wrong_refresh_interval(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="refresh_interval must not be negative"):
+        UnixSocketTransport(str(tmp_path), refresh_interval=-1)
+
+
+async def test_malformed_datagram(tmp_path: Path) -> None:
+    receiver = Receiver()
+    transport = UnixSocketTransport(str(tmp_path))
+    await transport.start(receiver)
+    assert transport.address is not None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(b"foo", transport.address)
+            sock.sendto(b'{"data": "bar"}', transport.address)
+        await receiver.received.wait()
+    finally:
+        await transport.close()
+
+    assert [e.data for e in receiver.events] == ["bar"]
+
+
+async def test_not_started(tmp_path: Path) -> None:
+    transport = UnixSocketTransport(str(tmp_path / "sse"))
+    assert transport.path == str(tmp_path / "sse")
+    with pytest.raises(RuntimeError, match="Transport is not started"):
+        await transport.publish(ServerSentEvent("foo"))
+
+    await transport.start(Receiver())
+    try:
+        with pytest.raises(RuntimeError, match="Transport is already started"):
+            await transport.start(Receiver())
+    finally:
+        await transport.close()
+    # closing is idempotent
+    await transport.close()
+
+
+async def test_broadcaster(tmp_path: Path, aiohttp_client: AiohttpClient) -> None:
+    publisher = Broadcaster(transport=UnixSocketTransport(str(tmp_path)))
+    history = MemoryEventHistory()
+    worker = Broadcaster(transport=UnixSocketTransport(str(tmp_path)), history=history)
+    assert worker.transport is not None
+    await publisher.start()
+    await worker.start()
+
+    async def func(request: web.Request) -> web.StreamResponse:
+        async with sse_response(request, broadcaster=worker) as sse:
+            await sse.wait()
+        return sse
+
+    app = web.Application()
+    app.router.add_route("GET", "/", func)
+    client = await aiohttp_client(app)
+
+    task = asyncio.create_task(client.get("/"))
+    await wait_until(lambda: len(worker) >= 1)
+
+    try:
+        # no local subscribers
+        assert await publisher.publish("foo", id="1", event="bar") == 0
+
+        async def received() -> bool:
+            return await history.after("1") is not None
+
+        await wait_until(received)
+    finally:
+        await publisher.close()
+        await worker.close()
+
+    for response in list(worker._subscribers):
+        response.stop_streaming()
+    resp = await task
+    assert await resp.text() == "id: 1\r\nevent: bar\r\ndata: foo\r\n\r\n"
+
+
+async def test_broadcaster_without_transport() -> None:
+    broadcaster = Broadcaster()
+    assert broadcaster.transport is None
+    await broadcaster.start()
+    await broadcaster.close()